@@ -0,0 +1,185 @@
+"""
+Seeds or replays the request mix of one project, inside a process of its own
+set up with the project settings. Started by `run.py`, which generates the
+settings and reads the results:
+
+    python benchmarks/driver.py seed PROJECT --data PATH [--scale N] ...
+    python benchmarks/driver.py replay PROJECT --data PATH [--scale N] ...
+
+`seed` migrates the database and fills it, and stores the seeded ids in the
+`--data` file. `replay` sends the warm-up requests, then the measured ones,
+through Django's test client: each request goes through the whole middleware
+and view stack, but not through a network or a server, which keeps runs
+reproducible. It prints the results as JSON, along with the median time a
+fixed workload took throughout the replay, to compare runs made while the
+machine ran at different speeds. Queries are counted on the
+`default` database, and the peak RSS is the one of the replaying process.
+"""
+import argparse
+import json
+import random
+import resource
+import statistics
+import sys
+import time
+
+import django
+
+from projects import PROJECTS, build_plan, consumed
+
+# The number of requests between two measures of the speed of the machine.
+CALIBRATION_INTERVAL = 20
+
+
+def percentile(latencies, percent):
+    """
+    Returns the given percentile of a non-empty list of latencies, by nearest
+    rank.
+    """
+    ordered = sorted(latencies)
+    return ordered[max(round(percent / 100 * len(ordered)) - 1, 0)]
+
+
+def calibrate():
+    """
+    Times a fixed CPU-bound workload, resembling request handling, to measure
+    how fast the machine runs at the moment. Returns the time in milliseconds.
+    """
+    rng = random.Random(0)
+    rows = [{'id': i, 'name': f'row {i}', 'score': rng.random()} for i in range(1000)]
+    start = time.perf_counter()
+    ranked = sorted(json.loads(json.dumps(rows)), key=lambda row: row['score'])
+    '\n'.join(f'<li>{row["name"]}: {row["score"]:.3f}</li>' for row in ranked)
+    return (time.perf_counter() - start) * 1000
+
+
+def peak_rss_mib():
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in KiB elsewhere.
+    return maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def seed(project, args):
+    from django.core.management import call_command
+    from django.db import transaction
+
+    call_command('migrate', verbosity=0)
+    counts = consumed(project.routes, build_plan(project.routes, args.warmup + args.requests, args.seed))
+    with transaction.atomic():
+        data = project.seed(args.scale, counts, random.Random(args.seed))
+    with open(args.data, 'w') as f:
+        json.dump(data, f)
+
+
+def send(client, project, route, data, rng):
+    path, payload = route.build(data, rng)
+    method = getattr(client, route.method.lower())
+    if route.method == 'GET':
+        response = method(path, payload)
+    elif project.json:
+        response = method(path, payload, content_type='application/json')
+    elif route.method == 'POST':
+        response = method(path, payload or {})
+    else:
+        response = method(path)
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+class QueryCounter:
+    """
+    Counts the queries run through the connections it wraps. Unlike the query
+    log of debug cursors, it has no size limit and stores nothing.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def replay(project, args):
+    from django.contrib.auth import get_user_model
+    from django.db import connections
+    from django.test import Client
+
+    with open(args.data) as f:
+        data = json.load(f)
+    routes = {route.name: route for route in project.routes}
+    plan = build_plan(project.routes, args.warmup + args.requests, args.seed)
+    rng = random.Random(args.seed)
+
+    clients = {'anonymous': Client()}
+    for name, pk in data['logins'].items():
+        clients[name] = Client()
+        clients[name].force_login(get_user_model().objects.get(pk=pk))
+
+    latencies = {name: [] for name in routes}
+    queries = {name: [] for name in routes}
+    errors = {name: 0 for name in routes}
+    for name in plan[:args.warmup]:
+        send(clients[routes[name].client], project, routes[name], data, rng)
+
+    calibrations = []
+    elapsed = 0.0
+    for index, name in enumerate(plan[args.warmup:]):
+        if index % CALIBRATION_INTERVAL == 0:
+            calibrations.append(calibrate())
+        route = routes[name]
+        counter = QueryCounter()
+        with connections['default'].execute_wrapper(counter):
+            request_start = time.perf_counter()
+            response = send(clients[route.client], project, route, data, rng)
+            latency = time.perf_counter() - request_start
+        latencies[name].append(latency)
+        elapsed += latency
+        queries[name].append(counter.count)
+        if response.status_code >= 400:
+            errors[name] += 1
+
+    return {
+        'requests': args.requests,
+        'requests_per_second': args.requests / elapsed,
+        'calibration_ms': statistics.median(calibrations),
+        'peak_rss_mib': peak_rss_mib(),
+        'errors': sum(errors.values()),
+        'routes': {
+            name: {
+                'count': len(latencies[name]),
+                'p50_ms': statistics.median(latencies[name]) * 1000,
+                'p99_ms': percentile(latencies[name], 99) * 1000,
+                'mean_queries': statistics.mean(queries[name]),
+                'max_queries': max(queries[name]),
+                'errors': errors[name],
+            }
+            for name in routes
+            if latencies[name]
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['seed', 'replay'])
+    parser.add_argument('project', choices=PROJECTS)
+    parser.add_argument('--data', required=True)
+    parser.add_argument('--scale', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    django.setup()
+    project = PROJECTS[args.project]
+    if args.command == 'seed':
+        seed(project, args)
+    else:
+        json.dump(replay(project, args), sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
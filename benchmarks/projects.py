@@ -0,0 +1,405 @@
+"""
+The data seeded in, and the request mixes replayed against, each project of
+the benchmark suite.
+
+A project is described by a `Project`. Its `seed` function fills a freshly
+migrated database and returns the ids the routes pick from, as a dict that
+the driver stores as JSON between the seeding and the replaying processes.
+Each `Route` is one kind of request: `build(data, rng)` returns its path and
+payload, and `weight` is its share of the request mix. Routes writing data
+consume the disposable rows seeded for them, so that the data the other
+routes read keeps the same size throughout a run.
+
+Only Django is imported here; the project modules are imported by the seed
+functions and route builders, which run after `django.setup()`.
+"""
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable
+
+# Words used for names, titles and texts, so that searches have matches.
+WORDS = [
+    'acid', 'after', 'amber', 'analog', 'angel', 'arcade', 'atlas', 'autumn', 'basement', 'black',
+    'blue', 'broken', 'burning', 'city', 'cloud', 'cobalt', 'crystal', 'dance', 'dark', 'dawn',
+    'desert', 'digital', 'dream', 'echo', 'electric', 'empire', 'falling', 'fever', 'fire', 'forest',
+    'ghost', 'glass', 'gold', 'harbor', 'heart', 'highway', 'honey', 'island', 'jungle', 'kings',
+    'last', 'light', 'lunar', 'machine', 'marble', 'midnight', 'mirror', 'neon', 'night', 'north',
+    'ocean', 'paper', 'phantom', 'pilot', 'quiet', 'radio', 'rebel', 'river', 'rocket', 'saint',
+    'shadow', 'silver', 'sonic', 'static', 'stone', 'summer', 'sunset', 'tiger', 'velvet', 'wild',
+]
+
+SEARCH_WORDS = WORDS[::7]
+
+# Code samples of the snippets. Highlighting is rendered once per sample.
+CODE_SAMPLES = [
+    'def fibonacci(n):\n    a, b = 0, 1\n    for _ in range(n):\n        a, b = b, a + b\n    return a\n',
+    'import json\n\n\ndef load(path):\n    with open(path) as f:\n        return json.load(f)\n',
+    'class Stack:\n    def __init__(self):\n        self.items = []\n\n    def push(self, item):\n'
+    '        self.items.append(item)\n',
+    'for i in range(10):\n    if i % 2:\n        print(i)\n',
+    'squares = {n: n * n for n in range(100)}\nprint(sum(squares.values()))\n',
+    'async def fetch(session, url):\n    async with session.get(url) as response:\n'
+    '        return await response.text()\n',
+    'try:\n    value = int(input())\nexcept ValueError:\n    value = 0\n',
+    'from dataclasses import dataclass\n\n\n@dataclass\nclass Point:\n    x: float\n    y: float\n',
+]
+
+STYLES = ['friendly', 'monokai', 'default', 'emacs']
+
+BULK_SIZE = 10
+
+
+@dataclass
+class Route:
+    """
+    One kind of request of a mix.
+
+    :ivar name: The label of the route in reports and baselines.
+    :type name: str
+    :ivar weight: The relative frequency of the route in the mix.
+    :type weight: int
+    :ivar method: The HTTP method.
+    :type method: str
+    :ivar build: Returns the path and the payload of a request, from the seeded
+        data and the random generator of the run.
+    :type build: Callable[[dict, random.Random], tuple[str, object]]
+    :ivar client: The client sending the request: ``'anonymous'``, or the key
+        of the seeded user to log in, in ``data['logins']``.
+    :type client: str
+    :ivar consumes: The key of the disposable ids in ``data``, and how many
+        each request consumes.
+    :type consumes: tuple[str, int] | None
+    """
+    name: str
+    weight: int
+    method: str
+    build: Callable
+    client: str = 'anonymous'
+    consumes: tuple = None
+
+
+@dataclass
+class Project:
+    """
+    A Django project of the repository, as seen by the benchmark suite.
+
+    :ivar directory: The directory of ``manage.py``, relative to the repository.
+    :type directory: str
+    :ivar settings: The settings module of the project.
+    :type settings: str
+    :ivar seed: Fills the database for a scale, and returns the seeded data.
+    :type seed: Callable[[int, Counter, random.Random], dict]
+    :ivar routes: The request mix.
+    :type routes: list[Route]
+    :ivar json: Whether payloads are sent as JSON rather than as forms.
+    :type json: bool
+    """
+    directory: str
+    settings: str
+    seed: Callable
+    routes: list = field(default_factory=list)
+    json: bool = False
+
+
+def build_plan(routes, count, seed):
+    """
+    Draws the names of the routes of ``count`` requests, according to their
+    weights. The plan only depends on its arguments, so that the seeding and
+    the replaying processes agree on it.
+    """
+    rng = random.Random(seed)
+    return rng.choices([route.name for route in routes], [route.weight for route in routes], k=count)
+
+
+def consumed(routes, plan):
+    """
+    Counts the disposable ids that a plan consumes, by key.
+    """
+    by_name = {route.name: route for route in routes}
+    counts = Counter()
+    for name in plan:
+        if by_name[name].consumes:
+            key, amount = by_name[name].consumes
+            counts[key] += amount
+    return counts
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def _name(rng):
+    return _text(rng, 2).title()
+
+
+def _pop(data, key, amount=1):
+    ids = data[key][:amount]
+    del data[key][:amount]
+    return ids
+
+
+def _create_users(names, staff=()):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+
+    # Hashing once keeps seeding fast with the production hasher.
+    password = make_password('benchmark')
+    users = [
+        User(username=name, email=f'{name}@example.com', password=password,
+             is_staff=name in staff, is_superuser=name in staff)
+        for name in names
+    ]
+    return [user.pk for user in User.objects.bulk_create(users, batch_size=1000)]
+
+
+# merchex
+
+
+def seed_merchex(scale, consumed, rng):
+    from listings.models import Band, Listing
+
+    def band(name):
+        return Band(name=name, genre=rng.choice(Band.Genre.values), biography=_text(rng, 40),
+                    year_formed=rng.randint(1960, 2021), active=rng.random() < 0.8,
+                    official_homepage=f'https://{name.replace(" ", "-").lower()}.example.com')
+
+    bands = Band.objects.bulk_create([band(_name(rng)) for _ in range(scale)], batch_size=1000)
+    disposable = Band.objects.bulk_create(
+        [band(f'Disposable {i}') for i in range(consumed['disposable_bands'])], batch_size=1000,
+    )
+    listings = Listing.objects.bulk_create(
+        [
+            Listing(title=_text(rng, 3).capitalize(), description=_text(rng, 25),
+                    sold=(sold := rng.random() < 0.3), year_sold=rng.randint(2000, 2021) if sold else None,
+                    type=rng.choice(Listing.Type.values),
+                    band=rng.choice(bands) if rng.random() < 0.9 else None)
+            for _ in range(scale * 5)
+        ],
+        batch_size=1000,
+    )
+    admin, = _create_users(['admin'], staff=['admin'])
+    return {
+        'bands': [band.pk for band in bands],
+        'listings': [listing.pk for listing in listings],
+        'disposable_bands': [band.pk for band in disposable],
+        'logins': {'staff': admin},
+    }
+
+
+def _url(name, *args):
+    from django.urls import reverse
+    return reverse(name, args=args)
+
+
+def _band_form(rng):
+    return {'name': _name(rng), 'genre': rng.choice(['HH', 'SP', 'AR']),
+            'biography': _text(rng, 40), 'year_formed': rng.randint(1960, 2021)}
+
+
+def _band_list(data, rng):
+    query = rng.choice([{}, {}, {'genre': rng.choice(['HH', 'SP', 'AR'])}, {'after': rng.choice(data['bands'])}])
+    return _url('band-list'), query
+
+
+def _listing_list(data, rng):
+    query = rng.choice([
+        {}, {}, {'type': rng.choice(['REC', 'CLO', 'POS', 'MIS'])}, {'sold': rng.choice(['true', 'false'])},
+        {'band': rng.choice(data['bands'])}, {'after': rng.choice(data['listings'])},
+    ])
+    return _url('listing'), query
+
+
+MERCHEX = Project(
+    directory='django/merchex',
+    settings='merchex.settings',
+    seed=seed_merchex,
+    routes=[
+        Route('GET band-list', 18, 'GET', _band_list),
+        Route('GET band-detail', 14, 'GET', lambda data, rng: (_url('band-detail', rng.choice(data['bands'])), None)),
+        Route('GET listing', 16, 'GET', _listing_list),
+        Route('GET listing-detail', 14, 'GET',
+              lambda data, rng: (_url('listing-detail', rng.choice(data['listings'])), None)),
+        Route('GET search', 8, 'GET', lambda data, rng: (_url('search'), {'q': rng.choice(SEARCH_WORDS)})),
+        Route('GET about', 3, 'GET', lambda data, rng: (_url('about'), None)),
+        Route('GET contact', 3, 'GET', lambda data, rng: (_url('contact'), None)),
+        Route('POST contact', 2, 'POST', lambda data, rng: (_url('contact'), {
+            'name': _name(rng), 'email': 'fan@example.com', 'message': _text(rng, 20),
+        })),
+        Route('GET email-sent', 2, 'GET', lambda data, rng: (_url('email-sent'), None)),
+        Route('GET band-create', 2, 'GET', lambda data, rng: (_url('band-create'), None)),
+        Route('POST band-create', 2, 'POST', lambda data, rng: (_url('band-create'), _band_form(rng))),
+        Route('GET band-update', 2, 'GET', lambda data, rng: (_url('band-update', rng.choice(data['bands'])), None)),
+        Route('POST band-update', 2, 'POST',
+              lambda data, rng: (_url('band-update', rng.choice(data['bands'])), _band_form(rng))),
+        Route('GET band-delete', 1, 'GET', lambda data, rng: (_url('band-delete', rng.choice(data['bands'])), None)),
+        Route('POST band-delete', 1, 'POST',
+              lambda data, rng: (_url('band-delete', *_pop(data, 'disposable_bands')), None),
+              consumes=('disposable_bands', 1)),
+        Route('GET listing-create', 2, 'GET', lambda data, rng: (_url('listing-create'), None)),
+        Route('POST listing-create', 2, 'POST', lambda data, rng: (_url('listing-create'), {
+            'title': _text(rng, 3).capitalize(), 'description': _text(rng, 25),
+            'type': rng.choice(['REC', 'CLO', 'POS', 'MIS']), 'band': rng.choice(data['bands']),
+        })),
+        Route('GET admin:index', 1, 'GET', lambda data, rng: (_url('admin:index'), None), client='staff'),
+        Route('GET admin:listings_band_changelist', 1, 'GET',
+              lambda data, rng: (_url('admin:listings_band_changelist'), None), client='staff'),
+        Route('GET admin:listings_listing_changelist', 1, 'GET',
+              lambda data, rng: (_url('admin:listings_listing_changelist'), None), client='staff'),
+        Route('GET admin:listings_band_change', 1, 'GET',
+              lambda data, rng: (_url('admin:listings_band_change', rng.choice(data['bands'])), None),
+              client='staff'),
+    ],
+)
+
+
+# drf-tutorial
+
+
+def seed_drf_tutorial(scale, consumed, rng):
+    from snippets.models import Snippet
+
+    user_ids = _create_users(['owner'] + [f'user{i}' for i in range(max(scale // 10, 1))])
+    owner = user_ids[0]
+    disposable_count = consumed['disposable_snippets']
+
+    snippet_ids, own_ids, disposable_ids = [], [], []
+    total = scale * 5 + disposable_count
+    for start in range(0, total, 1000):
+        batch = []
+        for i in range(start, min(start + 1000, total)):
+            owner_id = owner if i < 50 or i >= scale * 5 else rng.choice(user_ids)
+            batch.append(Snippet(owner_id=owner_id, title=_text(rng, 3).capitalize(),
+                                 code=f'# {_text(rng, 4)}\n{rng.choice(CODE_SAMPLES)}'
+                                 if rng.random() < 0.5 else rng.choice(CODE_SAMPLES)))
+        Snippet.update_highlighted(batch)
+        for i, snippet in enumerate(Snippet.objects.bulk_create(batch), start=start):
+            (disposable_ids if i >= scale * 5 else own_ids if i < 50 else snippet_ids).append(snippet.pk)
+    return {
+        'users': user_ids,
+        'snippets': snippet_ids + own_ids,
+        'own_snippets': own_ids,
+        'disposable_snippets': disposable_ids,
+        'logins': {'owner': owner},
+    }
+
+
+def _snippet_payload(rng):
+    return {'title': _text(rng, 3).capitalize(), 'code': rng.choice(CODE_SAMPLES)}
+
+
+DRF_TUTORIAL = Project(
+    directory='drf-tutorial',
+    settings='tutorial.settings',
+    seed=seed_drf_tutorial,
+    json=True,
+    routes=[
+        Route('GET api-root', 2, 'GET', lambda data, rng: (_url('api-root'), None)),
+        Route('GET snippet-list', 18, 'GET', lambda data, rng: (_url('snippet-list'), None)),
+        Route('GET snippet-list (page_size=50)', 4, 'GET',
+              lambda data, rng: (_url('snippet-list'), {'page_size': 50})),
+        Route('GET snippet-list (search)', 6, 'GET',
+              lambda data, rng: (_url('snippet-list'), {'search': rng.choice(SEARCH_WORDS)})),
+        Route('GET snippet-detail', 18, 'GET',
+              lambda data, rng: (_url('snippet-detail', rng.choice(data['snippets'])), None)),
+        Route('GET snippet-highlight', 10, 'GET',
+              lambda data, rng: (_url('snippet-highlight', rng.choice(data['snippets'])), None)),
+        Route('GET snippet-stylesheet', 4, 'GET',
+              lambda data, rng: (_url('snippet-stylesheet', rng.choice(STYLES)), None)),
+        Route('GET user-list', 6, 'GET', lambda data, rng: (_url('user-list'), None)),
+        Route('GET user-detail', 6, 'GET', lambda data, rng: (_url('user-detail', rng.choice(data['users'])), None)),
+        Route('GET snippet-export', 1, 'GET', lambda data, rng: (_url('snippet-export'), None)),
+        Route('GET user-export', 1, 'GET', lambda data, rng: (_url('user-export'), None)),
+        Route('POST snippet-list', 6, 'POST', lambda data, rng: (_url('snippet-list'), _snippet_payload(rng)),
+              client='owner'),
+        Route('PATCH snippet-detail', 5, 'PATCH',
+              lambda data, rng: (_url('snippet-detail', rng.choice(data['own_snippets'])),
+                                 {'title': _text(rng, 3).capitalize()}),
+              client='owner'),
+        Route('PUT snippet-detail', 1, 'PUT',
+              lambda data, rng: (_url('snippet-detail', rng.choice(data['own_snippets'])), _snippet_payload(rng)),
+              client='owner'),
+        Route('DELETE snippet-detail', 2, 'DELETE',
+              lambda data, rng: (_url('snippet-detail', *_pop(data, 'disposable_snippets')), None),
+              client='owner', consumes=('disposable_snippets', 1)),
+        Route('POST snippet-bulk', 1, 'POST',
+              lambda data, rng: (_url('snippet-bulk'), [_snippet_payload(rng) for _ in range(BULK_SIZE)]),
+              client='owner'),
+        Route('PATCH snippet-bulk', 1, 'PATCH',
+              lambda data, rng: (_url('snippet-bulk'), [
+                  {'id': pk, 'title': _text(rng, 3).capitalize()}
+                  for pk in rng.sample(data['own_snippets'], BULK_SIZE)
+              ]),
+              client='owner'),
+        Route('DELETE snippet-bulk', 1, 'DELETE',
+              lambda data, rng: (_url('snippet-bulk'), _pop(data, 'disposable_snippets', BULK_SIZE)),
+              client='owner', consumes=('disposable_snippets', BULK_SIZE)),
+    ],
+)
+
+
+# drf quickstart
+
+
+def seed_drf(scale, consumed, rng):
+    from django.contrib.auth.models import Group, User
+
+    groups = Group.objects.bulk_create([Group(name=f'{_name(rng)} {i}') for i in range(20)])
+    user_ids = _create_users(['admin'] + [f'user{i}' for i in range(scale)], staff=['admin'])
+    disposable_ids = _create_users([f'disposable{i}' for i in range(consumed['disposable_users'])])
+    memberships = [
+        User.groups.through(user_id=user_id, group_id=group.pk)
+        for user_id in user_ids
+        for group in rng.sample(groups, rng.randint(0, 2))
+    ]
+    User.groups.through.objects.bulk_create(memberships, batch_size=1000)
+    return {
+        'users': user_ids,
+        'groups': [group.pk for group in groups],
+        'disposable_users': disposable_ids,
+        'logins': {'staff': user_ids[0]},
+    }
+
+
+def _user_payload(data, rng):
+    name = f'{rng.choice(WORDS)}{rng.getrandbits(48):x}'
+    return {'username': name, 'email': f'{name}@example.com',
+            'groups': [_url('group-detail', pk) for pk in rng.sample(data['groups'], rng.randint(0, 2))]}
+
+
+DRF = Project(
+    directory='drf',
+    settings='tutorial.settings',
+    seed=seed_drf,
+    json=True,
+    routes=[
+        Route('GET api-root', 2, 'GET', lambda data, rng: (_url('api-root'), None), client='staff'),
+        Route('GET user-list', 25, 'GET', lambda data, rng: (_url('user-list'), None), client='staff'),
+        Route('GET user-list (page_size=100)', 5, 'GET',
+              lambda data, rng: (_url('user-list'), {'page_size': 100}), client='staff'),
+        Route('GET user-detail', 25, 'GET',
+              lambda data, rng: (_url('user-detail', rng.choice(data['users'])), None), client='staff'),
+        Route('GET group-list', 10, 'GET', lambda data, rng: (_url('group-list'), None), client='staff'),
+        Route('GET group-detail', 8, 'GET',
+              lambda data, rng: (_url('group-detail', rng.choice(data['groups'])), None), client='staff'),
+        Route('GET user-export', 1, 'GET', lambda data, rng: (_url('user-export'), None), client='staff'),
+        Route('POST user-list', 4, 'POST', lambda data, rng: (_url('user-list'), _user_payload(data, rng)),
+              client='staff'),
+        Route('PATCH user-detail', 5, 'PATCH',
+              lambda data, rng: (_url('user-detail', rng.choice(data['users'][1:])),
+                                 {'email': f'{rng.getrandbits(48):x}@example.com'}),
+              client='staff'),
+        Route('DELETE user-detail', 1, 'DELETE',
+              lambda data, rng: (_url('user-detail', *_pop(data, 'disposable_users')), None),
+              client='staff', consumes=('disposable_users', 1)),
+        Route('POST group-list', 1, 'POST',
+              lambda data, rng: (_url('group-list'), {'name': f'{_name(rng)} {rng.getrandbits(48):x}'}),
+              client='staff'),
+    ],
+)
+
+PROJECTS = {
+    'merchex': MERCHEX,
+    'drf-tutorial': DRF_TUTORIAL,
+    'drf': DRF,
+}
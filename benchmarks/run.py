@@ -0,0 +1,179 @@
+"""
+Benchmarks merchex, the snippets API of drf-tutorial and the quickstart API
+of drf by replaying a realistic request mix against every route, and compares
+the results with a stored baseline.
+
+    python benchmarks/run.py [--projects merchex drf-tutorial drf] [--scale 1000]
+        [--requests 2000] [--warmup 200] [--seed 0]
+        [--save [PATH]] [--compare [PATH]] [--tolerance 0.25]
+
+Each project gets a fresh database in a temporary directory, seeded by one
+process with `--scale` bands (and five listings each), users (and five
+snippets each in drf-tutorial), and replayed by another. The request mixes are
+defined in `projects.py`. Every route reports its p50 and p99 latency and the
+number of queries it ran; every project reports its throughput and the peak
+RSS of the replaying process.
+
+`--save` stores the results as a JSON baseline, `benchmarks/baseline.json` by
+default. `--compare` reruns the benchmarks and exits with status 1 when they
+regressed from the baseline: a route running more queries, latencies or peak
+RSS more than `--tolerance` above it, throughput more than `--tolerance` below
+it, or new errors. Latencies and throughputs are scaled by the speed of the
+machine during each run, measured with a fixed workload, before being compared.
+Latency changes under `MIN_DELTA_MS` are ignored, and latencies are only
+compared for routes with enough requests to be stable: `MIN_P50_SAMPLES` for
+p50, `MIN_P99_SAMPLES` for p99, which is also allowed `P99_TOLERANCE_FACTOR`
+times the tolerance. The scaling only evens out changes of speed
+of a given machine; record baselines on the machine that compares against
+them.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from projects import PROJECTS
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+REPOSITORY_DIR = BENCHMARKS_DIR.parent
+DEFAULT_BASELINE = BENCHMARKS_DIR / 'baseline.json'
+
+MIN_DELTA_MS = 1.0
+MIN_P50_SAMPLES = 50
+MIN_P99_SAMPLES = 100
+# Tail latencies vary more between runs than medians.
+P99_TOLERANCE_FACTOR = 2
+
+SETTINGS = '''\
+from {settings} import *
+
+DATABASES['default']['NAME'] = {name!r}
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+'''
+
+
+def bench(name, args):
+    project = PROJECTS[name]
+    project_dir = REPOSITORY_DIR / project.directory
+    with tempfile.TemporaryDirectory() as directory:
+        Path(directory, 'benchmark_settings.py').write_text(
+            SETTINGS.format(settings=project.settings, name=str(Path(directory, 'db.sqlite3'))),
+        )
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'benchmark_settings',
+            'PYTHONPATH': os.pathsep.join([directory, str(project_dir), str(BENCHMARKS_DIR)]),
+        }
+        command = [
+            sys.executable, str(BENCHMARKS_DIR / 'driver.py'), name, '--data', str(Path(directory, 'data.json')),
+            '--scale', str(args.scale), '--requests', str(args.requests), '--warmup', str(args.warmup),
+            '--seed', str(args.seed),
+        ]
+        subprocess.run([command[0], command[1], 'seed', *command[2:]], cwd=project_dir, env=env, check=True)
+        replay = subprocess.run([command[0], command[1], 'replay', *command[2:]], cwd=project_dir, env=env,
+                                check=True, stdout=subprocess.PIPE, text=True)
+    return json.loads(replay.stdout)
+
+
+def report(name, result):
+    print(f'{name}: {result["requests_per_second"]:.1f} req/s, peak RSS {result["peak_rss_mib"]:.1f} MiB, '
+          f'{result["errors"]} error(s), calibration {result["calibration_ms"]:.1f} ms')
+    print(f'  {"route":<40} {"count":>6} {"p50 ms":>8} {"p99 ms":>8} {"queries":>8}')
+    for route, stats in result['routes'].items():
+        print(f'  {route:<40} {stats["count"]:>6} {stats["p50_ms"]:>8.2f} {stats["p99_ms"]:>8.2f} '
+              f'{stats["max_queries"]:>8}')
+
+
+def compare(baseline, results, tolerance):
+    """
+    Returns a description of every regression of ``results`` from ``baseline``.
+    """
+    regressions = []
+
+    def check(label, current, reference, higher_is_worse=True, min_delta=0.0, slowdown=1.0, tolerance=tolerance):
+        # A machine running slower than when the baseline was recorded raises
+        # latencies and lowers throughput in proportion.
+        reference = reference * slowdown if higher_is_worse else reference / slowdown
+        if higher_is_worse:
+            regressed = current > reference * (1 + tolerance) and current - reference > min_delta
+        else:
+            regressed = current < reference / (1 + tolerance)
+        if regressed:
+            regressions.append(f'{label}: {current:.2f} (baseline {reference:.2f})')
+
+    for name, result in results['projects'].items():
+        if name not in baseline['projects']:
+            continue
+        reference = baseline['projects'][name]
+        slowdown = result['calibration_ms'] / reference['calibration_ms']
+        check(f'{name} req/s', result['requests_per_second'], reference['requests_per_second'],
+              higher_is_worse=False, slowdown=slowdown)
+        check(f'{name} peak RSS MiB', result['peak_rss_mib'], reference['peak_rss_mib'])
+        for route, stats in result['routes'].items():
+            if route not in reference['routes']:
+                continue
+            route_reference = reference['routes'][route]
+            label = f'{name} {route}'
+            if stats['max_queries'] > route_reference['max_queries']:
+                regressions.append(f'{label} queries: {stats["max_queries"]} '
+                                   f'(baseline {route_reference["max_queries"]})')
+            if stats['errors'] > route_reference['errors']:
+                regressions.append(f'{label} errors: {stats["errors"]} (baseline {route_reference["errors"]})')
+            samples = min(stats['count'], route_reference['count'])
+            if samples >= MIN_P50_SAMPLES:
+                check(f'{label} p50 ms', stats['p50_ms'], route_reference['p50_ms'],
+                      min_delta=MIN_DELTA_MS, slowdown=slowdown)
+            if samples >= MIN_P99_SAMPLES:
+                check(f'{label} p99 ms', stats['p99_ms'], route_reference['p99_ms'],
+                      min_delta=MIN_DELTA_MS, slowdown=slowdown, tolerance=tolerance * P99_TOLERANCE_FACTOR)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--projects', nargs='+', choices=PROJECTS, default=list(PROJECTS))
+    parser.add_argument('--scale', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, type=Path)
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, type=Path)
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    parameters = {'scale': args.scale, 'requests': args.requests, 'warmup': args.warmup, 'seed': args.seed}
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline['parameters'] != parameters:
+            parser.error(f'the baseline was recorded with {baseline["parameters"]}, not {parameters}')
+
+    results = {
+        'parameters': parameters,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'projects': {},
+    }
+    for name in args.projects:
+        results['projects'][name] = bench(name, args)
+        report(name, results['projects'][name])
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + '\n')
+        print(f'Saved the baseline to {args.save}.')
+    if baseline is not None:
+        regressions = compare(baseline, results, args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print('No regression from the baseline.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""
+Measures the throughput of the merchex pages served by uvicorn (ASGI) and by
+gunicorn (WSGI), with the same number of worker processes, both with the async
+views and with sync versions of the same views. Under ASGI the async views run
+natively on the event loop and the sync ones in a thread; under WSGI each async
+view runs in an event loop of its own.
+
+    python benchmarks/asgi_load.py [--workers 4] [--clients 16]
+        [--duration 20] [--write-ratio 0.05] [--settings merchex.settings]
+
+Each server gets a fresh database in a temporary directory. Every client is a
+separate process looping over random requests: the band and listing lists and
+details and the about page for reads, and contact form submissions, which go
+to the outbox, for writes. Pass `--settings merchex.settings_sqlite` to measure the tuned SQLite
+profile. Requires gunicorn and `uvicorn[standard]`.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+BANDS = 200
+LISTINGS_PER_BAND = 5
+
+SETTINGS = '''\
+from {base} import *
+
+DATABASES['default']['NAME'] = {name!r}
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+ROOT_URLCONF = {urlconf!r}
+'''
+
+# The views read by the clients, as they were before they were made async.
+SYNC_URLS = '''\
+import copy
+
+from django.shortcuts import redirect, render
+
+from listings.cache import attach_row_versions, cache_response, get_timeout, list_version_name, row_version_name
+from listings.conditional import (band_detail_state, band_list_state, conditional_page, listing_detail_state,
+                                  listing_list_state)
+from listings.forms import BandFilterForm, ContactUsForm, ListingFilterForm
+from listings.models import Band, Listing
+from listings.outbox import enqueue
+from listings.pagination import paginate_by_id
+from listings.replicas import read_from_replica
+from merchex.urls import urlpatterns as async_urlpatterns
+
+
+@read_from_replica
+@conditional_page(band_list_state)
+@cache_response(lambda request: list_version_name(Band))
+def band_list(request):
+    filter_form = BandFilterForm(request.GET)
+    page = paginate_by_id(filter_form.filter(Band.objects.for_list()), request)
+    attach_row_versions(page)
+    return render(request, "listings/band_list.html",
+                  {{"bands": page, "page": page, "filter_form": filter_form, "cache_timeout": get_timeout()}})
+
+
+@read_from_replica
+@conditional_page(band_detail_state)
+@cache_response(lambda request, id: row_version_name(Band, id))
+def band_detail(request, id):
+    return render(request, "listings/band_detail.html", {{"band": Band.objects.get(id=id)}})
+
+
+def about(request):
+    return render(request, "listings/about.html")
+
+
+@read_from_replica
+@conditional_page(listing_list_state)
+@cache_response(lambda request: list_version_name(Listing))
+def listing(request):
+    filter_form = ListingFilterForm(request.GET)
+    page = paginate_by_id(filter_form.filter(Listing.objects.for_list()), request)
+    attach_row_versions(page)
+    return render(request, "listings/listing.html",
+                  {{"listings": page, "page": page, "filter_form": filter_form, "cache_timeout": get_timeout()}})
+
+
+@read_from_replica
+@conditional_page(listing_detail_state)
+@cache_response(lambda request, id: row_version_name(Listing, id))
+def listing_detail(request, id):
+    listing = Listing.objects.for_detail().get(id=id)
+    return render(request, "listings/listing_detail.html", {{"listing": listing}})
+
+
+def contact(request):
+    if request.method == "POST":
+        form = ContactUsForm(request.POST)
+        if form.is_valid():
+            enqueue(name=form.cleaned_data['name'], email=form.cleaned_data['email'],
+                    message=form.cleaned_data['message'])
+            return redirect("email-sent")
+    else:
+        form = ContactUsForm()
+    return render(request, "listings/contact.html", {{"form": form}})
+
+
+SYNC_VIEWS = {{
+    'band-list': band_list, 'band-detail': band_detail, 'about': about,
+    'listing': listing, 'listing-detail': listing_detail, 'contact': contact,
+}}
+
+urlpatterns = []
+for pattern in async_urlpatterns:
+    if getattr(pattern, 'name', None) in SYNC_VIEWS:
+        pattern = copy.copy(pattern)
+        pattern.callback = SYNC_VIEWS[pattern.name]
+    urlpatterns.append(pattern)
+'''
+
+VIEWS = {
+    'async': 'merchex.urls',
+    'sync': 'bench_sync_urls',
+}
+
+SETUP = '''\
+from listings.models import Band, Listing
+
+bands = Band.objects.bulk_create(
+    Band(name=f'Band {{i}}', genre=Band.Genre.HIP_HOP, biography='Bio', year_formed=2000)
+    for i in range({bands})
+)
+Listing.objects.bulk_create(
+    Listing(title=f'Listing {{i}}', description='Description', type=Listing.Type.RECORD, band=band)
+    for band in bands for i in range({listings})
+)
+'''
+
+SERVERS = {
+    'uvicorn': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'merchex.asgi:application', '--workers', str(workers),
+        '--host', '127.0.0.1', '--port', str(port), '--log-level', 'warning', '--no-access-log',
+    ],
+    'gunicorn': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'merchex.wsgi', '--workers', str(workers),
+        '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+    ],
+}
+
+
+def request(port, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response, response.read()
+    finally:
+        connection.close()
+
+
+def csrf_token(port):
+    response, content = request(port, 'GET', '/contact-us')
+    cookie = response.getheader('Set-Cookie').split(';')[0]
+    token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', content).group(1).decode()
+    return cookie, token
+
+
+def run_client(port, index, duration, write_ratio, results):
+    cookie, token = csrf_token(port)
+    form = {'Cookie': cookie, 'Content-Type': 'application/x-www-form-urlencoded'}
+    reads = [
+        lambda rng: '/bands/',
+        lambda rng: f'/bands/{rng.randint(1, BANDS)}/',
+        lambda rng: '/listings/',
+        lambda rng: f'/listings/{rng.randint(1, BANDS * LISTINGS_PER_BAND)}',
+        lambda rng: '/about-us/',
+    ]
+    samples = {'read': [], 'write': [], 'errors': 0}
+    rng = random.Random(index)
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            kind, method, path, expected, headers = 'write', 'POST', '/contact-us', 302, form
+            body = urlencode({'csrfmiddlewaretoken': token, 'name': f'Fan {index}',
+                              'email': 'fan@example.com', 'message': 'Hello'})
+        else:
+            kind, method, expected, headers, body = 'read', 'GET', 200, None, None
+            path = rng.choice(reads)(rng)
+        start = time.perf_counter()
+        try:
+            ok = request(port, method, path, body, headers)[0].status == expected
+        except OSError:
+            ok = False
+        if ok:
+            samples[kind].append(time.perf_counter() - start)
+        else:
+            samples['errors'] += 1
+    results[index] = samples
+
+
+def manage(settings, *args, **kwargs):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings}
+    return subprocess.run([sys.executable, 'manage.py', *args], cwd=BASE_DIR, env=env, check=True, **kwargs)
+
+
+def wait_for(port):
+    for _ in range(100):
+        try:
+            request(port, 'GET', '/about-us/')
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('the server did not start')
+
+
+def bench(server, views, args, port):
+    with tempfile.TemporaryDirectory() as directory:
+        module = 'bench_settings'
+        Path(directory, f'{module}.py').write_text(
+            SETTINGS.format(base=args.settings, name=str(Path(directory, 'db.sqlite3')), urlconf=VIEWS[views]))
+        Path(directory, 'bench_sync_urls.py').write_text(SYNC_URLS.format())
+        os.environ['PYTHONPATH'] = os.pathsep.join([directory, str(BASE_DIR)])
+        manage(module, 'migrate', '-v', '0')
+        manage(module, 'shell', '-c', SETUP.format(bands=BANDS, listings=LISTINGS_PER_BAND),
+               stdout=subprocess.DEVNULL)
+
+        process = subprocess.Popen(
+            SERVERS[server](port, args.workers), cwd=BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': module},
+        )
+        try:
+            wait_for(port)
+            with multiprocessing.Manager() as manager:
+                results = manager.dict()
+                clients = [
+                    multiprocessing.Process(target=run_client,
+                                            args=(port, i, args.duration, args.write_ratio, results))
+                    for i in range(args.clients)
+                ]
+                for client in clients:
+                    client.start()
+                for client in clients:
+                    client.join()
+                samples = [results[i] for i in range(args.clients)]
+        finally:
+            process.terminate()
+            process.wait()
+
+    reads = [latency for sample in samples for latency in sample['read']]
+    writes = [latency for sample in samples for latency in sample['write']]
+    errors = sum(sample['errors'] for sample in samples)
+    return reads, writes, errors
+
+
+def describe(latencies, duration):
+    if not latencies:
+        return '      0 req/s'
+    p50 = statistics.median(latencies) * 1000
+    p99 = statistics.quantiles(latencies, n=100)[98] * 1000 if len(latencies) > 1 else p50
+    return f'{len(latencies) / duration:7.1f} req/s, p50 {p50:6.1f} ms, p99 {p99:7.1f} ms'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--write-ratio', type=float, default=0.05)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--settings', default='merchex.settings')
+    args = parser.parse_args()
+
+    for server in SERVERS:
+        for views in VIEWS:
+            reads, writes, errors = bench(server, views, args, args.port)
+            name = f'{server}, {views}'
+            print(f'{name:>15}: reads  {describe(reads, args.duration)}')
+            print(f'{"":>15}  writes {describe(writes, args.duration)}')
+            print(f'{"":>15}  errors {errors}')
+
+
+if __name__ == '__main__':
+    main()
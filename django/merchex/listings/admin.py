@@ -1,17 +1,49 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 
-from .models import Band, Listing
+from .models import Band, ContactMessage, Listing
 
 
-class BandAdmin(admin.ModelAdmin):
-    list_display = ("name", "year_formed", "genre")
+class DeferredChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.defer(*self.model_admin.list_defer)
+
+
+class DeferredListMixin:
+    """
+    Skips loading the columns named in ``list_defer`` on the changelist page only,
+    so that large text columns that are never displayed there are not fetched for
+    every row while the change form still loads complete objects.
+    """
+    list_defer = ()
+
+    def get_changelist(self, request, **kwargs):
+        return DeferredChangeList
+
+
+class BandAdmin(DeferredListMixin, admin.ModelAdmin):
+    list_display = ("name", "year_formed", "genre", "listing_count", "sold_count", "last_year_sold")
+    list_defer = ("biography",)
+    readonly_fields = ("listing_count", "sold_count", "last_year_sold")
 
 
 admin.site.register(Band, BandAdmin)
 
 
-class ListingAdmin(admin.ModelAdmin):
+class ListingAdmin(DeferredListMixin, admin.ModelAdmin):
     list_display = ("title", "band", "sold", "type")
+    list_select_related = ("band",)
+    list_defer = ("description", "band__biography")
 
 
 admin.site.register(Listing, ListingAdmin)
+
+
+class ContactMessageAdmin(DeferredListMixin, admin.ModelAdmin):
+    list_display = ("email", "name", "status", "attempts", "created_at", "sent_at")
+    list_filter = ("status",)
+    list_defer = ("message", "last_error")
+
+
+admin.site.register(ContactMessage, ContactMessageAdmin)
@@ -0,0 +1,177 @@
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from . import replicas
+
+KEY_PREFIX = 'listings'
+
+
+def get_timeout():
+    return getattr(settings, 'LISTINGS_CACHE_TIMEOUT', 300)
+
+
+def _new_version():
+    return str(time.time_ns())
+
+
+def _version_key(name):
+    return f'{KEY_PREFIX}:version:{name}'
+
+
+def row_version_name(model, pk):
+    return f'{model._meta.model_name}:{pk}'
+
+
+def list_version_name(model):
+    return f'{model._meta.model_name}:list'
+
+
+def get_version(name):
+    """
+    Returns the current version token for ``name``, creating one if needed.
+
+    Versions are opaque tokens rather than counters: if a version key is evicted
+    it is recreated with a fresh token, so entries stored under the old one can
+    never be served again.
+
+    :param name: The versioned entity, see ``row_version_name``/``list_version_name``.
+    :type name: str
+    :return: The current version token.
+    :rtype: str
+    """
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_row_versions(model, pks):
+    """
+    Returns the version token of each of the given rows in a single cache call.
+
+    :param model: The model class the rows belong to.
+    :type model: type[Model]
+    :param pks: The primary keys of the rows.
+    :type pks: Iterable[int]
+    :return: A mapping from primary key to version token.
+    :rtype: dict
+    """
+    keys = {_version_key(row_version_name(model, pk)): pk for pk in pks}
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {pk: found[key] for key, pk in keys.items()}
+
+
+def bump_versions(*names):
+    """
+    Invalidates every entry cached under the given versioned entities.
+    """
+    version = _new_version()
+    cache.set_many({_version_key(name): version for name in names}, None)
+
+
+def attach_row_versions(objects):
+    """
+    Sets ``cache_version`` on each object so templates can key per-row fragments
+    with ``{% cache %}``.
+
+    :param objects: Model instances of a single model.
+    :type objects: Iterable[Model]
+    """
+    objects = list(objects)
+    if objects:
+        versions = get_row_versions(type(objects[0]), [obj.pk for obj in objects])
+        for obj in objects:
+            obj.cache_version = versions[obj.pk]
+
+
+def _response_key(view, version_func, request, args, kwargs):
+    """
+    Returns the cache key of the response, and whether the response may be
+    stored under it.
+    """
+    names = version_func(request, *args, **kwargs)
+    if isinstance(names, str):
+        names = [names]
+    versions = [get_version(name) for name in names]
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    key = f'{KEY_PREFIX}:response:{view.__name__}:{path}:{":".join(versions)}'
+    return key, not _may_predate(versions)
+
+
+def _may_predate(versions):
+    # A replica may not have caught up with a change made less than a pin
+    # window ago, so a page it renders must not be stored under the version
+    # bumped by that change.
+    if not replicas.reads_may_lag():
+        return False
+    newest = max(int(version) for version in versions)
+    return time.time_ns() - newest < replicas.get_pin_seconds() * 10 ** 9
+
+
+def _is_cacheable(response):
+    return response.status_code == 200 and not response.streaming and not response.cookies
+
+
+def cache_response(version_func):
+    """
+    Caches the full response of a read view, synchronous or asynchronous.
+
+    The cache key combines the view name, the full request path (so cursors and
+    filters get their own entries) and the version returned by
+    ``version_func(request, *args, **kwargs)``. Bumping that version is therefore
+    enough to invalidate every cached variant of the page. Pages read from a
+    replica are not stored while the replica may still lag behind the version.
+
+    :param version_func: Returns the version name(s) the response depends on.
+    :type version_func: Callable
+    :return: The view decorator.
+    :rtype: Callable
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+
+                key, storable = await sync_to_async(_response_key)(view, version_func, request, args, kwargs)
+                cached = await cache.aget(key)
+                if cached is not None:
+                    content, content_type = cached
+                    return HttpResponse(content, content_type=content_type)
+
+                response = await view(request, *args, **kwargs)
+                if storable and _is_cacheable(response):
+                    await cache.aset(key, (response.content, response['Content-Type']), get_timeout())
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            key, storable = _response_key(view, version_func, request, args, kwargs)
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view(request, *args, **kwargs)
+            if storable and _is_cacheable(response):
+                cache.set(key, (response.content, response['Content-Type']), get_timeout())
+            return response
+        return wrapper
+    return decorator
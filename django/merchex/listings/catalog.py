@@ -0,0 +1,245 @@
+import csv
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .cache import bump_versions, list_version_name, row_version_name
+from .models import Band, Listing
+
+BATCH_SIZE = 1000
+
+FORMATS = ('csv', 'jsonl')
+
+# The columns of each model in catalog files. The ``band`` column of listings
+# holds the band name.
+COLUMNS = {
+    Band: ['id', 'name', 'genre', 'biography', 'year_formed', 'active', 'official_homepage'],
+    Listing: ['id', 'title', 'description', 'sold', 'year_sold', 'type', 'band'],
+}
+
+
+@dataclass
+class ImportResult:
+    """
+    The outcome of a catalog import.
+
+    :ivar created: The number of inserted rows.
+    :type created: int
+    :ivar updated: The number of rows whose ``id`` already existed, and whose
+        columns present in the file were overwritten.
+    :type updated: int
+    :ivar errors: ``(line, messages)`` pairs for the rows that failed
+        validation and were skipped.
+    :type errors: list[tuple[int, dict]]
+    """
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)
+
+
+def guess_format(path):
+    """
+    Returns the catalog format matching the extension of ``path``, if any.
+    """
+    extension = path.rsplit('.', 1)[-1].lower()
+    return extension if extension in FORMATS else None
+
+
+def read_rows(stream, format):
+    """
+    Lazily reads the rows of a catalog file as dicts.
+
+    :param stream: A text stream.
+    :type stream: TextIO
+    :param format: ``'csv'`` or ``'jsonl'``.
+    :type format: str
+    :return: ``(line, row)`` pairs, where ``line`` is the line number of the row.
+    :rtype: Iterator[tuple[int, dict]]
+    """
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line, text in enumerate(stream, start=1):
+            if text.strip():
+                yield line, json.loads(text)
+
+
+def write_rows(stream, format, columns, rows):
+    """
+    Writes rows to a catalog file, one at a time.
+
+    :param stream: A text stream.
+    :type stream: TextIO
+    :param format: ``'csv'`` or ``'jsonl'``.
+    :type format: str
+    :param columns: The column names, in order.
+    :type columns: list[str]
+    :param rows: Tuples of values, in the order of ``columns``.
+    :type rows: Iterable[tuple]
+    :return: The number of written rows.
+    :rtype: int
+    """
+    count = 0
+    if format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(columns)
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+    else:
+        for count, row in enumerate(rows, start=1):
+            stream.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+            stream.write('\n')
+    return count
+
+
+def export_rows(model):
+    """
+    Streams every row of ``model`` in ``id`` order, in the order of its
+    ``COLUMNS``, without instantiating any model.
+    """
+    values = ['band__name' if column == 'band' else column for column in COLUMNS[model]]
+    queryset = model.objects.order_by('id').values_list(*values)
+    return queryset.iterator(chunk_size=BATCH_SIZE)
+
+
+def _build_instance(model, row, band_ids):
+    if not isinstance(row, dict):
+        raise ValidationError({NON_FIELD_ERRORS: ['Expected an object.']})
+    data = {}
+    for column in COLUMNS[model]:
+        if column not in row:
+            continue
+        value = row[column]
+        if column == 'band':
+            if value in (None, ''):
+                data['band_id'] = None
+            elif value in band_ids:
+                data['band_id'] = band_ids[value]
+            else:
+                raise ValidationError({'band': [f'Unknown band "{value}".']})
+            continue
+        if column == 'id':
+            try:
+                data['id'] = model._meta.pk.to_python(value) if value not in (None, '') else None
+            except ValidationError as error:
+                raise ValidationError({'id': error.messages})
+            continue
+        if value == '' and model._meta.get_field(column).null:
+            value = None
+        data[column] = value
+
+    instance = model(**data)
+    # The band is resolved above, and ids are checked against the whole chunk
+    # by _save_chunk, so neither needs a query per row.
+    instance.full_clean(exclude=['id', 'band'], validate_unique=False, validate_constraints=False)
+    return instance
+
+
+def _update_rows(model, instances, fields):
+    # bulk_update() builds a CASE expression per field and row, which takes
+    # longer to compile than to run on large chunks. One UPDATE statement is
+    # prepared instead, and executed for every row.
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in fields]
+    sql = 'UPDATE %s SET %s WHERE %s = %%s' % (
+        quote_name(model._meta.db_table),
+        ', '.join('%s = %%s' % quote_name(field.column) for field in fields),
+        quote_name(model._meta.pk.column),
+    )
+    params = [
+        [field.get_db_prep_save(getattr(instance, field.attname), connection) for field in fields] + [instance.pk]
+        for instance in instances
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def _save_chunk(model, instances):
+    ids = [instance.pk for instance, _ in instances if instance.pk is not None]
+    existing = set(model.objects.filter(pk__in=ids).values_list('pk', flat=True)) if ids else set()
+    to_create = [instance for instance, _ in instances if instance.pk not in existing]
+    # Existing rows only get the columns present in the file, so rows are
+    # grouped by those columns, each group sharing one prepared UPDATE.
+    to_update = defaultdict(list)
+    now = timezone.now()
+    for instance, fields in instances:
+        if instance.pk in existing:
+            # The UPDATE does not run auto_now.
+            instance.updated_at = now
+            to_update[fields].append(instance)
+
+    with transaction.atomic(using=router.db_for_write(model)):
+        model.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        for fields, group in to_update.items():
+            _update_rows(model, group, [*fields, 'updated_at'])
+    return len(to_create), [instance.pk for group in to_update.values() for instance in group]
+
+
+def _invalidate(model, updated_ids):
+    # Bulk operations do not send the signals that keep the caches in sync.
+    names = [list_version_name(model)] + [row_version_name(model, pk) for pk in updated_ids]
+    if model is Band and updated_ids:
+        listing_ids = Listing.objects.filter(band_id__in=updated_ids).values_list('id', flat=True)
+        names += [row_version_name(Listing, pk) for pk in listing_ids]
+    if model is Listing:
+        # The database triggers keep the listing statistics of bands up to
+        # date, but band lists are cached.
+        names.append(list_version_name(Band))
+    bump_versions(*names)
+
+
+def import_rows(model, rows, batch_size=BATCH_SIZE):
+    """
+    Validates and saves catalog rows, ``batch_size`` at a time.
+
+    Each row is checked with the model validators, and invalid rows are skipped,
+    as are rows repeating the ``id`` of an earlier row of the same chunk.
+    Rows whose ``id`` exists are overwritten with a prepared ``UPDATE`` of the
+    columns present in the row, the others are inserted with ``bulk_create``,
+    each chunk in its own transaction. Listing
+    bands are looked up by name in a map loaded once; when several bands share
+    a name, the most recent one is used.
+
+    :param model: ``Band`` or ``Listing``.
+    :type model: type[Model]
+    :param rows: ``(line, row)`` pairs, as returned by ``read_rows``.
+    :type rows: Iterable[tuple[int, dict]]
+    :param batch_size: The number of rows validated and saved together.
+    :type batch_size: int
+    :return: The import counts and errors.
+    :rtype: ImportResult
+    """
+    band_ids = dict(Band.objects.order_by('id').values_list('name', 'id')) if model is Listing else {}
+    result = ImportResult()
+    rows = iter(rows)
+    while chunk := list(islice(rows, batch_size)):
+        instances = []
+        ids = set()
+        for line, row in chunk:
+            try:
+                instance = _build_instance(model, row, band_ids)
+            except ValidationError as error:
+                result.errors.append((line, error.message_dict))
+                continue
+            if instance.pk is not None:
+                # A chunk is saved in a single INSERT or UPDATE, which cannot
+                # hold the same id twice.
+                if instance.pk in ids:
+                    result.errors.append((line, {'id': [f'Duplicate id {instance.pk} in the file.']}))
+                    continue
+                ids.add(instance.pk)
+            fields = tuple(column for column in COLUMNS[model] if column != 'id' and column in row)
+            instances.append((instance, fields))
+        created, updated_ids = _save_chunk(model, instances)
+        result.created += created
+        result.updated += len(updated_ids)
+        _invalidate(model, updated_ids)
+    return result
@@ -0,0 +1,89 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.views.decorators.http import condition
+
+from .forms import BandFilterForm, ListingFilterForm
+from .models import Band, Listing
+from .pagination import paginate_by_id
+
+
+def conditional_page(state_func):
+    """
+    Adds ETag/Last-Modified handling to a read view.
+
+    ``state_func(request, *args, **kwargs)`` returns an ``(etag, last_modified)``
+    pair computed from a cheap query. It is evaluated once per request, and the
+    view (and its template) only runs when the client's copy is stale. For
+    asynchronous views the query runs in a thread before the checks are made.
+
+    :param state_func: Computes the validators of the requested page.
+    :type state_func: Callable
+    :return: The view decorator.
+    :rtype: Callable
+    """
+    attr = f'_listings_state_{state_func.__name__}'
+
+    def get_state(request, *args, **kwargs):
+        if not hasattr(request, attr):
+            setattr(request, attr, state_func(request, *args, **kwargs))
+        return getattr(request, attr)
+
+    conditional = condition(
+        etag_func=lambda request, *args, **kwargs: get_state(request, *args, **kwargs)[0],
+        last_modified_func=lambda request, *args, **kwargs: get_state(request, *args, **kwargs)[1],
+    )
+
+    def decorator(view):
+        view = conditional(view)
+        if not iscoroutinefunction(view):
+            return view
+
+        @wraps(view)
+        async def async_view(request, *args, **kwargs):
+            # condition() calls the validator functions synchronously.
+            await sync_to_async(get_state)(request, *args, **kwargs)
+            return await view(request, *args, **kwargs)
+        return async_view
+
+    return decorator
+
+
+def _etag(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _row_state(pk, *timestamps):
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    if not timestamps:
+        return None, None
+    return _etag(pk, *timestamps), max(timestamps)
+
+
+def _page_state(queryset, request):
+    # Runs the same keyset query as the view, but only loads the validator columns.
+    # Pages have no Last-Modified: deleting one of their rows does not move the
+    # latest modification time of the others, while it changes the ETag.
+    page = paginate_by_id(queryset.only('id', 'updated_at'), request)
+    rows = [(row.id, row.updated_at) for row in page]
+    return _etag(page.previous_cursor, page.next_cursor, *rows), None
+
+
+def band_list_state(request):
+    return _page_state(BandFilterForm(request.GET).filter(Band.objects.all()), request)
+
+
+def band_detail_state(request, id):
+    updated_at = Band.objects.filter(id=id).values_list('updated_at', flat=True).first()
+    return _row_state(id, updated_at)
+
+
+def listing_list_state(request):
+    return _page_state(ListingFilterForm(request.GET).filter(Listing.objects.all()), request)
+
+
+def listing_detail_state(request, id):
+    # The detail page also renders the band, so its modification counts too.
+    row = Listing.objects.filter(id=id).values_list('updated_at', 'band__updated_at').first()
+    return _row_state(id, *row) if row else (None, None)
@@ -0,0 +1,55 @@
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import bump_versions, list_version_name
+from .models import Band, Listing
+
+BATCH_SIZE = 1000
+
+COUNTERS = Band.COUNTERS
+
+
+def _actual_counters():
+    listings = Listing.objects.filter(band=OuterRef('pk')).order_by().values('band')
+    sold = listings.filter(sold=True)
+    return {
+        'actual_listing_count': Coalesce(Subquery(listings.annotate(count=Count('pk')).values('count')), 0),
+        'actual_sold_count': Coalesce(Subquery(sold.annotate(count=Count('pk')).values('count')), 0),
+        'actual_last_year_sold': Subquery(sold.annotate(year=Max('year_sold')).values('year')),
+    }
+
+
+def rebuild_band_counters(batch_size=BATCH_SIZE):
+    """
+    Recomputes the listing statistics of every band, and saves those that
+    differ from the stored ones.
+
+    The statistics are kept up to date by database triggers, so this only
+    repairs bands whose listings were changed while the triggers were missing,
+    e.g. by restoring a dump made without them. Bands are read in a single
+    query, ``batch_size`` rows at a time, and the stale ones are updated in
+    bulk.
+
+    :param batch_size: The number of bands loaded and updated together.
+    :type batch_size: int
+    :return: The number of bands whose statistics were fixed.
+    :rtype: int
+    """
+    bands = Band.objects.only('id', *COUNTERS).annotate(**_actual_counters()).order_by('id')
+    now = timezone.now()
+    stale = []
+    for band in bands.iterator(chunk_size=batch_size):
+        actual = tuple(getattr(band, f'actual_{counter}') for counter in COUNTERS)
+        if tuple(getattr(band, counter) for counter in COUNTERS) != actual:
+            for counter, value in zip(COUNTERS, actual):
+                setattr(band, counter, value)
+            # bulk_update() does not run auto_now.
+            band.updated_at = now
+            stale.append(band)
+
+    Band.objects.bulk_update(stale, [*COUNTERS, 'updated_at'], batch_size=batch_size)
+    if stale:
+        # Band lists render the statistics, and cache each row under its values.
+        bump_versions(list_version_name(Band))
+    return len(stale)
@@ -1,4 +1,5 @@
 from django import forms
+from django.db.models import BLANK_CHOICE_DASH
 
 from .models import Band, Listing
 
@@ -9,6 +10,10 @@ class ContactUsForm(forms.Form):
     message = forms.CharField(max_length=1000)
 
 
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Recherche', max_length=200, required=False)
+
+
 class BandForm(forms.ModelForm):
     class Meta:
         model = Band
@@ -19,3 +24,38 @@ class ListingForm(forms.ModelForm):
     class Meta:
         model = Listing
         exclude = ('sold',)
+
+
+class BandFilterForm(forms.Form):
+    genre = forms.ChoiceField(choices=BLANK_CHOICE_DASH + Band.Genre.choices, required=False)
+
+    def filter(self, queryset):
+        """
+        Restricts a Band queryset to the valid filters submitted in the form.
+        Invalid values are ignored rather than rejected.
+        """
+        self.is_valid()
+        if self.cleaned_data.get('genre'):
+            queryset = queryset.filter(genre=self.cleaned_data['genre'])
+        return queryset
+
+
+class ListingFilterForm(forms.Form):
+    type = forms.ChoiceField(choices=BLANK_CHOICE_DASH + Listing.Type.choices, required=False)
+    sold = forms.NullBooleanField(required=False)
+    # Bounded by SQLite integers, which larger ids would overflow.
+    band = forms.IntegerField(required=False, min_value=1, max_value=2**63 - 1)
+
+    def filter(self, queryset):
+        """
+        Restricts a Listing queryset to the valid filters submitted in the form.
+        Invalid values are ignored rather than rejected.
+        """
+        self.is_valid()
+        if self.cleaned_data.get('type'):
+            queryset = queryset.filter(type=self.cleaned_data['type'])
+        if self.cleaned_data.get('sold') is not None:
+            queryset = queryset.filter(sold=self.cleaned_data['sold'])
+        if self.cleaned_data.get('band') is not None:
+            queryset = queryset.filter(band_id=self.cleaned_data['band'])
+        return queryset
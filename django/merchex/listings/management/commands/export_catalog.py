@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from listings import catalog
+from listings.models import Band, Listing
+
+MODELS = {'bands': Band, 'listings': Listing}
+
+
+class Command(BaseCommand):
+    help = "Exports every band or listing to a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=MODELS, help="The kind of rows to export.")
+        parser.add_argument('path', help="The file to write, or - for the standard output.")
+        parser.add_argument('--format', choices=catalog.FORMATS,
+                            help="The file format. Defaults to the file extension.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or catalog.guess_format(path)
+        if format is None:
+            raise CommandError("Cannot guess the format of %s, use --format." % path)
+
+        model = MODELS[options['model']]
+        stream = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        try:
+            count = catalog.write_rows(stream, format, catalog.COLUMNS[model], catalog.export_rows(model))
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        if path != '-':
+            self.stdout.write(f"Exported {count} row(s) to {path}.")
@@ -0,0 +1,49 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from listings import catalog
+from listings.models import Band, Listing
+
+MODELS = {'bands': Band, 'listings': Listing}
+
+
+class Command(BaseCommand):
+    help = "Imports bands or listings from a CSV or JSONL file of any size."
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=MODELS, help="The kind of rows in the file.")
+        parser.add_argument('path', help="The file to import, or - for the standard input.")
+        parser.add_argument('--format', choices=catalog.FORMATS,
+                            help="The file format. Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=catalog.BATCH_SIZE,
+                            help="Number of rows validated and saved together.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or catalog.guess_format(path)
+        if format is None:
+            raise CommandError("Cannot guess the format of %s, use --format." % path)
+
+        start = time.perf_counter()
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            rows = catalog.read_rows(stream, format)
+            result = catalog.import_rows(MODELS[options['model']], rows, options['batch_size'])
+        except (ValueError, csv.Error) as error:
+            raise CommandError("Cannot read %s: %s" % (path, error))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - start
+
+        for line, messages in result.errors:
+            for field, errors in messages.items():
+                self.stderr.write(f"Line {line}: {field}: {' '.join(errors)}")
+        total = result.created + result.updated
+        self.stdout.write(
+            f"Created {result.created}, updated {result.updated}, skipped {len(result.errors)} "
+            f"row(s) in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/s)."
+        )
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from listings import outbox
+
+
+class Command(BaseCommand):
+    help = "Sends the queued contact form messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help="Number of messages sent over each SMTP connection.")
+        parser.add_argument('--workers', type=int, default=4,
+                            help="Number of batches sent concurrently.")
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep polling the outbox instead of exiting once it is empty.")
+        parser.add_argument('--interval', type=float, default=5,
+                            help="Seconds to wait between two polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = outbox.requeue_stale()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} interrupted message(s).")
+            sent, failed = outbox.process_outbox(options['batch_size'], options['workers'])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} message(s), {failed} failed.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from listings import counters
+
+
+class Command(BaseCommand):
+    help = "Recomputes the listing statistics of every band, fixing those that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=counters.BATCH_SIZE,
+                            help="The number of bands loaded and updated together.")
+
+    def handle(self, *args, **options):
+        fixed = counters.rebuild_band_counters(batch_size=options['batch_size'])
+        self.stdout.write(f"Fixed the statistics of {fixed} band(s).")
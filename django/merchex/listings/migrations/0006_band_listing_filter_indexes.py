@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_listing_band'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='band',
+            index=models.Index(fields=['genre', 'id'], name='listings_ba_genre_9db4b1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['type', 'id'], name='listings_li_type_d92f40_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['sold', 'id'], name='listings_li_sold_540e76_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='listing',
+            index=models.Index(fields=['band', 'id'], name='listings_li_band_id_ef572b_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0007_band_updated_at_listing_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('email', models.EmailField(max_length=254)),
+                ('message', models.CharField(max_length=1000)),
+                ('status', models.CharField(choices=[('PEN', 'Pending'), ('SNG', 'Sending'), ('SNT', 'Sent'), ('FLD', 'Failed')], default='PEN', max_length=5)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='listings_co_status_584519_idx')],
+            },
+        ),
+    ]
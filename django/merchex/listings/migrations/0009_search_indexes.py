@@ -0,0 +1,58 @@
+from django.db import migrations
+
+
+def fts_triggers(table, columns):
+    """
+    Returns the statements creating the triggers that keep the FTS5 index of
+    ``columns`` of ``table`` in sync with it.
+    """
+    fts = f'{table}_fts'
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{column}' for column in columns)
+    old = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER {fts}_update AFTER UPDATE OF {names} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END",
+    ]
+
+
+def fts_sql(table, columns):
+    """
+    Creates an external content FTS5 index over ``columns`` of ``table``, kept
+    in sync by triggers, and fills it with the existing rows.
+    """
+    fts = f'{table}_fts'
+    names = ', '.join(columns)
+    forwards = [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        *fts_triggers(table, columns),
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+    backwards = [
+        f'DROP TRIGGER {fts}_update',
+        f'DROP TRIGGER {fts}_delete',
+        f'DROP TRIGGER {fts}_insert',
+        f'DROP TABLE {fts}',
+    ]
+    return migrations.RunSQL(forwards, backwards)
+
+
+class Migration(migrations.Migration):
+    # SQLite drops the triggers of a table when a migration rebuilds it, e.g.
+    # to add a NOT NULL column: such migrations have to run fts_triggers()
+    # again.
+
+    dependencies = [
+        ('listings', '0008_contactmessage'),
+    ]
+
+    operations = [
+        fts_sql('listings_band', ['name', 'biography']),
+        fts_sql('listings_listing', ['title', 'description']),
+    ]
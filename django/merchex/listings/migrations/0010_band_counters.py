@@ -0,0 +1,72 @@
+# Generated by Django 5.2.6 on 2026-10-18 05:18
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+fts_triggers = import_module('listings.migrations.0009_search_indexes').fts_triggers
+
+BAND_FTS_COLUMNS = ['name', 'biography']
+BAND_FTS_TRIGGERS = fts_triggers('listings_band', BAND_FTS_COLUMNS)
+DROP_BAND_FTS_TRIGGERS = [
+    f'DROP TRIGGER IF EXISTS listings_band_fts_{event}' for event in ['insert', 'delete', 'update']
+]
+
+# Recomputes the statistics of the bands whose ids are listed, from the
+# (band, id) index of their listings. Their updated_at moves as well, since
+# band lists render the statistics and are validated against it.
+REFRESH_BANDS = (
+    "UPDATE listings_band SET "
+    "listing_count = (SELECT COUNT(*) FROM listings_listing WHERE band_id = listings_band.id), "
+    "sold_count = (SELECT COUNT(*) FROM listings_listing WHERE band_id = listings_band.id AND sold), "
+    "last_year_sold = (SELECT MAX(year_sold) FROM listings_listing WHERE band_id = listings_band.id AND sold), "
+    "updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') "
+    "WHERE id IN ({ids});"
+)
+
+COUNTER_TRIGGERS = [
+    "CREATE TRIGGER listings_band_counters_insert AFTER INSERT ON listings_listing "
+    "WHEN new.band_id IS NOT NULL BEGIN " + REFRESH_BANDS.format(ids='new.band_id') + " END",
+    "CREATE TRIGGER listings_band_counters_delete AFTER DELETE ON listings_listing "
+    "WHEN old.band_id IS NOT NULL BEGIN " + REFRESH_BANDS.format(ids='old.band_id') + " END",
+    # Saving a listing writes every column: only actual changes refresh bands.
+    "CREATE TRIGGER listings_band_counters_update AFTER UPDATE OF band_id, sold, year_sold ON listings_listing "
+    "WHEN old.band_id IS NOT new.band_id OR old.sold IS NOT new.sold OR old.year_sold IS NOT new.year_sold "
+    "BEGIN " + REFRESH_BANDS.format(ids='old.band_id, new.band_id') + " END",
+]
+DROP_COUNTER_TRIGGERS = [
+    f'DROP TRIGGER listings_band_counters_{event}' for event in ['update', 'delete', 'insert']
+]
+
+
+class Migration(migrations.Migration):
+
+    # Adding the columns rebuilds listings_band, which drops its FTS triggers:
+    # they are created again after the columns are added, and after they are
+    # removed when migrating backwards.
+
+    dependencies = [
+        ('listings', '0009_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(migrations.RunSQL.noop, BAND_FTS_TRIGGERS),
+        migrations.AddField(
+            model_name='band',
+            name='last_year_sold',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='band',
+            name='listing_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='band',
+            name='sold_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(DROP_BAND_FTS_TRIGGERS + BAND_FTS_TRIGGERS, DROP_BAND_FTS_TRIGGERS),
+        migrations.RunSQL(COUNTER_TRIGGERS, DROP_COUNTER_TRIGGERS),
+        migrations.RunSQL(REFRESH_BANDS.format(ids='SELECT id FROM listings_band'), migrations.RunSQL.noop),
+    ]
@@ -1,5 +1,25 @@
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.mail import EmailMessage
 from django.db import models
+from django.utils import timezone
+
+
+class BandQuerySet(models.QuerySet):
+    def for_list(self):
+        """Only load the columns rendered by band lists."""
+        return self.only('id', 'name', 'listing_count', 'sold_count', 'last_year_sold')
+
+
+class ListingQuerySet(models.QuerySet):
+    def for_list(self):
+        """Only load the columns rendered by listing lists."""
+        return self.only('id', 'title')
+
+    def for_detail(self):
+        """Join the band in the same query, loading only the columns rendered with it."""
+        return self.select_related('band').defer(
+            'band__biography', 'band__official_homepage', 'band__year_formed',
+        )
 
 
 class Band(models.Model):
@@ -16,10 +36,38 @@ class Band(models.Model):
     )
     active = models.fields.BooleanField(default=True)
     official_homepage = models.fields.URLField(null=True, blank=True)
+    updated_at = models.fields.DateTimeField(auto_now=True)
+    # Statistics of the listings of the band, kept up to date by database
+    # triggers on listings_listing, see migration 0010.
+    listing_count = models.fields.PositiveIntegerField(default=0, editable=False)
+    sold_count = models.fields.PositiveIntegerField(default=0, editable=False)
+    last_year_sold = models.fields.IntegerField(null=True, blank=True, editable=False)
+
+    COUNTERS = ('listing_count', 'sold_count', 'last_year_sold')
+
+    objects = BandQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['genre', 'id']),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Updates of an existing band leave out the listing statistics, which
+        only the triggers write: those of the instance may be stale.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.name not in self.COUNTERS
+            ]
+        super().save(*args, **kwargs)
+
 
 class Listing(models.Model):
     class Type(models.TextChoices):
@@ -34,6 +82,53 @@ class Listing(models.Model):
     year_sold = models.fields.IntegerField(null=True, blank=True)
     type = models.fields.CharField(choices=Type.choices, max_length=5)
     band = models.ForeignKey(Band, null=True, on_delete=models.SET_NULL)
+    updated_at = models.fields.DateTimeField(auto_now=True)
+
+    objects = ListingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['type', 'id']),
+            models.Index(fields=['sold', 'id']),
+            models.Index(fields=['band', 'id']),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class ContactMessage(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'PEN'
+        SENDING = 'SNG'
+        SENT = 'SNT'
+        FAILED = 'FLD'
+
+    name = models.fields.CharField(max_length=100, blank=True)
+    email = models.fields.EmailField()
+    message = models.fields.CharField(max_length=1000)
+    status = models.fields.CharField(choices=Status.choices, default=Status.PENDING, max_length=5)
+    attempts = models.fields.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.fields.DateTimeField(default=timezone.now)
+    # When a worker claimed the message, which it owns for CONTACT_OUTBOX_LEASE
+    # seconds.
+    claimed_at = models.fields.DateTimeField(null=True, blank=True)
+    last_error = models.fields.TextField(blank=True)
+    created_at = models.fields.DateTimeField(auto_now_add=True)
+    sent_at = models.fields.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.name or "anonyme"} <{self.email}>'
+
+    def as_email(self):
+        return EmailMessage(
+            subject=f'Message from {self.name or "anonyme"} via MerchEx Contact Us form',
+            body=self.message,
+            from_email=self.email,
+            to=['admin@merchex.xyz'],
+        )
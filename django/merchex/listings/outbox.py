@@ -0,0 +1,184 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ContactMessage
+
+
+def get_max_attempts():
+    return getattr(settings, 'CONTACT_OUTBOX_MAX_ATTEMPTS', 5)
+
+
+def get_retry_delay():
+    return getattr(settings, 'CONTACT_OUTBOX_RETRY_DELAY', 60)
+
+
+def get_lease():
+    return getattr(settings, 'CONTACT_OUTBOX_LEASE', 600)
+
+
+def enqueue(name, email, message):
+    """
+    Stores a contact message in the outbox. It is sent later by the
+    ``process_contact_outbox`` command, outside of the request.
+
+    :return: The queued message.
+    :rtype: ContactMessage
+    """
+    return ContactMessage.objects.create(name=name, email=email, message=message)
+
+
+async def aenqueue(name, email, message):
+    """
+    Asynchronous version of ``enqueue``, for use in async views.
+    """
+    return await ContactMessage.objects.acreate(name=name, email=email, message=message)
+
+
+def requeue_stale():
+    """
+    Puts back in the queue the messages a worker claimed more than
+    ``CONTACT_OUTBOX_LEASE`` seconds ago but never reported on, e.g. because it
+    was killed while sending. Messages claimed more recently may still be
+    owned by a live worker, and are left alone.
+
+    :return: The number of requeued messages.
+    :rtype: int
+    """
+    expired = timezone.now() - timedelta(seconds=get_lease())
+    return ContactMessage.objects.filter(
+        Q(claimed_at__lt=expired) | Q(claimed_at__isnull=True),
+        status=ContactMessage.Status.SENDING,
+    ).update(status=ContactMessage.Status.PENDING, claimed_at=None)
+
+
+def claim_batch(batch_size):
+    """
+    Marks up to ``batch_size`` due messages as being sent and returns them.
+
+    Messages are only claimed while still pending, in a single transaction, so
+    that concurrent workers never claim the same message. The claim is
+    stamped, and only the messages carrying the stamp are returned.
+
+    :param batch_size: The maximum number of messages to claim.
+    :type batch_size: int
+    :return: The claimed messages.
+    :rtype: list[ContactMessage]
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = ContactMessage.objects.filter(
+            status=ContactMessage.Status.PENDING,
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at', 'id')
+        ids = list(due.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return []
+        ContactMessage.objects.filter(
+            id__in=ids, status=ContactMessage.Status.PENDING,
+        ).update(status=ContactMessage.Status.SENDING, claimed_at=now)
+        return list(ContactMessage.objects.filter(
+            id__in=ids, status=ContactMessage.Status.SENDING, claimed_at=now,
+        ).order_by('next_attempt_at', 'id'))
+
+
+def send_batch(messages):
+    """
+    Sends a batch of messages over a single connection to the email backend.
+
+    Each message is sent on its own so a failure can be attributed to it, but the
+    connection is opened once for the whole batch. This function does not touch
+    the database and can safely run in a worker thread.
+
+    :param messages: The messages to send.
+    :type messages: list[ContactMessage]
+    :return: ``(message, error)`` pairs, where ``error`` is ``None`` on success.
+    :rtype: list[tuple[ContactMessage, Exception | None]]
+    """
+    results = []
+    try:
+        with get_connection() as connection:
+            for message in messages:
+                try:
+                    connection.send_messages([message.as_email()])
+                except Exception as error:
+                    results.append((message, error))
+                else:
+                    results.append((message, None))
+    except Exception as error:
+        # Opening or closing the connection failed: whatever was not reported
+        # yet is considered failed.
+        reported = {message.id for message, _ in results}
+        results += [(message, error) for message in messages if message.id not in reported]
+    return results
+
+
+def record_results(results):
+    """
+    Marks the sent messages as such, and schedules a retry with exponential
+    backoff for the others until they reach ``CONTACT_OUTBOX_MAX_ATTEMPTS``.
+
+    :param results: The pairs returned by ``send_batch``.
+    :type results: list[tuple[ContactMessage, Exception | None]]
+    """
+    now = timezone.now()
+    sent_ids = [message.id for message, error in results if error is None]
+    if sent_ids:
+        ContactMessage.objects.filter(id__in=sent_ids).update(
+            status=ContactMessage.Status.SENT, sent_at=now, last_error='', claimed_at=None,
+        )
+
+    for message, error in results:
+        if error is None:
+            continue
+        message.attempts += 1
+        message.last_error = repr(error)
+        if message.attempts >= get_max_attempts():
+            message.status = ContactMessage.Status.FAILED
+        else:
+            message.status = ContactMessage.Status.PENDING
+            message.next_attempt_at = now + timedelta(
+                seconds=get_retry_delay() * 2 ** (message.attempts - 1),
+            )
+        message.claimed_at = None
+        message.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at', 'claimed_at'])
+
+
+def process_outbox(batch_size=50, workers=4):
+    """
+    Sends every due message, ``workers`` batches at a time.
+
+    Batches are claimed and their results recorded from the calling thread, while
+    the pool threads only talk to the email backend.
+
+    :param batch_size: The number of messages sent over each connection.
+    :type batch_size: int
+    :param workers: The number of batches sent concurrently.
+    :type workers: int
+    :return: The number of sent and failed deliveries.
+    :rtype: tuple[int, int]
+    """
+    sent = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batches = []
+            for _ in range(workers):
+                batch = claim_batch(batch_size)
+                if not batch:
+                    break
+                batches.append(batch)
+            if not batches:
+                return sent, failed
+
+            for results in executor.map(send_batch, batches):
+                record_results(results)
+                for _, error in results:
+                    if error is None:
+                        sent += 1
+                    else:
+                        failed += 1
@@ -0,0 +1,104 @@
+from dataclasses import dataclass, field
+
+PAGE_SIZE = 25
+
+
+@dataclass
+class KeysetPage:
+    """
+    A single page of a keyset (cursor) paginated queryset.
+
+    :ivar object_list: The objects on this page, in ascending ``id`` order.
+    :type object_list: list
+    :ivar next_cursor: The ``id`` to pass as ``after`` to fetch the next page, or
+        ``None`` if this is the last page.
+    :type next_cursor: int | None
+    :ivar previous_cursor: The ``id`` to pass as ``before`` to fetch the previous
+        page, or ``None`` if this is the first page.
+    :type previous_cursor: int | None
+    """
+    object_list: list = field(default_factory=list)
+    next_cursor: int | None = None
+    previous_cursor: int | None = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def _parse_cursor(value):
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor >= 0 else None
+
+
+def _keyset_query(queryset, request, page_size):
+    after = _parse_cursor(request.GET.get('after'))
+    before = _parse_cursor(request.GET.get('before'))
+    backwards = before is not None and after is None
+    if backwards:
+        queryset = queryset.filter(id__lt=before).order_by('-id')
+    else:
+        if after is not None:
+            queryset = queryset.filter(id__gt=after)
+        queryset = queryset.order_by('id')
+    return queryset[:page_size + 1], backwards, after is not None
+
+
+def _build_page(rows, page_size, backwards, has_after):
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows = rows[::-1]
+        return KeysetPage(
+            object_list=rows,
+            next_cursor=rows[-1].id if rows else None,
+            previous_cursor=rows[0].id if rows and has_more else None,
+        )
+    return KeysetPage(
+        object_list=rows,
+        next_cursor=rows[-1].id if rows and has_more else None,
+        previous_cursor=rows[0].id if rows and has_after else None,
+    )
+
+
+def paginate_by_id(queryset, request, page_size=PAGE_SIZE):
+    """
+    Slices a queryset into a page using keyset pagination on ``id``.
+
+    The ``after`` and ``before`` query parameters hold the ``id`` of the last
+    (respectively first) object of the adjacent page. Only ``page_size + 1`` rows
+    are ever fetched, so the cost of a page does not depend on its position or on
+    the size of the table, unlike ``OFFSET`` based pagination.
+
+    :param queryset: The queryset to paginate. Any existing ordering is replaced.
+    :type queryset: QuerySet
+    :param request: The HTTP request holding the cursor parameters.
+    :type request: HttpRequest
+    :param page_size: The maximum number of objects per page.
+    :type page_size: int
+    :return: The requested page.
+    :rtype: KeysetPage
+    """
+    query, backwards, has_after = _keyset_query(queryset, request, page_size)
+    return _build_page(list(query), page_size, backwards, has_after)
+
+
+async def apaginate_by_id(queryset, request, page_size=PAGE_SIZE):
+    """
+    Asynchronous version of ``paginate_by_id``, for use in async views.
+    """
+    query, backwards, has_after = _keyset_query(queryset, request, page_size)
+    return _build_page([row async for row in query], page_size, backwards, has_after)
@@ -0,0 +1,163 @@
+import random
+import sqlite3
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'use_primary'
+
+# Whether reads may go to a replica, enabled by ``read_from_replica`` around
+# the views that tolerate replication lag.
+_replica_reads = ContextVar('listings_replica_reads', default=False)
+# Whether the client wrote recently, set by ``ReplicaPinMiddleware``.
+_pinned = ContextVar('listings_replica_pinned', default=False)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def get_pin_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10)
+
+
+def reads_may_lag():
+    """
+    Whether the reads made now may go to a replica lagging behind the primary.
+    """
+    return bool(get_replicas()) and _replica_reads.get() and not _pinned.get()
+
+
+class ReplicaRouter:
+    """
+    Sends writes to the primary (``default``) database, and the reads of the
+    views decorated with ``read_from_replica`` to one of ``DATABASE_REPLICAS``
+    picked at random.
+
+    Every other read, and every read of a client pinned to the primary by
+    ``ReplicaPinMiddleware``, goes to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reads_may_lag():
+            return random.choice(get_replicas())
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary through replication.
+        if db in get_replicas():
+            return False
+        return None
+
+
+@contextmanager
+def replica_reads():
+    """
+    Lets the reads made in the block go to a replica.
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_from_replica(view):
+    """
+    Sends the reads of a view, synchronous or asynchronous, to a replica unless
+    the client is pinned to the primary.
+
+    :param view: A read-only view that tolerates replication lag.
+    :type view: Callable
+    :return: The decorated view.
+    :rtype: Callable
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            with replica_reads():
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with replica_reads():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """
+    Gives read-your-writes consistency on top of ``ReplicaRouter``.
+
+    After a request with an unsafe method, the client gets a short-lived cookie
+    pinning its reads to the primary for ``DATABASE_REPLICA_PIN_SECONDS``, which
+    should exceed the replication lag.
+
+    The middleware supports both sync and async chains, so that asynchronous
+    views are not run through a thread under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self._pin(request, response)
+
+    async def __acall__(self, request):
+        token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self._pin(request, response)
+
+    def _pin(self, request, response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(PIN_COOKIE, '1', max_age=get_pin_seconds(), httponly=True, samesite='Lax')
+        return response
+
+
+def replicate(source=DEFAULT_DB_ALIAS):
+    """
+    Copies the primary SQLite database over every replica with SQLite's online
+    backup API, a stand-in for real replication in local setups.
+
+    The copy is read through a connection of its own, so it only ever contains
+    committed transactions.
+
+    :param source: The alias of the primary database.
+    :type source: str
+    :return: The aliases of the updated replicas.
+    :rtype: list[str]
+    """
+    replicas = get_replicas()
+    with closing(sqlite3.connect(connections[source].settings_dict['NAME'])) as primary:
+        for alias in replicas:
+            with closing(sqlite3.connect(connections[alias].settings_dict['NAME'])) as target:
+                primary.backup(target)
+    return replicas
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_resolver, get_script_prefix, get_urlconf, reverse
+from django.urls.converters import IntConverter, PathConverter, SlugConverter, StringConverter
+
+# Converters accepting the decimal representation of any non-negative integer,
+# which is also left as is by the quoting of reverse().
+_DIGIT_CONVERTERS = (IntConverter, StringConverter, SlugConverter, PathConverter)
+
+# Values reversed once per route, then replaced by the arguments of each call.
+_PLACEHOLDERS = ('8675309001', '8675309002', '8675309003', '8675309004')
+
+_formatters = {}
+
+
+@receiver(setting_changed)
+def _clear_formatters(*, setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _formatters.clear()
+
+
+def _compile(viewname, urlconf, arity):
+    # A route can be compiled when it has a single pattern taking exactly
+    # ``arity`` arguments, all of them accepting integers.
+    if not isinstance(viewname, str) or ':' in viewname:
+        return None
+    possibilities = get_resolver(urlconf).reverse_dict.getlist(viewname)
+    if len(possibilities) != 1:
+        return None
+    (variants, pattern, defaults, converters), = possibilities
+    if len(variants) != 1 or defaults or arity > len(_PLACEHOLDERS):
+        return None
+    result, params = variants[0]
+    if len(params) != arity or not all(isinstance(converters.get(param), _DIGIT_CONVERTERS) for param in params):
+        return None
+
+    url = reverse(viewname, urlconf=urlconf, args=_PLACEHOLDERS[:arity])
+    if any(url.count(placeholder) != 1 for placeholder in _PLACEHOLDERS[:arity]):
+        return None
+    parts = [url]
+    for placeholder in _PLACEHOLDERS[:arity]:
+        head, _, tail = parts.pop().partition(placeholder)
+        parts += [head, tail]
+    if arity == 0:
+        return lambda: url
+    # The literal parts of the URL, with a {} for each argument.
+    template = '{}'.join(part.replace('{', '{{').replace('}', '}}') for part in parts)
+    return template.format
+
+
+def fast_reverse(viewname, args=None, kwargs=None):
+    """
+    Returns the same URL as ``reverse(viewname, args=args, kwargs=kwargs)``,
+    with routes compiled into a string formatter the first time they are
+    reversed.
+
+    Routes are compiled when they are not namespaced and have a single pattern,
+    whose parameters all accept integers. Calls with non-negative integer
+    arguments are then answered by formatting them into the URL, and every other
+    call is passed to ``reverse()``.
+
+    :param viewname: The name of the route.
+    :type viewname: str
+    :param args: The positional arguments of the route.
+    :type args: list | tuple | None
+    :param kwargs: The keyword arguments of the route.
+    :type kwargs: dict | None
+    :return: The path of the route.
+    :rtype: str
+    :raises NoReverseMatch: If the route does not exist, or does not accept the
+        arguments.
+    """
+    if kwargs:
+        return reverse(viewname, args=args, kwargs=kwargs)
+    args = args or ()
+    return format_url(get_formatter(viewname, len(args)), viewname, args)
+
+
+def get_formatter(viewname, arity):
+    """
+    Returns the compiled formatter of a route taking ``arity`` positional
+    arguments, for the current URLconf and script prefix, or ``None`` when the
+    route cannot be compiled.
+
+    Looking up the URLconf and the script prefix costs as much as formatting
+    the URL, so that callers building many URLs at once, such as templates,
+    look the formatter up once and pass it to ``format_url()``.
+
+    :param viewname: The name of the route.
+    :type viewname: str
+    :param arity: The number of positional arguments of the route.
+    :type arity: int
+    :return: The formatter of the route.
+    :rtype: Callable | None
+    """
+    urlconf = get_urlconf() or settings.ROOT_URLCONF
+    key = (viewname, urlconf, get_script_prefix(), arity)
+    try:
+        return _formatters[key]
+    except KeyError:
+        formatter = _formatters[key] = _compile(viewname, urlconf, arity)
+        return formatter
+
+
+def format_url(formatter, viewname, args):
+    """
+    Returns the URL of a route from its formatter, as returned by
+    ``get_formatter(viewname, len(args))``, falling back to ``reverse()``.
+
+    :param formatter: The formatter of the route.
+    :type formatter: Callable | None
+    :param viewname: The name of the route.
+    :type viewname: str
+    :param args: The positional arguments of the route.
+    :type args: list | tuple
+    :return: The path of the route.
+    :rtype: str
+    :raises NoReverseMatch: If the route does not accept the arguments.
+    """
+    if formatter is None or not all(type(arg) is int and arg >= 0 for arg in args):
+        return reverse(viewname, args=args)
+    return formatter(*args)
@@ -0,0 +1,92 @@
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Band, Listing
+
+SEARCH_LIMIT = 25
+
+# The FTS5 index of each searchable model: its indexed columns with their bm25
+# weights, and the columns loaded for the results.
+INDEXES = {
+    Band: {'columns': {'name': 10.0, 'biography': 1.0}, 'load': ['name']},
+    Listing: {'columns': {'title': 10.0, 'description': 1.0}, 'load': ['title']},
+}
+
+EXCERPT_TOKENS = 16
+
+# Control characters delimit the matches in excerpts, and are only turned
+# into <mark> tags once the excerpt is escaped.
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def build_match_query(text):
+    """
+    Turns free text into an FTS5 query matching every word of it, the last
+    word being matched as a prefix so results show up while typing.
+
+    Every word is quoted, so the FTS5 query syntax cannot be injected.
+
+    :param text: The text typed by the user.
+    :type text: str
+    :return: The FTS5 query, or ``None`` if the text has no word.
+    :rtype: str | None
+    """
+    words = _WORD_RE.findall(text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def format_excerpt(excerpt):
+    """
+    Escapes an excerpt returned by the FTS5 ``snippet()`` function and wraps
+    its matches in ``<mark>`` elements.
+    """
+    excerpt = escape(excerpt).replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
+    return mark_safe(excerpt)
+
+
+def full_text_search(model, text, limit=SEARCH_LIMIT):
+    """
+    Returns the objects of ``model`` best matching ``text``, most relevant first.
+
+    The ranking is computed by the FTS5 ``bm25()`` function, titles weighing
+    more than descriptions. Each result gets a ``search_rank`` and a
+    ``search_excerpt``, the part of its text around the matches. Only the id and
+    the columns listed in ``INDEXES`` are loaded, in a single query.
+
+    :param model: ``Band`` or ``Listing``.
+    :type model: type[Model]
+    :param text: The text typed by the user.
+    :type text: str
+    :param limit: The maximum number of results.
+    :type limit: int
+    :return: The matching objects.
+    :rtype: list[Model]
+    """
+    query = build_match_query(text)
+    if query is None:
+        return []
+
+    index = INDEXES[model]
+    table = model._meta.db_table
+    fts = f'{table}_fts'
+    weights = ', '.join(str(weight) for weight in index['columns'].values())
+    columns = ', '.join(f'{table}.{column}' for column in ['id', *index['load']])
+    sql = (
+        f'SELECT {columns}, bm25({fts}, {weights}) AS search_rank, '
+        f"snippet({fts}, -1, %s, %s, '…', {EXCERPT_TOKENS}) AS search_excerpt "
+        f'FROM {fts} JOIN {table} ON {table}.id = {fts}.rowid '
+        f'WHERE {fts} MATCH %s ORDER BY search_rank LIMIT %s'
+    )
+    results = list(model.objects.raw(sql, [_MATCH_START, _MATCH_END, query, limit]))
+    for result in results:
+        result.search_excerpt = format_excerpt(result.search_excerpt)
+    return results
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_versions, list_version_name, row_version_name
+from .models import Band, Listing
+
+
+def _listing_version_names(listing_ids):
+    return [row_version_name(Listing, pk) for pk in listing_ids]
+
+
+@receiver(post_save, sender=Band)
+def invalidate_band(sender, instance, created, **kwargs):
+    names = [row_version_name(Band, instance.pk), list_version_name(Band)]
+    if not created:
+        # The band name is rendered on the detail page of each of its listings.
+        listing_ids = instance.listing_set.values_list('id', flat=True)
+        names += _listing_version_names(listing_ids)
+    bump_versions(*names)
+
+
+@receiver(pre_delete, sender=Band)
+def collect_band_listings(sender, instance, **kwargs):
+    # The listings are detached with an UPDATE that sends no signal and leaves
+    # updated_at untouched, so their ids have to be collected before the band
+    # goes away.
+    instance._listing_ids = list(instance.listing_set.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Band)
+def invalidate_deleted_band(sender, instance, **kwargs):
+    listing_ids = getattr(instance, '_listing_ids', [])
+    names = [row_version_name(Band, instance.pk), list_version_name(Band)]
+    if listing_ids:
+        Listing.objects.filter(id__in=listing_ids).update(updated_at=timezone.now())
+        names += _listing_version_names(listing_ids)
+        names.append(list_version_name(Listing))
+    bump_versions(*names)
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def invalidate_listing(sender, instance, **kwargs):
+    # Band lists render the listing statistics of each band, which the
+    # database triggers may have just changed.
+    bump_versions(row_version_name(Listing, instance.pk), list_version_name(Listing), list_version_name(Band))
@@ -1,3 +1,797 @@
-from django.test import TestCase
+import re
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import timedelta
+from html import unescape
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import SyncToAsync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.db.models import QuerySet
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, clear_script_prefix, reverse, set_script_prefix
+from django.utils import timezone
+
+from . import catalog, outbox
+from .models import Band, ContactMessage, Listing
+from .pagination import PAGE_SIZE
+from .replicas import PIN_COOKIE, replicate
+from .reversal import fast_reverse
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Base class for tests asserting that a page stays within a fixed number of
+    database queries, whatever the number of rows it displays.
+    """
+    row_count = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        bands = Band.objects.bulk_create(
+            Band(name=f"Band {i}", genre=Band.Genre.HIP_HOP, biography="Bio", year_formed=2000)
+            for i in range(cls.row_count)
+        )
+        Listing.objects.bulk_create(
+            Listing(title=f"Listing {i}", description="Description", type=Listing.Type.RECORD, band=band)
+            for i, band in enumerate(bands)
+        )
+        cls.band = bands[0]
+        cls.listing = Listing.objects.order_by('id').first()
+
+    def setUp(self):
+        cache.clear()
+
+    def assertQueryBudget(self, budget, url, data=None):
+        """
+        Fetches ``url`` and fails if the request succeeds in more than ``budget``
+        queries.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries), budget,
+            "%s ran %d queries, over its budget of %d:\n%s" % (
+                url, len(queries), budget,
+                "\n".join(query["sql"] for query in queries.captured_queries),
+            ),
+        )
+        return response
+
+
+class ViewQueryBudgetTests(QueryBudgetTestCase):
+    # One query computes the ETag/Last-Modified validators, one renders the page.
+    def test_band_list(self):
+        self.assertQueryBudget(2, reverse('band-list'))
+
+    def test_band_list_filtered(self):
+        self.assertQueryBudget(2, reverse('band-list'), {'genre': Band.Genre.HIP_HOP, 'after': self.band.id})
+
+    def test_band_detail(self):
+        self.assertQueryBudget(2, reverse('band-detail', args=[self.band.id]))
+
+    def test_listing_list(self):
+        self.assertQueryBudget(2, reverse('listing'))
+
+    def test_listing_list_filtered(self):
+        self.assertQueryBudget(2, reverse('listing'), {'band': self.band.id, 'sold': 'false', 'type': 'REC'})
+
+    def test_listing_detail(self):
+        response = self.assertQueryBudget(2, reverse('listing-detail', args=[self.listing.id]))
+        self.assertContains(response, self.listing.band.name)
+
+
+class AdminQueryBudgetTests(QueryBudgetTestCase):
+    # Two queries are spent loading the session and the staff user.
+    def setUp(self):
+        super().setUp()
+        user = get_user_model().objects.create_superuser('admin', 'admin@merchex.xyz', 'password')
+        self.client.force_login(user)
+
+    def test_band_changelist(self):
+        self.assertQueryBudget(5, reverse('admin:listings_band_changelist'))
+
+    def test_band_change(self):
+        self.assertQueryBudget(4, reverse('admin:listings_band_change', args=[self.band.id]))
+
+    def test_listing_changelist(self):
+        response = self.assertQueryBudget(5, reverse('admin:listings_listing_changelist'))
+        self.assertContains(response, self.band.name)
+
+    def test_listing_change(self):
+        self.assertQueryBudget(5, reverse('admin:listings_listing_change', args=[self.listing.id]))
+
+
+class ResponseCacheTests(QueryBudgetTestCase):
+    def test_repeated_reads_are_served_from_cache(self):
+        urls = [
+            reverse('band-list'),
+            reverse('band-detail', args=[self.band.id]),
+            reverse('listing'),
+            reverse('listing-detail', args=[self.listing.id]),
+        ]
+        for url in urls:
+            first = self.client.get(url)
+            # Only the validators are computed, the page comes from the cache.
+            with self.assertNumQueries(1):
+                second = self.client.get(url)
+            self.assertEqual(first.content, second.content)
+
+    def test_cursor_and_filters_are_cached_separately(self):
+        self.client.get(reverse('listing'))
+        with self.assertNumQueries(2):
+            self.client.get(reverse('listing'), {'after': self.listing.id})
+
+    def test_band_rename_invalidates_band_and_listing_pages(self):
+        self.client.get(reverse('band-list'))
+        self.client.get(reverse('listing-detail', args=[self.listing.id]))
+        self.band.name = "Renamed band"
+        self.band.save()
+        self.assertContains(self.client.get(reverse('band-list')), "Renamed band")
+        self.assertContains(self.client.get(reverse('band-detail', args=[self.band.id])), "Renamed band")
+        self.assertContains(self.client.get(reverse('listing-detail', args=[self.listing.id])), "Renamed band")
+
+    def test_band_delete_invalidates_listing_pages(self):
+        url = reverse('listing-detail', args=[self.listing.id])
+        band_filter = {'band': self.band.id}
+        self.assertContains(self.client.get(url), self.band.name)
+        self.client.get(reverse('listing'), band_filter)
+        self.band.delete()
+        self.assertNotContains(self.client.get(url), self.band.name)
+        response = self.client.get(reverse('listing'), band_filter)
+        self.assertNotContains(response, self.listing.title)
+
+    def test_listing_change_invalidates_listing_pages(self):
+        self.client.get(reverse('listing'))
+        self.listing.title = "Renamed listing"
+        self.listing.save()
+        self.assertContains(self.client.get(reverse('listing')), "Renamed listing")
+        self.assertContains(self.client.get(reverse('listing-detail', args=[self.listing.id])), "Renamed listing")
+
+
+class ConditionalGetTests(QueryBudgetTestCase):
+    def assertNotModified(self, url, data=None):
+        response = self.client.get(url, data)
+        validators = [{'if-none-match': response['ETag']}]
+        if response.has_header('Last-Modified'):
+            validators.append({'if-modified-since': response['Last-Modified']})
+        for headers in validators:
+            cache.clear()
+            revalidated = self.client.get(url, data, headers=headers)
+            self.assertEqual(revalidated.status_code, 304)
+            self.assertEqual(revalidated.templates, [])
+
+    def test_unchanged_pages_are_not_rendered(self):
+        self.assertNotModified(reverse('band-list'))
+        self.assertNotModified(reverse('band-list'), {'genre': Band.Genre.HIP_HOP, 'after': self.band.id})
+        self.assertNotModified(reverse('band-detail', args=[self.band.id]))
+        self.assertNotModified(reverse('listing'))
+        self.assertNotModified(reverse('listing'), {'band': self.band.id})
+        self.assertNotModified(reverse('listing-detail', args=[self.listing.id]))
+
+    def test_band_change_modifies_listing_detail(self):
+        url = reverse('listing-detail', args=[self.listing.id])
+        etag = self.client.get(url)['ETag']
+        self.band.name = "Renamed band"
+        self.band.save()
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertContains(response, "Renamed band")
+
+    def test_deleted_row_modifies_list(self):
+        url = reverse('listing')
+        etag = self.client.get(url)['ETag']
+        Listing.objects.filter(id=self.listing.id).delete()
+        response = self.client.get(url, headers={'if-none-match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, f'"/listings/{self.listing.id}"')
+
+    def test_out_of_range_band_filter_is_ignored(self):
+        response = self.client.get(reverse('listing'), {'band': '9' * 23})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'"/listings/{self.listing.id}"')
+
+    def test_deleted_row_modifies_list_since_a_date(self):
+        url = reverse('listing')
+        last_modified = self.client.get(reverse('listing-detail', args=[self.listing.id]))['Last-Modified']
+        self.assertFalse(self.client.get(url).has_header('Last-Modified'))
+        Listing.objects.filter(id=self.listing.id).delete()
+        response = self.client.get(url, headers={'if-modified-since': last_modified})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, f'"/listings/{self.listing.id}"')
+
+
+class AsyncViewTests(QueryBudgetTestCase):
+    async def test_read_views_run_on_the_event_loop(self):
+        urls = [
+            reverse('band-list'),
+            reverse('band-detail', args=[self.band.id]),
+            reverse('listing'),
+            reverse('listing-detail', args=[self.listing.id]),
+            reverse('about'),
+        ]
+        for url in urls:
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(reverse('listing-detail', args=[self.listing.id]))
+        self.assertContains(response, self.band.name)
+
+    async def test_contact_queues_message(self):
+        data = {'name': 'Fan', 'email': 'fan@example.com', 'message': 'Hello'}
+        response = await self.async_client.post(reverse('contact'), data)
+        self.assertRedirects(response, reverse('email-sent'), fetch_redirect_response=False)
+        self.assertEqual(await ContactMessage.objects.acount(), 1)
+        self.assertEqual(mail.outbox, [])
+
+
+class ContactOutboxTests(TestCase):
+    def post_message(self, **data):
+        data = {'name': 'Fan', 'email': 'fan@example.com', 'message': 'Hello', **data}
+        response = self.client.post(reverse('contact'), data)
+        self.assertRedirects(response, reverse('email-sent'))
+
+    def test_submission_is_queued_and_not_sent_inline(self):
+        self.post_message()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(ContactMessage.objects.get().status, ContactMessage.Status.PENDING)
+
+    def test_worker_sends_queued_messages(self):
+        for i in range(7):
+            self.post_message(message=f'Hello {i}')
+        call_command('process_contact_outbox', batch_size=2, workers=3, stdout=mock.Mock())
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertEqual(mail.outbox[0].to, ['admin@merchex.xyz'])
+        self.assertEqual(mail.outbox[0].subject, 'Message from Fan via MerchEx Contact Us form')
+        self.assertFalse(ContactMessage.objects.exclude(status=ContactMessage.Status.SENT).exists())
+
+    def test_batch_reuses_one_connection(self):
+        for i in range(3):
+            self.post_message()
+        with mock.patch.object(EmailBackend, 'open', autospec=True, return_value=True) as open_connection:
+            call_command('process_contact_outbox', batch_size=3, workers=1, stdout=mock.Mock())
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(CONTACT_OUTBOX_MAX_ATTEMPTS=2, CONTACT_OUTBOX_RETRY_DELAY=0)
+    def test_failed_delivery_is_retried_then_abandoned(self):
+        self.post_message()
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=SMTPException("stalled")):
+            call_command('process_contact_outbox', stdout=mock.Mock())
+        message = ContactMessage.objects.get()
+        self.assertEqual(message.status, ContactMessage.Status.FAILED)
+        self.assertEqual(message.attempts, 2)
+        self.assertIn('stalled', message.last_error)
+
+    def test_failed_delivery_backs_off(self):
+        self.post_message()
+        with mock.patch.object(EmailBackend, 'send_messages', side_effect=SMTPException("stalled")):
+            call_command('process_contact_outbox', stdout=mock.Mock())
+        message = ContactMessage.objects.get()
+        self.assertEqual(message.status, ContactMessage.Status.PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.next_attempt_at, message.created_at)
+
+        call_command('process_contact_outbox', stdout=mock.Mock())
+        self.assertEqual(mail.outbox, [])
+
+    def test_claimed_messages_are_not_claimed_again(self):
+        for i in range(3):
+            self.post_message()
+        first = outbox.claim_batch(2)
+        second = outbox.claim_batch(2)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({message.pk for message in first} & {message.pk for message in second})
+        self.assertEqual(outbox.claim_batch(2), [])
+
+    def test_messages_lost_to_a_concurrent_claim_are_dropped(self):
+        self.post_message()
+        message = ContactMessage.objects.get()
+        original = QuerySet.update
+
+        def claim_concurrently(queryset, **kwargs):
+            # Another worker claims the message between the SELECT and the UPDATE.
+            original(
+                ContactMessage.objects.filter(pk=message.pk),
+                status=ContactMessage.Status.SENDING, claimed_at=timezone.now() - timedelta(seconds=1),
+            )
+            return original(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=claim_concurrently):
+            self.assertEqual(outbox.claim_batch(10), [])
+
+    @override_settings(CONTACT_OUTBOX_LEASE=60)
+    def test_only_expired_claims_are_requeued(self):
+        for i in range(2):
+            self.post_message()
+        fresh, stale = outbox.claim_batch(2)
+        ContactMessage.objects.filter(pk=stale.pk).update(claimed_at=timezone.now() - timedelta(seconds=61))
+        out = StringIO()
+        call_command('process_contact_outbox', stdout=out)
+        self.assertIn("Requeued 1 interrupted message(s).", out.getvalue())
+        self.assertEqual(ContactMessage.objects.get(pk=fresh.pk).status, ContactMessage.Status.SENDING)
+        self.assertEqual(ContactMessage.objects.get(pk=stale.pk).status, ContactMessage.Status.SENT)
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='merchex-cache-'),
+    }
+})
+class FileBasedResponseCacheTests(ResponseCacheTests):
+    pass
+
+
+class CatalogCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = f'{self.directory.name}/{name}'
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        return path
+
+    def call(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command(*args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_bands_validates_rows(self):
+        path = self.write('bands.csv', (
+            "name,genre,biography,year_formed,active,official_homepage\n"
+            "Good,HH,Bio,1999,True,\n"
+            "Too old,HH,Bio,1800,True,\n"
+            "Bad genre,XX,Bio,2000,False,https://example.com\n"
+        ))
+        out, err = self.call('import_catalog', 'bands', path)
+        self.assertIn("Created 1, updated 0, skipped 2", out)
+        self.assertIn("Line 3: year_formed", err)
+        self.assertIn("Line 4: genre", err)
+        band = Band.objects.get()
+        self.assertEqual((band.name, band.year_formed, band.official_homepage), ("Good", 1999, None))
+
+    def test_import_listings_resolves_bands_by_name(self):
+        band = Band.objects.create(name="Known", genre=Band.Genre.SYNTH_POP, biography="Bio", year_formed=2000)
+        path = self.write('listings.jsonl', (
+            '{"title": "Record", "description": "D", "sold": true, "year_sold": 2020, "type": "REC", "band": "Known"}\n'
+            '{"title": "Poster", "description": "D", "type": "POS", "band": ""}\n'
+            '{"title": "Shirt", "description": "D", "type": "CLO", "band": "Unknown"}\n'
+        ))
+        with CaptureQueriesContext(connection) as queries:
+            out, err = self.call('import_catalog', 'listings', path)
+        # The band map, and a single INSERT for the whole chunk in a savepoint.
+        self.assertEqual(len(queries), 4)
+        self.assertIn("Created 2, updated 0, skipped 1", out)
+        self.assertIn('Line 3: band: Unknown band "Unknown".', err)
+        self.assertEqual(Listing.objects.get(title="Record").band, band)
+        self.assertIsNone(Listing.objects.get(title="Poster").band)
+
+    def test_export_import_round_trip_updates_rows(self):
+        band = Band.objects.create(name="Band", genre=Band.Genre.HIP_HOP, biography="Bio", year_formed=2000)
+        Listing.objects.create(title="Old title", description="D", type=Listing.Type.RECORD, band=band)
+
+        for format in ('csv', 'jsonl'):
+            self.assertContains(self.client.get(reverse('listing')), "Old title")
+            path = f'{self.directory.name}/listings.{format}'
+            self.call('export_catalog', 'listings', path)
+            with open(path, encoding='utf-8') as stream:
+                content = stream.read()
+            self.assertIn('Band', content)
+            self.write(f'listings.{format}', content.replace('Old title', 'New title'))
+            out, _ = self.call('import_catalog', 'listings', path)
+            self.assertIn("Created 0, updated 1, skipped 0", out)
+            self.assertEqual(Listing.objects.get().band, band)
+            # Bulk updates send no signals, but the cached list is invalidated.
+            self.assertContains(self.client.get(reverse('listing')), "New title")
+            Listing.objects.update(title="Old title")
+            cache.clear()
+
+    def test_duplicate_ids_are_reported(self):
+        path = self.write('bands.csv', (
+            "id,name,genre,biography,year_formed\n"
+            "50,First,HH,Bio,1999\n"
+            "50,Second,HH,Bio,1999\n"
+            "51,Third,HH,Bio,1999\n"
+        ))
+        out, err = self.call('import_catalog', 'bands', path)
+        self.assertIn("Created 2, updated 0, skipped 1", out)
+        self.assertIn("Line 3: id: Duplicate id 50 in the file.", err)
+        self.assertEqual(Band.objects.get(pk=50).name, "First")
+
+    def test_import_only_updates_present_columns(self):
+        band = Band.objects.create(name="Band", genre=Band.Genre.HIP_HOP, biography="Bio", year_formed=2000,
+                                   active=False, official_homepage="https://example.com")
+        path = self.write('bands.jsonl', (
+            f'{{"id": {band.pk}, "name": "Renamed", "genre": "HH", "biography": "Bio", "year_formed": 2000}}\n'
+            '[1, 2]\n'
+            '"Band"\n'
+        ))
+        out, err = self.call('import_catalog', 'bands', path)
+        self.assertIn("Created 0, updated 1, skipped 2", out)
+        self.assertIn("Line 2: __all__: Expected an object.", err)
+        self.assertIn("Line 3: __all__: Expected an object.", err)
+        band.refresh_from_db()
+        self.assertEqual((band.name, band.active, band.official_homepage),
+                         ("Renamed", False, "https://example.com"))
+
+    def test_unknown_format(self):
+        with self.assertRaises(CommandError):
+            self.call('import_catalog', 'bands', self.write('bands.txt', ''))
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.band = Band.objects.create(
+            name="The Weekend Shoegazers", genre=Band.Genre.ALTERNATIVE_ROCK,
+            biography="Formed in a garage in Lyon, famous for <loud> guitars.", year_formed=2005,
+        )
+        cls.other = Band.objects.create(
+            name="Guitars", genre=Band.Genre.SYNTH_POP, biography="No guitar at all.", year_formed=2010,
+        )
+        cls.listing = Listing.objects.create(
+            title="Tour poster", description="Signed by the Shoegazers in Lyon.",
+            type=Listing.Type.POSTER, band=cls.band,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_results_are_ranked_with_excerpts(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('search'), {'q': 'guitars'})
+        self.assertEqual(len(queries), 2)
+        bands = response.context['bands']
+        # A match in the name outweighs a match in the biography.
+        self.assertEqual(bands, [self.other, self.band])
+        self.assertEqual(bands[1].search_excerpt.count('<mark>guitars</mark>'), 1)
+        self.assertIn('&lt;loud&gt;', bands[1].search_excerpt)
+        self.assertEqual(response.context['listings'], [])
+
+    def test_prefix_and_accents(self):
+        response = self.client.get(reverse('search'), {'q': 'lyôn shoegaz'})
+        self.assertEqual(response.context['bands'], [self.band])
+        self.assertEqual(response.context['listings'], [self.listing])
+
+    def test_query_syntax_is_not_interpreted(self):
+        response = self.client.get(reverse('search'), {'q': 'lyon" OR "NEAR(x'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['bands'], [])
+        response = self.client.get(reverse('search'), {'q': '!!'})
+        self.assertEqual(response.context['bands'], [])
+
+    def test_index_follows_changes(self):
+        self.band.biography = "Now based in Marseille."
+        self.band.save()
+        response = self.client.get(reverse('search'), {'q': 'marseille'})
+        self.assertEqual(response.context['bands'], [self.band])
+        self.assertEqual(self.client.get(reverse('search'), {'q': 'garage'}).context['bands'], [])
+        self.listing.delete()
+        self.assertEqual(self.client.get(reverse('search'), {'q': 'poster'}).context['listings'], [])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(QueryBudgetTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        super().setUp()
+        # The test replica is a second connection to the in-memory test database,
+        # and has to see the data of the test transaction without waiting on it.
+        with connections['replica'].cursor() as cursor:
+            cursor.execute('PRAGMA read_uncommitted = 1')
+
+    def get_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url, data)
+        return response, len(primary), len(replica)
+
+    def test_read_views_use_the_replica(self):
+        for url in [reverse('band-list'), reverse('band-detail', args=[self.band.id]),
+                    reverse('listing'), reverse('listing-detail', args=[self.listing.id])]:
+            response, primary, replica = self.get_queries('get', url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(primary, 0, url)
+            self.assertGreater(replica, 0, url)
+
+    def test_other_views_use_the_primary(self):
+        response, primary, replica = self.get_queries('get', reverse('band-update', args=[self.band.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response, primary, replica = self.get_queries(
+            'post', reverse('contact'), {'email': 'fan@example.com', 'message': 'Hello'},
+        )
+        self.assertEqual(replica, 0)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+        response, primary, replica = self.get_queries('get', reverse('band-list'))
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        self.client.cookies.pop(PIN_COOKIE)
+        response, primary, replica = self.get_queries('get', reverse('band-list'), {'genre': 'HH'})
+        self.assertEqual(primary, 0)
+
+    def test_asgi_chain_stays_asynchronous(self):
+        # A sync-only middleware would run the whole chain, and every async
+        # view, in a thread.
+        chain = ASGIHandler()._middleware_chain
+        self.assertNotIsInstance(chain, SyncToAsync)
+        self.assertTrue(iscoroutinefunction(chain))
+
+    async def test_async_writes_pin_the_client_to_the_primary(self):
+        response = await self.async_client.post(reverse('contact'), {'email': 'fan@example.com', 'message': 'Hi'})
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+
+    def test_lagging_pages_are_not_cached(self):
+        url = reverse('band-detail', args=[self.band.id])
+        self.client.get(url)
+        self.assertEqual(self.get_queries('get', url)[2], 2)
+        with override_settings(DATABASE_REPLICA_PIN_SECONDS=0):
+            self.client.get(url)
+            self.assertEqual(self.get_queries('get', url)[2], 1)
+
+    def test_replicate_copies_committed_data(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary, replica = f'{directory}/primary.sqlite3', f'{directory}/replica.sqlite3'
+            with closing(sqlite3.connect(primary)) as source:
+                source.execute('CREATE TABLE band (name TEXT)')
+                source.execute("INSERT INTO band VALUES ('Replicated')")
+                source.commit()
+            with mock.patch.dict(connections['default'].settings_dict, NAME=primary), \
+                    mock.patch.dict(connections['replica'].settings_dict, NAME=replica):
+                self.assertEqual(replicate(), ['replica'])
+            with closing(sqlite3.connect(replica)) as target:
+                rows = target.execute('SELECT name FROM band').fetchall()
+        self.assertEqual(rows, [('Replicated',)])
+
+
+class FastReverseTests(SimpleTestCase):
+    def test_same_urls_as_reverse(self):
+        for name, args in [('band-list', []), ('band-detail', [7]), ('band-update', [0]),
+                           ('listing-detail', [123456789]), ('admin:index', []),
+                           ('admin:listings_band_change', [3])]:
+            for _ in range(2):
+                self.assertEqual(fast_reverse(name, args=args), reverse(name, args=args))
+        self.assertEqual(fast_reverse('band-detail', kwargs={'id': 7}), '/bands/7/')
+
+    def test_invalid_arguments_are_rejected(self):
+        for name, args in [('band-detail', []), ('band-detail', ['x']), ('band-detail', [-1]),
+                           ('band-detail', [1, 2]), ('missing', [])]:
+            with self.assertRaises(NoReverseMatch):
+                fast_reverse(name, args=args)
+
+    def test_script_prefix(self):
+        fast_reverse('band-detail', args=[1])
+        set_script_prefix('/shop/')
+        self.addCleanup(clear_script_prefix)
+        self.assertEqual(fast_reverse('band-detail', args=[1]), '/shop/bands/1/')
+
+    def test_template_tag(self):
+        template = Template(
+            "{% load fast_urls %}{% fast_url 'band-detail' id %} {% fast_url 'band-list' %} "
+            "{% fast_url 'admin:listings_band_change' id %} {% fast_url 'missing' as url %}[{{ url }}]"
+        )
+        self.assertEqual(template.render(Context({'id': 4})), '/bands/4/ /bands/ /admin/listings/band/4/change/ []')
+
+
+class BandCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.band = Band.objects.create(name="Band", genre=Band.Genre.HIP_HOP, biography="Bio", year_formed=2000)
+        self.other = Band.objects.create(name="Other", genre=Band.Genre.HIP_HOP, biography="Bio", year_formed=2000)
+
+    def add(self, band, sold=False, year_sold=None):
+        return Listing.objects.create(title="Listing", description="D", type=Listing.Type.RECORD, band=band,
+                                      sold=sold, year_sold=year_sold)
+
+    def assertCounters(self, band, listing_count, sold_count, last_year_sold):
+        band.refresh_from_db()
+        self.assertEqual((band.listing_count, band.sold_count, band.last_year_sold),
+                         (listing_count, sold_count, last_year_sold))
+
+    def test_counters_follow_listing_changes(self):
+        listing = self.add(self.band)
+        self.add(self.band, sold=True, year_sold=2018)
+        self.assertCounters(self.band, 2, 1, 2018)
+        listing.sold, listing.year_sold = True, 2020
+        listing.save()
+        self.assertCounters(self.band, 2, 2, 2020)
+        listing.band = self.other
+        listing.save()
+        self.assertCounters(self.band, 1, 1, 2018)
+        self.assertCounters(self.other, 1, 1, 2020)
+        Listing.objects.filter(band=self.band).update(sold=False)
+        self.assertCounters(self.band, 1, 0, None)
+        listing.delete()
+        self.assertCounters(self.other, 0, 0, None)
+
+    def test_saving_a_stale_band_keeps_its_counters(self):
+        band = Band.objects.get(pk=self.band.pk)
+        self.add(self.band, sold=True, year_sold=2019)
+        band.name = "Renamed"
+        band.save()
+        self.assertCounters(band, 1, 1, 2019)
+        self.assertEqual(band.name, "Renamed")
+
+    def test_counters_follow_bulk_imports(self):
+        rows = [(1, {'title': 'T', 'description': 'D', 'sold': True, 'year_sold': 2019, 'type': 'REC',
+                     'band': 'Band'})] * 3
+        catalog.import_rows(Listing, iter(rows))
+        self.assertCounters(self.band, 3, 3, 2019)
+
+    def test_band_list_renders_counters_without_aggregates(self):
+        self.add(self.band, sold=True, year_sold=2019)
+        self.add(self.band)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('band-list'))
+        for text in ["2 annonces,", "1 vendue,", "dernière vente en 2019"]:
+            self.assertContains(response, text)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+        # Listing changes invalidate the cached list.
+        self.add(self.band)
+        self.assertContains(self.client.get(reverse('band-list')), "3 annonces")
+
+    def test_rebuild_fixes_drifted_counters(self):
+        self.add(self.band, sold=True, year_sold=2019)
+        Band.objects.filter(pk=self.band.pk).update(listing_count=7, last_year_sold=None)
+        out = StringIO()
+        call_command('rebuild_band_counters', stdout=out)
+        self.assertIn("Fixed the statistics of 1 band(s).", out.getvalue())
+        self.assertCounters(self.band, 1, 1, 2019)
+        self.assertCounters(self.other, 0, 0, None)
+
+
+class KeysetPaginationTestCase(TestCase):
+    """
+    Base class for tests walking the pages of a list through the links of
+    ``pagination.html``.
+    """
+    url_name = None
+
+    def get(self, query=''):
+        # Cached pages are served without their context.
+        cache.clear()
+        response = self.client.get(reverse(self.url_name) + query)
+        self.assertEqual(response.status_code, 200)
+        nav = re.search(r'<nav class="pagination">(.*?)</nav>', response.content.decode(), re.S).group(1)
+        links = re.findall(r'<a href="([^"]*)">[^<]*(Précédent|Suivant)', nav)
+        links = {label: unescape(href) for href, label in links}
+        ids = [row.id for row in response.context['page']]
+        return ids, links.get('Précédent'), links.get('Suivant')
+
+    def walk(self, query):
+        pages, previous, next_query = [], None, query
+        while next_query is not None:
+            ids, previous, next_query = self.get(next_query)
+            pages.append(ids)
+        back = [ids]
+        while previous is not None:
+            ids, previous, _ = self.get(previous)
+            back.append(ids)
+        return pages, back[::-1]
+
+
+class KeysetPaginationTests(KeysetPaginationTestCase):
+    url_name = 'band-list'
+
+    @classmethod
+    def setUpTestData(cls):
+        # Alternating genres, so that filtered pages skip ids.
+        Band.objects.bulk_create(
+            Band(name=f"Band {i}", genre=[Band.Genre.HIP_HOP, Band.Genre.SYNTH_POP][i % 2], biography="Bio",
+                 year_formed=2000)
+            for i in range(2 * PAGE_SIZE + 10)
+        )
+        cls.ids = list(Band.objects.order_by('id').values_list('id', flat=True))
+        cls.hip_hop_ids = cls.ids[::2]
+
+    def test_first_and_last_pages(self):
+        ids, previous, next_query = self.get()
+        self.assertEqual(ids, self.ids[:PAGE_SIZE])
+        self.assertIsNone(previous)
+        self.assertEqual(next_query, f'?after={self.ids[PAGE_SIZE - 1]}')
+
+        ids, previous, next_query = self.get(f'?after={self.ids[-11]}')
+        self.assertEqual(ids, self.ids[-10:])
+        self.assertEqual(previous, f'?before={self.ids[-10]}')
+        self.assertIsNone(next_query)
+
+    def test_full_last_page_has_no_next(self):
+        ids, previous, next_query = self.get(f'?after={self.ids[-PAGE_SIZE - 1]}')
+        self.assertEqual(ids, self.ids[-PAGE_SIZE:])
+        self.assertIsNotNone(previous)
+        self.assertIsNone(next_query)
+
+    def test_backwards_to_the_first_page(self):
+        ids, previous, next_query = self.get(f'?before={self.ids[PAGE_SIZE]}')
+        self.assertEqual(ids, self.ids[:PAGE_SIZE])
+        self.assertIsNone(previous)
+        self.assertEqual(next_query, f'?after={self.ids[PAGE_SIZE - 1]}')
+
+    def test_invalid_cursors_show_the_first_page(self):
+        for query in ('?after=abc', '?after=-5', '?before=', '?before=x'):
+            with self.subTest(query=query):
+                ids, previous, _ = self.get(query)
+                self.assertEqual(ids, self.ids[:PAGE_SIZE])
+                self.assertIsNone(previous)
+
+    def test_walk_forward_and_back(self):
+        pages, back = self.walk('')
+        self.assertEqual([len(page) for page in pages], [PAGE_SIZE, PAGE_SIZE, 10])
+        self.assertEqual(sum(pages, []), self.ids)
+        self.assertEqual(back, pages)
+
+    def test_genre_filter_can_be_cleared(self):
+        ids, _, _ = self.get('?genre=')
+        self.assertEqual(ids, self.ids[:PAGE_SIZE])
+        cache.clear()
+        content = self.client.get(reverse('band-list'), {'genre': Band.Genre.HIP_HOP}).content.decode()
+        self.assertInHTML('<option value="">---------</option>', content)
+
+    def test_walk_forward_and_back_with_a_filter(self):
+        pages, back = self.walk(f'?genre={Band.Genre.HIP_HOP}')
+        self.assertEqual([len(page) for page in pages], [PAGE_SIZE, 5])
+        self.assertEqual(sum(pages, []), self.hip_hop_ids)
+        self.assertEqual(back, pages)
+        _, previous, _ = self.get(f'?genre={Band.Genre.HIP_HOP}&after={self.hip_hop_ids[PAGE_SIZE - 1]}')
+        self.assertEqual(previous, f'?genre={Band.Genre.HIP_HOP}&before={self.hip_hop_ids[PAGE_SIZE]}')
+
+
+class ListingKeysetPaginationTests(KeysetPaginationTestCase):
+    url_name = 'listing'
+
+    @classmethod
+    def setUpTestData(cls):
+        band = Band.objects.create(name="Band", genre=Band.Genre.HIP_HOP, biography="Bio", year_formed=2000)
+        # Alternating types, and every third listing sold and of the band.
+        Listing.objects.bulk_create(
+            Listing(title=f"Listing {i}", description="D", type=[Listing.Type.RECORD, Listing.Type.POSTER][i % 2],
+                    sold=i % 3 == 0, band=band if i % 3 == 0 else None)
+            for i in range(2 * PAGE_SIZE + 10)
+        )
+        cls.band = band
+        cls.ids = list(Listing.objects.order_by('id').values_list('id', flat=True))
+
+    def test_walk_forward_and_back(self):
+        pages, back = self.walk('')
+        self.assertEqual([len(page) for page in pages], [PAGE_SIZE, PAGE_SIZE, 10])
+        self.assertEqual(sum(pages, []), self.ids)
+        self.assertEqual(back, pages)
+
+    def test_walk_forward_and_back_with_filters(self):
+        for query, ids in [
+            (f'?type={Listing.Type.RECORD}', self.ids[::2]),
+            ('?sold=true', self.ids[::3]),
+            (f'?band={self.band.id}&type={Listing.Type.POSTER}', self.ids[3::6]),
+        ]:
+            with self.subTest(query=query):
+                pages, back = self.walk(query)
+                self.assertEqual(sum(pages, []), ids)
+                self.assertEqual(back, pages)
+
+    def test_blank_filters_are_offered_and_ignored(self):
+        ids, _, next_query = self.get('?type=&sold=unknown&band=')
+        self.assertEqual(ids, self.ids[:PAGE_SIZE])
+        self.assertEqual(next_query, f'?type=&sold=unknown&band=&after={self.ids[PAGE_SIZE - 1]}')
+        content = self.client.get(reverse('listing')).content.decode()
+        self.assertInHTML('<option value="" selected>---------</option>', content)
@@ -1,30 +1,51 @@
-from django.core.mail import send_mail
+from asgiref.sync import sync_to_async
 from django.http import HttpResponse
 from django.shortcuts import render, redirect
 
-from .forms import ContactUsForm, BandForm, ListingForm
+from .cache import attach_row_versions, cache_response, get_timeout, list_version_name, row_version_name
+from .conditional import (band_detail_state, band_list_state, conditional_page, listing_detail_state,
+                          listing_list_state)
+from .forms import ContactUsForm, BandForm, ListingForm, BandFilterForm, ListingFilterForm, SearchForm
 from .models import Band, Listing
+from .outbox import aenqueue
+from .pagination import apaginate_by_id
+from .replicas import read_from_replica
+from .search import full_text_search
 
 
-def band_list(request):
+@read_from_replica
+@conditional_page(band_list_state)
+@cache_response(lambda request: list_version_name(Band))
+async def band_list(request):
     """
-    Handles an HTTP request to display a welcome message and a list of favorite bands.
+    Handles an HTTP request to display a welcome message and a page of favorite bands.
 
-    This function queries all Band objects, retrieves their names, and dynamically generates
-    an HTML response that displays a welcome message along with the names of the first three
-    bands in the list.
+    Bands can be filtered by ``genre`` and are paginated by keyset on ``id`` through
+    the ``after`` and ``before`` query parameters, so only one page of rows is ever
+    fetched from the database. The listing statistics of each band are read from
+    its counter columns, so no listing is counted. The full response is cached
+    until any band changes, and each row is cached as a fragment until that band
+    changes. Clients holding an up-to-date copy of the page get a 304 without
+    the page being rendered.
 
     :param request: The HTTP request object.
     :type request: HttpRequest
     :return: An HTTP response containing the generated HTML content with the welcome
-        message and the list of bands.
+        message and the current page of bands.
     :rtype: HttpResponse
     """
-    bands = Band.objects.all()
-    return render(request, "listings/band_list.html", {"bands": bands})
-
-
-def band_detail(request, id):
+    filter_form = BandFilterForm(request.GET)
+    page = await apaginate_by_id(filter_form.filter(Band.objects.for_list()), request)
+    await sync_to_async(attach_row_versions)(page)
+    return render(request, "listings/band_list.html",
+                  {"bands": page, "page": page, "filter_form": filter_form,
+                   "cache_timeout": get_timeout()})
+
+
+@read_from_replica
+@conditional_page(band_detail_state)
+@cache_response(lambda request, id: row_version_name(Band, id))
+async def band_detail(request, id):
     """
     Renders the band detail page with the specified ID.
 
@@ -35,7 +56,7 @@ def band_detail(request, id):
     :return: An HttpResponse object rendering the band detail page.
     :rtype: HttpResponse
     """
-    band = Band.objects.get(id=id)
+    band = await Band.objects.aget(id=id)
     return render(request, "listings/band_detail.html", {"band": band})
 
 
@@ -115,7 +136,34 @@ def band_delete(request, id):
                   {'band': band})
 
 
-def about(request):
+def _search_all(query):
+    return full_text_search(Band, query), full_text_search(Listing, query)
+
+
+@read_from_replica
+@cache_response(lambda request: [list_version_name(Band), list_version_name(Listing)])
+async def search(request):
+    """
+    Searches the bands and the listings for the ``q`` query parameter.
+
+    Matches are found through the SQLite FTS5 indexes of both tables, so the cost
+    does not grow with the length of the biographies and descriptions. The best
+    ranked bands and listings are rendered with an excerpt around the matches,
+    and the response is cached until any band or listing changes.
+
+    :param request: The HTTP request object.
+    :type request: HttpRequest
+    :return: The search form, and the results if a query was submitted.
+    :rtype: HttpResponse
+    """
+    form = SearchForm(request.GET)
+    query = form.cleaned_data['q'] if form.is_valid() else ''
+    bands, listings = await sync_to_async(_search_all)(query) if query else ([], [])
+    return render(request, "listings/search.html",
+                  {"form": form, "query": query, "bands": bands, "listings": listings})
+
+
+async def about(request):
     """
     Render the 'about' page.
 
@@ -127,23 +175,36 @@ def about(request):
     return render(request, "listings/about.html")
 
 
-def listing(request):
+@read_from_replica
+@conditional_page(listing_list_state)
+@cache_response(lambda request: list_version_name(Listing))
+async def listing(request):
     """
-    Fetches and renders all the available listings.
+    Fetches and renders a page of the available listings.
 
-    This function retrieves all the listings from the database using the
-    Listing model and renders the listings page with the fetched data.
+    Listings can be filtered by ``type``, ``sold`` and ``band`` and are paginated by
+    keyset on ``id`` through the ``after`` and ``before`` query parameters. The full
+    response is cached until any listing changes, and each row is cached as a
+    fragment until that listing changes. Clients holding an up-to-date copy of
+    the page get a 304 without the page being rendered.
 
     :param request: The HTTP request object.
     :type request: HttpRequest
-    :return: Rendered HTML response with the listings information.
+    :return: Rendered HTML response with the current page of listings.
     :rtype: HttpResponse
     """
-    listings = Listing.objects.all()
-    return render(request, "listings/listing.html", {"listings": listings})
-
-
-def listing_detail(request, id):
+    filter_form = ListingFilterForm(request.GET)
+    page = await apaginate_by_id(filter_form.filter(Listing.objects.for_list()), request)
+    await sync_to_async(attach_row_versions)(page)
+    return render(request, "listings/listing.html",
+                  {"listings": page, "page": page, "filter_form": filter_form,
+                   "cache_timeout": get_timeout()})
+
+
+@read_from_replica
+@conditional_page(listing_detail_state)
+@cache_response(lambda request, id: row_version_name(Listing, id))
+async def listing_detail(request, id):
     """
     Retrieve detailed information for a specific listing by its ID and render it
     in the designated template.
@@ -156,7 +217,7 @@ def listing_detail(request, id):
         context of the specific listing.
     :rtype: HttpResponse
     """
-    listing = Listing.objects.get(id=id)
+    listing = await Listing.objects.for_detail().aget(id=id)
     return render(request, "listings/listing_detail.html", {"listing": listing})
 
 
@@ -184,10 +245,14 @@ def listing_create(request):
     return render(request, "listings/listing_create.html", {"form": form})
 
 
-def contact(request):
+async def contact(request):
     """
     Handles the request for the contact page and renders the corresponding HTML template.
 
+    Submitted messages are stored in the outbox and sent by the
+    ``process_contact_outbox`` command, so a slow mail server never delays the
+    response.
+
     :param request: HttpRequest object representing the request context
     :type request: HttpRequest
     :return: HttpResponse object rendering the contact.html template
@@ -197,11 +262,10 @@ def contact(request):
         form = ContactUsForm(request.POST)
 
         if form.is_valid():
-            send_mail(
-                subject=f'Message from {form.cleaned_data["name"] or "anonyme"} via MerchEx Contact Us form',
+            await aenqueue(
+                name=form.cleaned_data['name'],
+                email=form.cleaned_data['email'],
                 message=form.cleaned_data['message'],
-                from_email=form.cleaned_data['email'],
-                recipient_list=['admin@merchex.xyz'],
             )
 
             return redirect("email-sent")
@@ -46,6 +46,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'listings.replicas.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'merchex.urls'
@@ -74,9 +75,43 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Connections are closed at the end of each request: the queries of
+        # async views served over ASGI do not run in long-lived threads, so
+        # persistent connections would pile up instead of being reused.
+        'CONN_MAX_AGE': 0,
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 0,
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+# Read replicas: the read views send their queries to one of these aliases,
+# except for clients which wrote less than DATABASE_REPLICA_PIN_SECONDS ago.
+# Locally, list 'replica' here and keep db.replica.sqlite3 up to date with
+# `python manage.py sync_replicas --loop`.
+DATABASE_ROUTERS = ['listings.replicas.ReplicaRouter']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'merchex',
     }
 }
 
+# Lifetime in seconds of the cached band and listing pages. Entries are
+# invalidated as soon as the rows they display change.
+LISTINGS_CACHE_TIMEOUT = 300
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -117,3 +152,12 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+
+# Contact form messages are queued and sent by `manage.py process_contact_outbox`.
+# A failed delivery is retried after CONTACT_OUTBOX_RETRY_DELAY seconds, doubled
+# on each attempt, until CONTACT_OUTBOX_MAX_ATTEMPTS is reached. Messages a
+# worker claimed are requeued if it has not reported on them after
+# CONTACT_OUTBOX_LEASE seconds.
+CONTACT_OUTBOX_MAX_ATTEMPTS = 5
+CONTACT_OUTBOX_RETRY_DELAY = 60
+CONTACT_OUTBOX_LEASE = 600
@@ -0,0 +1,26 @@
+"""
+SQLite tuning for the merchex project, for deployments where several
+workers share the database file. It is not enabled by default: run with
+`DJANGO_SETTINGS_MODULE=merchex.settings_sqlite` to use it.
+"""
+from merchex.settings import *  # noqa: F401,F403
+from merchex.settings import DATABASES
+
+# WAL lets readers run alongside the writer, synchronous=NORMAL only syncs at
+# checkpoints (safe in WAL mode), reads go through a 256 MiB memory map and a
+# 64 MiB page cache, and writers wait up to 5 s for the lock.
+SQLITE_INIT_COMMAND = (
+    'PRAGMA journal_mode=WAL;'
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA mmap_size=268435456;'
+    'PRAGMA cache_size=-65536;'
+    'PRAGMA busy_timeout=5000;'
+    'PRAGMA temp_store=MEMORY;'
+)
+
+for database in DATABASES.values():
+    database.setdefault('OPTIONS', {})['init_command'] = SQLITE_INIT_COMMAND
+
+# IMMEDIATE transactions take the write lock upfront, so concurrent writers
+# queue on busy_timeout instead of failing to upgrade a read lock.
+DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
@@ -27,6 +27,7 @@ urlpatterns = [
     path('bands/<int:id>/change', views.band_update, name='band-update'),
     path('bands/<int:id>/delete', views.band_delete, name='band-delete'),
     path('about-us/', views.about, name='about'),
+    path('search/', views.search, name='search'),
     path('listings/', views.listing, name='listing'),
     path('listings/<int:id>', views.listing_detail, name='listing-detail'),
     path('listings/add', views.listing_create, name='listing-create'),
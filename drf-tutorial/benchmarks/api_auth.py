@@ -0,0 +1,177 @@
+"""
+Measures the latency and the number of queries of authenticated requests to
+the snippets API, with Django's default session and authentication setup and
+with the lean API profile of `tutorial/settings.py`.
+
+    python benchmarks/api_auth.py [--requests 500] [--snippets 200]
+
+Each profile gets a fresh database in a temporary directory, and a process of
+its own sending requests through Django's test client:
+
+- `default`: database sessions, the stock middleware, and a user loaded from
+  the database on every request; the client is logged in with a session.
+- `lean session`: signed-cookie sessions and users cached in a file-based
+  cache, shared like a production cache would be; the client is logged in
+  with a session.
+- `lean token`: the same, with the client sending `Authorization: Token`,
+  which gives the request an empty session, and skips the CSRF and messages
+  middleware.
+
+Requests alternate between the detail, the list and a partial update of the
+snippets of the client.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SETTINGS = '''\
+from tutorial.settings import *
+
+DATABASES['default']['NAME'] = {name!r}
+# Users are only cached in a cache shared by every worker.
+CACHES = {{'default': {{'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': {cache!r}}}}}
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+{overrides}
+'''
+
+DEFAULT_SETTINGS = '''\
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'snippets.replicas.ReplicaPinMiddleware',
+]
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
+'''
+
+# The settings and the way the client authenticates of each profile.
+PROFILES = {
+    'default': (DEFAULT_SETTINGS, 'session'),
+    'lean session': ('', 'session'),
+    'lean token': ('', 'token'),
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def replay(login, requests, snippets):
+    """
+    Runs in the process of a profile: seeds the database, sends the requests
+    and prints the latencies and query counts of each kind of request as JSON.
+    """
+    import django
+    django.setup()
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+
+    from snippets.models import Snippet
+
+    call_command('migrate', verbosity=0)
+    user = User.objects.create_user('bench', password='bench')
+    Snippet.objects.bulk_create(
+        Snippet(owner=user, title=f'{i}', code=f'print({i})', highlighted='<div></div>', highlight_key=f'{i}')
+        for i in range(snippets)
+    )
+    ids = list(Snippet.objects.values_list('pk', flat=True))
+
+    client = Client()
+    headers = {}
+    if login == 'session':
+        client.force_login(user)
+    else:
+        headers['Authorization'] = f'Token {Token.objects.create(user=user).key}'
+
+    kinds = {
+        'detail': lambda i: client.get(reverse('snippet-detail', args=[ids[i % len(ids)]]), headers=headers),
+        'list': lambda i: client.get(reverse('snippet-list'), headers=headers),
+        'update': lambda i: client.patch(reverse('snippet-detail', args=[ids[i % len(ids)]]), {'title': f'{i}'},
+                                         content_type='application/json', headers=headers),
+    }
+    results = {kind: {'latencies': [], 'queries': []} for kind in kinds}
+    for i in range(requests):
+        kind = list(kinds)[i % len(kinds)]
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            response = kinds[kind](i)
+            latency = time.perf_counter() - start
+        assert response.status_code == 200, response.status_code
+        # The first requests fill the caches.
+        if i >= len(kinds):
+            results[kind]['latencies'].append(latency)
+            results[kind]['queries'].append(counter.count)
+    json.dump(results, sys.stdout)
+
+
+def bench(profile, args):
+    overrides, login = PROFILES[profile]
+    with tempfile.TemporaryDirectory() as directory:
+        Path(directory, 'bench_settings.py').write_text(
+            SETTINGS.format(name=str(Path(directory, 'db.sqlite3')), cache=str(Path(directory, 'cache')),
+                            overrides=overrides),
+        )
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'bench_settings',
+            'PYTHONPATH': os.pathsep.join([directory, str(BASE_DIR)]),
+        }
+        process = subprocess.run(
+            [sys.executable, __file__, '--replay', login, '--requests', str(args.requests),
+             '--snippets', str(args.snippets)],
+            cwd=BASE_DIR, env=env, check=True, stdout=subprocess.PIPE, text=True,
+        )
+    return json.loads(process.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--snippets', type=int, default=200)
+    parser.add_argument('--replay', choices=['session', 'token'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.replay:
+        replay(args.replay, args.requests, args.snippets)
+        return
+    for profile in PROFILES:
+        results = bench(profile, args)
+        for kind, result in results.items():
+            print(f'{profile:>12}  {kind:<6}: p50 {statistics.median(result["latencies"]) * 1000:6.2f} ms, '
+                  f'{statistics.mean(result["queries"]):.1f} queries')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Measures how long a fresh process takes to set Django up and import
+`snippets.models`, as every `manage.py` command and server worker does.
+
+    python benchmarks/import_time.py [--runs 20]
+
+The `eager` run additionally evaluates the lexer and style choices right after
+the import, which is what importing the module used to cost. The `check` run
+runs the system checks instead, as most `manage.py` commands do first.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SCRIPTS = {
+    'lazy': 'import django; django.setup(); import snippets.models',
+    'eager': (
+        'import django; django.setup(); import snippets.models as m; '
+        'm.get_language_choices(); m.get_style_choices()'
+    ),
+    'check': (
+        'import django; django.setup(); import snippets.models; '
+        'from django.core import checks; checks.run_checks()'
+    ),
+}
+
+
+def measure(script, runs):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'tutorial.settings'}
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', script], cwd=BASE_DIR, env=env, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    medians = {}
+    for name, script in SCRIPTS.items():
+        timings = measure(script, args.runs)
+        medians[name] = statistics.median(timings)
+        print(f'{name:>5}: median {medians[name] * 1000:7.1f} ms, min {min(timings) * 1000:7.1f} ms')
+    print(f'saved: {(medians["eager"] - medians["lazy"]) * 1000:.1f} ms per process start')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Measures read and write throughput of the snippets API served by a
+multi-worker gunicorn, with Django's default SQLite setup of
+`tutorial/settings.py` and with the tuned profile of `tutorial/settings_sqlite.py`.
+
+    python benchmarks/sqlite_concurrency.py [--workers 4] [--clients 8]
+        [--duration 20] [--write-ratio 0.2]
+
+Each profile gets a fresh database in a temporary directory. Every client is a
+separate process logged in as its own user (Basic auth, with a fast password
+hasher so that hashing does not dominate) and loops over random requests:
+`GET /snippets/<id>/` for reads, and `PATCH /snippets/<id>/` of one of its
+own snippets for writes. Requires gunicorn.
+"""
+import argparse
+import base64
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SNIPPETS_PER_USER = 50
+
+SETTINGS = '''\
+from {base} import *
+
+DATABASES['default']['NAME'] = {name!r}
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+DEBUG = False
+ALLOWED_HOSTS = ['*']
+'''
+
+PROFILES = {
+    'default': 'tutorial.settings',
+    'tuned': 'tutorial.settings_sqlite',
+}
+
+SETUP = '''\
+from django.contrib.auth.models import User
+from snippets.models import Snippet
+
+for i in range({clients}):
+    user = User.objects.create_user(f'bench{{i}}', password='bench')
+    Snippet.objects.bulk_create(
+        Snippet(owner=user, title=f'{{i}}-{{j}}', code=f'print({{j}})', highlighted='<div></div>',
+                highlight_key=f'{{i}}-{{j}}')
+        for j in range({snippets})
+    )
+'''
+
+
+def run_client(port, index, duration, write_ratio, results):
+    token = base64.b64encode(f'bench{index}:bench'.encode()).decode()
+    headers = {'Authorization': f'Basic {token}', 'Content-Type': 'application/json'}
+    first_id = index * SNIPPETS_PER_USER + 1
+    own_ids = range(first_id, first_id + SNIPPETS_PER_USER)
+    total = results['snippets']
+    samples = {'read': [], 'write': [], 'errors': 0}
+    rng = random.Random(index)
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if rng.random() < write_ratio:
+            kind, method = 'write', 'PATCH'
+            path = f'/snippets/{rng.choice(own_ids)}/'
+            body = json.dumps({'title': f'edited {rng.random()}'})
+        else:
+            kind, method, body = 'read', 'GET', None
+            path = f'/snippets/{rng.randint(1, total)}/'
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status == 200
+        except OSError:
+            ok = False
+        finally:
+            connection.close()
+        if ok:
+            samples[kind].append(time.perf_counter() - start)
+        else:
+            samples['errors'] += 1
+    results[index] = samples
+
+
+def manage(settings, *args, **kwargs):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings}
+    return subprocess.run([sys.executable, 'manage.py', *args], cwd=BASE_DIR, env=env, check=True, **kwargs)
+
+
+def wait_for(port):
+    for _ in range(100):
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('gunicorn did not start')
+
+
+def bench(profile, args, port):
+    with tempfile.TemporaryDirectory() as directory:
+        module = f'bench_settings_{profile}'
+        Path(directory, f'{module}.py').write_text(
+            SETTINGS.format(base=PROFILES[profile], name=str(Path(directory, 'db.sqlite3'))),
+        )
+        os.environ['PYTHONPATH'] = os.pathsep.join([directory, str(BASE_DIR)])
+        manage(module, 'migrate', '-v', '0')
+        manage(module, 'shell', '-c', SETUP.format(clients=args.clients, snippets=SNIPPETS_PER_USER),
+               stdout=subprocess.DEVNULL)
+
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', 'tutorial.wsgi', '--workers', str(args.workers),
+             '--bind', f'127.0.0.1:{port}', '--log-level', 'warning',
+             '--env', f'DJANGO_SETTINGS_MODULE={module}'],
+            cwd=BASE_DIR,
+        )
+        try:
+            wait_for(port)
+            with multiprocessing.Manager() as manager:
+                results = manager.dict(snippets=args.clients * SNIPPETS_PER_USER)
+                clients = [
+                    multiprocessing.Process(target=run_client,
+                                            args=(port, i, args.duration, args.write_ratio, results))
+                    for i in range(args.clients)
+                ]
+                for client in clients:
+                    client.start()
+                for client in clients:
+                    client.join()
+                samples = [results[i] for i in range(args.clients)]
+        finally:
+            server.terminate()
+            server.wait()
+
+    reads = [latency for sample in samples for latency in sample['read']]
+    writes = [latency for sample in samples for latency in sample['write']]
+    errors = sum(sample['errors'] for sample in samples)
+    return reads, writes, errors
+
+
+def describe(latencies, duration):
+    if not latencies:
+        return '      0 req/s'
+    p50 = statistics.median(latencies) * 1000
+    p99 = statistics.quantiles(latencies, n=100)[98] * 1000 if len(latencies) > 1 else p50
+    return f'{len(latencies) / duration:7.1f} req/s, p50 {p50:6.1f} ms, p99 {p99:7.1f} ms'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    for profile in PROFILES:
+        reads, writes, errors = bench(profile, args, args.port)
+        print(f'{profile:>7}: reads  {describe(reads, args.duration)}')
+        print(f'{"":>7}  writes {describe(writes, args.duration)}')
+        print(f'{"":>7}  errors {errors}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Measures the cost of building the hyperlinks of a 10k-row list, with DRF's
+hyperlinked fields and with the cached ones of `snippets.reversal`.
+
+    python benchmarks/url_reversal.py [--rows 10000] [--runs 10]
+
+Both serializers have the `url` and `highlight` hyperlinks of
+`SnippetSerializer`, and serialize the same unsaved snippets: no database is
+needed, and the time measured is the one of building the hyperlinks.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure(function, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorial.settings')
+    import django
+    django.setup()
+    from rest_framework import serializers
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from snippets.models import Snippet
+    from snippets.reversal import CachedHyperlinkedIdentityField, CachedHyperlinkedModelSerializer
+
+    class PlainSerializer(serializers.HyperlinkedModelSerializer):
+        highlight = serializers.HyperlinkedIdentityField(view_name='snippet-highlight', format='html')
+
+        class Meta:
+            model = Snippet
+            fields = ['url', 'id', 'highlight']
+
+    class CachedSerializer(CachedHyperlinkedModelSerializer):
+        highlight = CachedHyperlinkedIdentityField(view_name='snippet-highlight', format='html')
+
+        class Meta:
+            model = Snippet
+            fields = ['url', 'id', 'highlight']
+
+    snippets = [Snippet(pk=i) for i in range(1, args.rows + 1)]
+    context = {'request': Request(APIRequestFactory().get('/snippets/', SERVER_NAME='localhost'))}
+    # The hyperlinks have to be the same for the comparison to mean anything.
+    assert (PlainSerializer(snippets, many=True, context=context).data
+            == CachedSerializer(snippets, many=True, context=context).data)
+
+    medians = {
+        serializer.__name__: measure(lambda: serializer(snippets, many=True, context=context).data, args.runs)
+        for serializer in [PlainSerializer, CachedSerializer]
+    }
+    for name, median in medians.items():
+        print(f'{name:>16}: median {median * 1000:8.1f} ms for {args.rows} rows')
+    print(f'{medians["PlainSerializer"] / medians["CachedSerializer"]:.1f}x faster')
+
+
+if __name__ == '__main__':
+    main()
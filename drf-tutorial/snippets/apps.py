@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SnippetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'snippets'
+
+    def ready(self):
+        # Connects the receivers dropping changed users and tokens from the cache.
+        from snippets import authentication  # noqa: F401
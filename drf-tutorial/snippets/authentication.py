@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def get_cache_timeout():
+    return getattr(settings, 'AUTH_CACHE_TIMEOUT', 60)
+
+
+def get_cache():
+    """
+    Returns the cache of `AUTH_CACHE_ALIAS`, or `None` when that cache is
+    local to the process: the other workers would never see a user or a token
+    dropped from it, and would keep authenticating them.
+    """
+    cache = caches[getattr(settings, 'AUTH_CACHE_ALIAS', 'default')]
+    if isinstance(cache, (LocMemCache, DummyCache)):
+        return None
+    return cache
+
+
+def _user_cache_key(pk):
+    return f'snippets:auth:user:{pk}'
+
+
+def _token_cache_key(key):
+    return f'snippets:auth:token:{key}'
+
+
+def _cache_get(cache_key):
+    cache = get_cache()
+    return cache.get(cache_key) if cache is not None else None
+
+
+def _cache_set(cache_key, instance):
+    # Rows read inside a transaction may still be rolled back, and their
+    # primary keys reused.
+    cache = get_cache()
+    if cache is not None and not transaction.get_connection(instance._state.db).in_atomic_block:
+        cache.set(cache_key, instance, get_cache_timeout())
+
+
+def _cache_delete(cache_key):
+    cache = get_cache()
+    if cache is not None:
+        cache.delete(cache_key)
+
+
+def get_cached_user(pk):
+    """
+    Returns the user with the given primary key, or `None`, from the cache
+    when it was loaded less than `AUTH_CACHE_TIMEOUT` seconds ago.
+    """
+    User = get_user_model()
+    pk = User._meta.pk.to_python(pk)
+    user = _cache_get(_user_cache_key(pk))
+    if user is None:
+        user = User._default_manager.filter(pk=pk).first()
+        if user is not None:
+            _cache_set(_user_cache_key(pk), user)
+    return user
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def _forget_user(sender, instance, **kwargs):
+    _cache_delete(_user_cache_key(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Token)
+def _forget_token(sender, instance, **kwargs):
+    _cache_delete(_token_cache_key(instance.key))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Loads the user of a session from the cache, instead of querying it on
+    every request.
+    """
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication looking tokens and their users up in the cache.
+
+    Saving or deleting a user or a token drops it from the cache, which is only
+    used when every worker shares it, see `get_cache()`. Changes made without
+    signals, such as `QuerySet.update()`, are picked up after
+    `AUTH_CACHE_TIMEOUT` seconds.
+    """
+
+    def authenticate_credentials(self, key):
+        token = _cache_get(_token_cache_key(key))
+        if token is None:
+            token = self.get_model().objects.filter(key=key).first()
+            if token is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            _cache_set(_token_cache_key(key), token)
+
+        user = get_cached_user(token.user_id)
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        token.user = user
+        return user, token
@@ -0,0 +1,171 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from html import escape
+
+from django.conf import settings
+from django.db import connection
+from pygments import highlight
+from pygments.formatters.html import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+CSS_CLASS = 'highlight'
+
+# Below this many fragments, rendering inline is cheaper than shipping the
+# work to the process pool.
+POOL_THRESHOLD = 20
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head>
+  <title>{title}</title>
+  <meta http-equiv="content-type" content="text/html; charset=utf-8">
+  <link rel="stylesheet" href="{stylesheet_url}">
+</head>
+<body>
+<h2>{title}</h2>
+
+{body}
+</body>
+</html>
+'''
+
+_executor = None
+
+
+def render(code, language, linenos):
+    """
+    Use the `pygments` library to create a highlighted HTML
+    fragment of the code.
+
+    The fragment only uses CSS classes, so it does not depend on the style,
+    which is applied by the stylesheet returned by `stylesheet`. This is a plain
+    function of its arguments so that it can run in a worker process.
+    """
+    lexer = get_lexer_by_name(language)
+    linenos = 'table' if linenos else False
+    formatter = HtmlFormatter(linenos=linenos, cssclass=CSS_CLASS)
+    return highlight(code, lexer, formatter)
+
+
+@lru_cache
+def stylesheet(style):
+    """
+    Returns the CSS rules of a Pygments style for highlighted fragments.
+    """
+    return HtmlFormatter(style=style).get_style_defs(f'.{CSS_CLASS}')
+
+
+def render_page(fragment, title, stylesheet_url):
+    """
+    Wraps a highlighted fragment in a full HTML page linking to its stylesheet.
+    """
+    return PAGE_TEMPLATE.format(title=escape(title), stylesheet_url=escape(stylesheet_url), body=fragment)
+
+
+def is_deferred():
+    return getattr(settings, 'SNIPPETS_DEFERRED_HIGHLIGHT', False)
+
+
+def get_executor():
+    """
+    Returns the process pool shared by the whole process, starting it on first use.
+    """
+    global _executor
+    if _executor is None:
+        # Worker processes are spawned rather than forked, as forking a threaded
+        # server process is unsafe.
+        _executor = ProcessPoolExecutor(
+            max_workers=getattr(settings, 'SNIPPETS_HIGHLIGHT_WORKERS', None),
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _executor
+
+
+def render_or_none(code, language, linenos):
+    """
+    Same as `render`, but returns `None` instead of raising, so that one
+    fragment failing does not lose a whole batch.
+    """
+    try:
+        return render(code, language, linenos)
+    except Exception:
+        return None
+
+
+def render_many(sources, function=render):
+    """
+    Renders the highlighted fragments of many `(code, language, linenos)`
+    triples with `function`, spreading large batches over the process pool.
+    """
+    sources = list(sources)
+    if len(sources) < POOL_THRESHOLD:
+        return [function(*source) for source in sources]
+    return list(get_executor().map(function, *zip(*sources), chunksize=max(1, len(sources) // 32)))
+
+
+def _store_result(pk, key, future):
+    from snippets.models import Snippet
+
+    # Only store the output if the snippet was not edited in the meantime.
+    pending = Snippet.objects.filter(pk=pk, highlight_key=key)
+    try:
+        highlighted = future.result()
+    except Exception:
+        pending.update(highlight_status=Snippet.HighlightStatus.FAILED)
+    else:
+        pending.update(highlighted=highlighted, highlight_status=Snippet.HighlightStatus.READY)
+    finally:
+        # Callbacks run in a thread of the pool, which no request cycle ever
+        # cleans up after.
+        if not connection.in_atomic_block:
+            connection.close()
+
+
+def schedule(snippet):
+    """
+    Renders the highlighted output of a saved snippet in the process pool, and
+    stores it once it is ready.
+
+    :param snippet: The snippet to highlight.
+    :type snippet: Snippet
+    :return: The future of the highlighted output.
+    :rtype: Future
+    """
+    future = get_executor().submit(render, snippet.code, snippet.language, snippet.linenos)
+    future.add_done_callback(partial(_store_result, snippet.pk, snippet.highlight_key))
+    return future
+
+
+def render_pending():
+    """
+    Renders and stores the highlighted output of every pending or failed
+    snippet.
+
+    Pending snippets whose future was lost, e.g. because the server was
+    restarted before the pool rendered them, would otherwise stay pending, and
+    failed ones are retried here rather than on a request. A snippet that fails
+    again is marked as failed without stopping the others.
+
+    :return: The number of snippets rendered.
+    :rtype: int
+    """
+    from snippets.models import Snippet
+
+    snippets = list(Snippet.objects.filter(
+        highlight_status__in=[Snippet.HighlightStatus.PENDING, Snippet.HighlightStatus.FAILED],
+    ).only('code', 'language', 'linenos', 'highlight_key', 'highlight_status'))
+    fragments = render_many(
+        ((snippet.code, snippet.language, snippet.linenos) for snippet in snippets), function=render_or_none,
+    )
+    rendered = 0
+    for snippet, highlighted in zip(snippets, fragments):
+        # Only store the output if the snippet was not edited in the meantime.
+        unchanged = Snippet.objects.filter(
+            pk=snippet.pk, highlight_key=snippet.highlight_key, highlight_status=snippet.highlight_status,
+        )
+        if highlighted is None:
+            unchanged.update(highlight_status=Snippet.HighlightStatus.FAILED)
+        else:
+            rendered += unchanged.update(highlighted=highlighted, highlight_status=Snippet.HighlightStatus.READY)
+    return rendered
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from snippets import highlighting
+
+
+class Command(BaseCommand):
+    help = "Highlights the snippets left pending, e.g. by a restart of the server, and retries the failed ones."
+
+    def handle(self, *args, **options):
+        rendered = highlighting.render_pending()
+        self.stdout.write(f"Highlighted {rendered} pending snippet(s).")
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from snippets import replicas
+
+
+class Command(BaseCommand):
+    help = "Copies the primary SQLite database over the DATABASE_REPLICAS, as a stand-in for replication."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep copying instead of exiting after the first copy.")
+        parser.add_argument('--interval', type=float, default=1,
+                            help="Seconds to wait between two copies with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            updated = replicas.replicate()
+            if not options['loop']:
+                self.stdout.write(f"Updated {len(updated)} replica(s).")
+                break
+            time.sleep(options['interval'])
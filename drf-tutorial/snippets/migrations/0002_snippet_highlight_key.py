@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snippet',
+            name='highlight_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+    ]
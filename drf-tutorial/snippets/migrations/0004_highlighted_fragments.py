@@ -0,0 +1,43 @@
+import hashlib
+import json
+
+from django.db import migrations
+from pygments import highlight
+from pygments.formatters.html import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+
+def render(code, language, linenos):
+    """
+    A frozen copy of `snippets.highlighting.render` at the time of this
+    migration, so that later changes to it do not change what it stores.
+    """
+    lexer = get_lexer_by_name(language)
+    formatter = HtmlFormatter(linenos='table' if linenos else False, cssclass='highlight')
+    return highlight(code, lexer, formatter)
+
+
+def highlight_fragments(apps, schema_editor):
+    """
+    Replace the full highlighted pages with style independent fragments, the
+    style now being served as a separate stylesheet.
+    """
+    Snippet = apps.get_model('snippets', 'Snippet')
+    snippets = Snippet.objects.only('code', 'language', 'linenos')
+    for snippet in snippets.iterator(chunk_size=500):
+        source = json.dumps([snippet.code, snippet.language, snippet.linenos])
+        snippet.highlight_key = hashlib.sha256(source.encode()).hexdigest()
+        snippet.highlighted = render(snippet.code, snippet.language, snippet.linenos)
+        snippet.highlight_status = 'ready'
+        snippet.save(update_fields=['highlighted', 'highlight_key', 'highlight_status'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0003_snippet_highlight_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(highlight_fragments, migrations.RunPython.noop),
+    ]
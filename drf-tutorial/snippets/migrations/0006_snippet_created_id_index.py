@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0005_lazy_language_style_choices'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='snippet',
+            index=models.Index(fields=['created', 'id'], name='snippets_sn_created_988397_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+FORWARDS = [
+    "CREATE VIRTUAL TABLE snippets_snippet_fts USING fts5(title, code, content='snippets_snippet', "
+    "content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER snippets_snippet_fts_insert AFTER INSERT ON snippets_snippet BEGIN "
+    "INSERT INTO snippets_snippet_fts(rowid, title, code) VALUES (new.id, new.title, new.code); END",
+    "CREATE TRIGGER snippets_snippet_fts_delete AFTER DELETE ON snippets_snippet BEGIN "
+    "INSERT INTO snippets_snippet_fts(snippets_snippet_fts, rowid, title, code) "
+    "VALUES ('delete', old.id, old.title, old.code); END",
+    "CREATE TRIGGER snippets_snippet_fts_update AFTER UPDATE OF title, code ON snippets_snippet BEGIN "
+    "INSERT INTO snippets_snippet_fts(snippets_snippet_fts, rowid, title, code) "
+    "VALUES ('delete', old.id, old.title, old.code); "
+    "INSERT INTO snippets_snippet_fts(rowid, title, code) VALUES (new.id, new.title, new.code); END",
+    "INSERT INTO snippets_snippet_fts(snippets_snippet_fts) VALUES ('rebuild')",
+]
+
+BACKWARDS = [
+    "DROP TRIGGER snippets_snippet_fts_update",
+    "DROP TRIGGER snippets_snippet_fts_delete",
+    "DROP TRIGGER snippets_snippet_fts_insert",
+    "DROP TABLE snippets_snippet_fts",
+]
+
+
+class Migration(migrations.Migration):
+    # External content FTS5 index over the title and code of snippets, kept in
+    # sync by triggers so that bulk operations are indexed too. SQLite drops
+    # these triggers if a later migration rebuilds the snippets table.
+
+    dependencies = [
+        ('snippets', '0006_snippet_created_id_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(FORWARDS, BACKWARDS),
+    ]
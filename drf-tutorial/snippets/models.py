@@ -1,36 +1,154 @@
-from django.db import models
-from pygments import highlight
-from pygments.formatters.html import HtmlFormatter
-from pygments.lexers import get_all_lexers, get_lexer_by_name
-from pygments.styles import get_all_styles
+import hashlib
+import json
+from functools import cache
 
-LEXERS = [item for item in get_all_lexers() if item[1]]
-LANGUAGE_CHOICES = sorted([(item[1][0], item[0]) for item in LEXERS])
-STYLE_CHOICES = sorted([(item, item) for item in get_all_styles()])
+from django.db import models, transaction
+from django.utils.choices import CallableChoiceIterator
+
+from snippets import highlighting
+
+
+# Discovering every lexer and style scans all the installed Pygments plugins,
+# so the choices are only computed the first time they are needed.
+@cache
+def get_lexers():
+    from pygments.lexers import get_all_lexers
+
+    return [item for item in get_all_lexers() if item[1]]
+
+
+@cache
+def get_language_choices():
+    return sorted([(item[1][0], item[0]) for item in get_lexers()])
+
+
+@cache
+def get_style_choices():
+    from pygments.styles import get_all_styles
+
+    return sorted([(item, item) for item in get_all_styles()])
+
+
+def __getattr__(name):
+    # Lazy access to the former module-level constants.
+    lazy_constants = {
+        'LEXERS': get_lexers,
+        'LANGUAGE_CHOICES': get_language_choices,
+        'STYLE_CHOICES': get_style_choices,
+    }
+    if name in lazy_constants:
+        return lazy_constants[name]()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+class LazyChoicesCharField(models.CharField):
+    """
+    A `CharField` whose callable choices are left out of the system checks,
+    which run before most `manage.py` commands and would evaluate them.
+    """
+
+    def _check_choices(self):
+        if isinstance(self.choices, CallableChoiceIterator):
+            return []
+        return super()._check_choices()
+
+    def deconstruct(self):
+        # Migrations only need to know the column.
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.CharField', args, kwargs
 
 
 class Snippet(models.Model):
+    class HighlightStatus(models.TextChoices):
+        PENDING = 'pending'
+        READY = 'ready'
+        FAILED = 'failed'
+
     created = models.DateTimeField(auto_now_add=True)
     title = models.CharField(max_length=100, blank=True, default='')
     code = models.TextField()
     linenos = models.BooleanField(default=False)
-    language = models.CharField(choices=LANGUAGE_CHOICES, default='python', max_length=100)
-    style = models.CharField(choices=STYLE_CHOICES, default='friendly', max_length=100)
+    language = LazyChoicesCharField(choices=get_language_choices, default='python', max_length=100)
+    style = LazyChoicesCharField(choices=get_style_choices, default='friendly', max_length=100)
     owner = models.ForeignKey('auth.User', related_name='snippets', on_delete=models.CASCADE)
     highlighted = models.TextField()
+    highlight_key = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    highlight_status = models.CharField(choices=HighlightStatus.choices, default=HighlightStatus.READY,
+                                        max_length=10, editable=False)
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            models.Index(fields=['created', 'id']),
+        ]
+
+    def get_highlight_key(self):
+        """
+        Hash of every field that affects the highlighted fragment.
+        """
+        source = json.dumps([self.code, self.language, self.linenos])
+        return hashlib.sha256(source.encode()).hexdigest()
+
+    def render_highlighted(self):
+        return highlighting.render(self.code, self.language, self.linenos)
+
+    @classmethod
+    def update_highlighted(cls, snippets):
+        """
+        Brings the highlighted output of the given snippets up to date.
+
+        Output already stored for the same highlight key is fetched in a single
+        query, and each missing fragment is rendered once per batch. With
+        `SNIPPETS_DEFERRED_HIGHLIGHT`, missing fragments are left pending instead.
+        Returns the pending snippets, to schedule once they are committed.
+        """
+        stale = {}
+        for snippet in snippets:
+            key = snippet.get_highlight_key()
+            if key != snippet.highlight_key:
+                stale.setdefault(key, []).append(snippet)
+        if not stale:
+            return []
+
+        stored = dict(cls.objects.filter(
+            highlight_key__in=stale, highlight_status=cls.HighlightStatus.READY,
+        ).values_list('highlight_key', 'highlighted'))
+        missing = [key for key in stale if key not in stored]
+        pending = []
+        if highlighting.is_deferred():
+            for key in missing:
+                pending += stale[key]
+        elif len(missing) == 1:
+            stored[missing[0]] = stale[missing[0]][0].render_highlighted()
+        else:
+            sources = [(stale[key][0].code, stale[key][0].language, stale[key][0].linenos) for key in missing]
+            stored.update(zip(missing, highlighting.render_many(sources)))
+
+        for key, group in stale.items():
+            for snippet in group:
+                snippet.highlight_key = key
+                if key in stored:
+                    snippet.highlighted, snippet.highlight_status = stored[key], cls.HighlightStatus.READY
+                else:
+                    snippet.highlighted, snippet.highlight_status = '', cls.HighlightStatus.PENDING
+        return pending
 
     def save(self, *args, **kwargs):
         """
         Use the `pygments` library to create a highlighted HTML
-        representation of the code snippet.
+        fragment of the code snippet.
+
+        The output is only rendered when a field it depends on changed, and is
+        copied from another snippet with the same highlight key when possible.
+        With `SNIPPETS_DEFERRED_HIGHLIGHT`, it is rendered in a worker process
+        once the snippet is committed, and the snippet stays pending until then.
         """
-        lexer = get_lexer_by_name(self.language)
-        linenos = 'table' if self.linenos else False
-        options = {'title': self.title} if self.title else {}
-        formatter = HtmlFormatter(style=self.style, linenos=linenos,
-                                  full=True, **options)
-        self.highlighted = highlight(self.code, lexer, formatter)
+        pending = []
+        if self.get_highlight_key() != self.highlight_key:
+            pending = Snippet.update_highlighted([self])
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'highlighted', 'highlight_key', 'highlight_status'}
         super().save(*args, **kwargs)
+        if pending:
+            transaction.on_commit(lambda: highlighting.schedule(self))
@@ -0,0 +1,28 @@
+from rest_framework.pagination import CursorPagination
+
+
+class SnippetCursorPagination(CursorPagination):
+    """
+    Paginates snippets by creation date with an opaque cursor, so fetching a
+    page costs the same wherever it is in the list and no `COUNT(*)` is run.
+    Clients may ask for up to `max_page_size` snippets per page.
+
+    Search results are paginated by rank instead, best matches first.
+    """
+    ordering = ('created', 'id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank', 'id')
+        return super().get_ordering(request, queryset, view)
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Paginates users by primary key with an opaque cursor.
+    """
+    ordering = ('id',)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
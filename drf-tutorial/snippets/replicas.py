@@ -0,0 +1,112 @@
+import random
+import sqlite3
+from contextlib import closing, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'use_primary'
+
+# Whether reads may go to a replica, enabled by `ReplicaReadMixin` for the
+# actions that tolerate replication lag.
+_replica_reads = ContextVar('snippets_replica_reads', default=False)
+# Whether the client wrote recently, set by `ReplicaPinMiddleware`.
+_pinned = ContextVar('snippets_replica_pinned', default=False)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def get_pin_seconds():
+    return getattr(settings, 'DATABASE_REPLICA_PIN_SECONDS', 10)
+
+
+class ReplicaRouter:
+    """
+    Sends writes to the primary (`default`) database, and the reads of the
+    replica actions of `ReplicaReadMixin` viewsets to one of
+    `DATABASE_REPLICAS`, unless the client is pinned to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and _replica_reads.get() and not _pinned.get():
+            return random.choice(replicas)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary through replication.
+        if db in get_replicas():
+            return False
+        return None
+
+
+@contextmanager
+def replica_reads():
+    """
+    Lets the reads made in the block go to a replica.
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaReadMixin:
+    """
+    Sends the reads of the `replica_actions` of a viewset to a replica,
+    including the authentication and permission checks.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.action_map.get(request.method.lower()) not in self.replica_actions:
+            return super().dispatch(request, *args, **kwargs)
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaPinMiddleware:
+    """
+    Gives read-your-writes consistency on top of `ReplicaRouter`: after a
+    request with an unsafe method, a short-lived cookie pins the reads of the
+    client to the primary for `DATABASE_REPLICA_PIN_SECONDS`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(PIN_COOKIE, '1', max_age=get_pin_seconds(), httponly=True, samesite='Lax')
+        return response
+
+
+def replicate(source=DEFAULT_DB_ALIAS):
+    """
+    Copies the committed content of the primary SQLite database over every
+    replica with SQLite's online backup API, a stand-in for real replication.
+    """
+    replicas = get_replicas()
+    with closing(sqlite3.connect(connections[source].settings_dict['NAME'])) as primary:
+        for alias in replicas:
+            with closing(sqlite3.connect(connections[alias].settings_dict['NAME'])) as target:
+                primary.backup(target)
+    return replicas
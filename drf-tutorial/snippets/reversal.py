@@ -0,0 +1,61 @@
+from rest_framework import serializers
+
+# A lookup value reversed once per hyperlinked field and request, and then
+# replaced by the lookup value of each object.
+_LOOKUP_PLACEHOLDER = 8675309123456789
+
+
+def url_builder(field, request, format):
+    """
+    Returns a function building the hyperlink of a lookup value, as
+    `field.get_url()` would, from a URL reversed once.
+    """
+    def reverse(value):
+        return field.reverse(field.view_name, kwargs={field.lookup_url_kwarg: value}, request=request, format=format)
+
+    placeholder = str(_LOOKUP_PLACEHOLDER)
+    url = reverse(_LOOKUP_PLACEHOLDER)
+    if url.count(placeholder) != 1:
+        return reverse
+    prefix, _, suffix = url.partition(placeholder)
+    # Other values may be escaped, or rejected, by the URL pattern.
+    return lambda value: prefix + str(value) + suffix if type(value) is int else reverse(value)
+
+
+class CachedUrlMixin:
+    """
+    Builds the hyperlinks of a field from a URL reversed once per request and
+    format, instead of calling `reverse()` for every object. Fields are created
+    per serializer, so cached URLs never outlive their request.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._url_builders = {}
+
+    def get_url(self, obj, view_name, request, format):
+        if hasattr(obj, 'pk') and obj.pk in (None, ''):
+            return None
+        if view_name != self.view_name:
+            return super().get_url(obj, view_name, request, format)
+        key = (request, format)
+        if key not in self._url_builders:
+            self._url_builders[key] = url_builder(self, request, format)
+        return self._url_builders[key](getattr(obj, self.lookup_field))
+
+
+class CachedHyperlinkedRelatedField(CachedUrlMixin, serializers.HyperlinkedRelatedField):
+    pass
+
+
+class CachedHyperlinkedIdentityField(CachedUrlMixin, serializers.HyperlinkedIdentityField):
+    pass
+
+
+class CachedHyperlinkedModelSerializer(serializers.HyperlinkedModelSerializer):
+    """
+    A `HyperlinkedModelSerializer` whose generated hyperlinked fields cache
+    their URLs.
+    """
+    serializer_related_field = CachedHyperlinkedRelatedField
+    serializer_url_field = CachedHyperlinkedIdentityField
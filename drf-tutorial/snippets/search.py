@@ -0,0 +1,76 @@
+import re
+
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_PARAM = 'search'
+
+EXCERPT_TOKENS = 16
+
+# Control characters delimit the matches in excerpts, and are only turned
+# into <mark> tags once the excerpt is escaped.
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+_WORD_RE = re.compile(r'\w+')
+
+_MATCHING_IDS = 'SELECT rowid FROM snippets_snippet_fts WHERE snippets_snippet_fts MATCH %s'
+
+# Auxiliary functions only work in a query on the index, hence the correlated
+# subqueries. Matches in the title weigh more than matches in the code.
+_RANK = (
+    '(SELECT bm25(snippets_snippet_fts, 10.0, 1.0) FROM snippets_snippet_fts '
+    'WHERE snippets_snippet_fts MATCH %s AND rowid = "snippets_snippet"."id")'
+)
+_EXCERPT = (
+    f"(SELECT snippet(snippets_snippet_fts, -1, %s, %s, '…', {EXCERPT_TOKENS}) FROM snippets_snippet_fts "
+    'WHERE snippets_snippet_fts MATCH %s AND rowid = "snippets_snippet"."id")'
+)
+
+
+def build_match_query(text):
+    """
+    Turns free text into an FTS5 query matching every word of it, the last one
+    as a prefix. Words are quoted, so the FTS5 query syntax is never interpreted.
+    """
+    words = _WORD_RE.findall(text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+class SnippetSearchFilter(BaseFilterBackend):
+    """
+    Restricts snippets to those matching `?search=` in their title or code,
+    using the FTS5 index of the snippets table.
+
+    Matching snippets are annotated with a `search_rank`, lower being better,
+    and a `search_excerpt` of the text around the matches.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = build_match_query(request.query_params.get(SEARCH_PARAM, ''))
+        if query is None:
+            return queryset
+        return queryset.filter(id__in=RawSQL(_MATCHING_IDS, [query])).annotate(
+            search_rank=RawSQL(_RANK, [query], output_field=FloatField()),
+            search_excerpt=RawSQL(_EXCERPT, [_MATCH_START, _MATCH_END, query]),
+        )
+
+
+class ExcerptField(serializers.CharField):
+    """
+    Renders a search excerpt as escaped HTML, with the matches in `<mark>`.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return escape(value).replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
@@ -1,20 +1,80 @@
 from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework import serializers
 
+from snippets import highlighting
 from snippets.models import Snippet
+from snippets.reversal import (
+    CachedHyperlinkedIdentityField, CachedHyperlinkedModelSerializer, CachedHyperlinkedRelatedField,
+)
+from snippets.search import ExcerptField
 
 
-class SnippetSerializer(serializers.HyperlinkedModelSerializer):
+def _schedule_on_commit(snippets):
+    if snippets:
+        transaction.on_commit(lambda: [highlighting.schedule(snippet) for snippet in snippets])
+
+
+class SnippetBulkSerializer(serializers.ListSerializer):
+    """
+    Creates and updates lists of snippets with a constant number of queries,
+    highlighting them as a single batch.
+    """
+
+    def create(self, validated_data):
+        snippets = [Snippet(**attrs) for attrs in validated_data]
+        pending = Snippet.update_highlighted(snippets)
+        with transaction.atomic():
+            snippets = Snippet.objects.bulk_create(snippets)
+            _schedule_on_commit(pending)
+        return snippets
+
+    def update(self, instances, validated_data):
+        fields = {'highlighted', 'highlight_key', 'highlight_status'}
+        for instance, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+            fields.update(attrs)
+        pending = Snippet.update_highlighted(instances)
+        with transaction.atomic():
+            Snippet.objects.bulk_update(instances, fields)
+            _schedule_on_commit(pending)
+        return instances
+
+
+class SnippetSerializer(CachedHyperlinkedModelSerializer):
+    owner = serializers.ReadOnlyField(source='owner.username')
+    highlight = CachedHyperlinkedIdentityField(view_name='snippet-highlight', format='html')
+
+    class Meta:
+        model = Snippet
+        fields = ['url', 'id', 'title', 'code', 'linenos', 'language', 'style', 'highlight', 'highlight_status',
+                  'owner', ]
+        list_serializer_class = SnippetBulkSerializer
+
+
+class SnippetListSerializer(CachedHyperlinkedModelSerializer):
+    """
+    Compact representation of snippets for lists, without the code itself.
+
+    `code_size` and `code_preview` are annotated on the queryset, so that the
+    code column is never loaded. Search results also get their rank and an
+    excerpt around the matches.
+    """
     owner = serializers.ReadOnlyField(source='owner.username')
-    highlight = serializers.HyperlinkedIdentityField(view_name='snippet-highlight', format='html')
+    code_size = serializers.IntegerField(read_only=True)
+    code_preview = serializers.CharField(read_only=True)
+    search_rank = serializers.FloatField(read_only=True)
+    search_excerpt = ExcerptField()
 
     class Meta:
         model = Snippet
-        fields = ['url', 'id', 'title', 'code', 'linenos', 'language', 'style', 'highlight', 'owner', ]
+        fields = ['url', 'id', 'title', 'language', 'owner', 'created', 'code_size', 'code_preview',
+                  'search_rank', 'search_excerpt']
 
 
-class UserSerializer(serializers.HyperlinkedModelSerializer):
-    snippets = serializers.HyperlinkedRelatedField(many=True, view_name='snippet-detail', read_only=True)
+class UserSerializer(CachedHyperlinkedModelSerializer):
+    snippets = CachedHyperlinkedRelatedField(many=True, view_name='snippet-detail', read_only=True)
 
     class Meta:
         model = User
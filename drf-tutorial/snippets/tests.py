@@ -1,3 +1,777 @@
-from django.test import TestCase
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import closing
+from io import StringIO
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, models
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import relations, serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from snippets import highlighting
+from snippets.compiled import compile_serializer
+from snippets.models import Snippet
+from snippets.permissions import IsOwnerOrReadOnly
+from snippets.replicas import PIN_COOKIE, replicate
+from snippets.serializers import SnippetListSerializer, SnippetSerializer, UserSerializer
+
+
+class ChoicesTests(SimpleTestCase):
+    def test_system_checks_leave_the_choices_unevaluated(self):
+        for name in ('language', 'style'):
+            field = Snippet._meta.get_field(name)
+            with mock.patch.object(field.choices, 'func') as func:
+                self.assertEqual(field.check(), [])
+            func.assert_not_called()
+
+    def test_choices_pass_the_field_checks(self):
+        for name in ('language', 'style'):
+            field = Snippet._meta.get_field(name)
+            self.assertEqual(models.CharField._check_choices(field), [])
+
+
+class HighlightCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+
+    def test_unrelated_change_does_not_rehighlight(self):
+        snippet = Snippet.objects.create(owner=self.owner, code='print(1)')
+        other_owner = User.objects.create_user('other', password='password')
+        with mock.patch.object(Snippet, 'render_highlighted') as render:
+            snippet.owner = other_owner
+            snippet.save()
+            Snippet.objects.get(pk=snippet.pk).save()
+        render.assert_not_called()
+
+    def test_highlighted_change_rehighlights(self):
+        snippet = Snippet.objects.create(owner=self.owner, code='print(1)')
+        snippet.code = 'print(2)'
+        snippet.save(update_fields=['code'])
+        snippet.refresh_from_db()
+        self.assertIn('2', snippet.highlighted)
+
+    def test_style_and_title_do_not_rehighlight(self):
+        snippet = Snippet.objects.create(owner=self.owner, code='print(1)')
+        with mock.patch.object(Snippet, 'render_highlighted') as render:
+            snippet.title = 'Hello'
+            snippet.style = 'monokai'
+            snippet.save()
+        render.assert_not_called()
+
+    def test_identical_content_reuses_output(self):
+        first = Snippet.objects.create(owner=self.owner, code='print(1)', title='First')
+        with mock.patch.object(Snippet, 'render_highlighted') as render:
+            second = Snippet.objects.create(owner=self.owner, code='print(1)', title='Second', style='vim')
+        render.assert_not_called()
+        self.assertEqual(second.highlighted, first.highlighted)
+
+
+@override_settings(SNIPPETS_DEFERRED_HIGHLIGHT=True)
+class DeferredHighlightTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+
+    def test_create_does_not_highlight_inline(self):
+        self.client.force_login(self.owner)
+        with mock.patch.object(highlighting, 'schedule') as schedule, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('snippet-list'), {'code': 'print(1)'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['highlight_status'], 'pending')
+        snippet = Snippet.objects.get()
+        self.assertEqual(snippet.highlighted, '')
+        schedule.assert_called_once_with(snippet)
+
+    def test_highlight_is_accepted_while_pending(self):
+        with mock.patch.object(highlighting, 'schedule'):
+            snippet = Snippet.objects.create(owner=self.owner, code='print(1)')
+        response = self.client.get(reverse('snippet-highlight', args=[snippet.pk]))
+        self.assertEqual(response.status_code, 202)
+
+    def test_highlight_reports_failed_snippet(self):
+        with mock.patch.object(highlighting, 'schedule'):
+            snippet = Snippet.objects.create(owner=self.owner, code='print(1)')
+        Snippet.objects.filter(pk=snippet.pk).update(highlight_status=Snippet.HighlightStatus.FAILED)
+        with mock.patch.object(highlighting, 'render') as render, CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('snippet-highlight', args=[snippet.pk]))
+        self.assertEqual(response.status_code, 503)
+        render.assert_not_called()
+        self.assertFalse([query for query in queries if not query['sql'].startswith('SELECT')])
+        snippet.refresh_from_db()
+        self.assertEqual(snippet.highlight_status, Snippet.HighlightStatus.FAILED)
+
+    def test_highlight_pending_renders_lost_snippets(self):
+        with mock.patch.object(highlighting, 'schedule'):
+            snippet = Snippet.objects.create(owner=self.owner, code='print(1)')
+        out = StringIO()
+        call_command('highlight_pending', stdout=out)
+        self.assertIn("Highlighted 1 pending snippet(s).", out.getvalue())
+        snippet.refresh_from_db()
+        self.assertEqual(snippet.highlight_status, Snippet.HighlightStatus.READY)
+        self.assertIn('<div class="highlight">', snippet.highlighted)
+
+    def test_highlight_pending_retries_failed_snippets_one_by_one(self):
+        with mock.patch.object(highlighting, 'schedule'):
+            broken = Snippet.objects.create(owner=self.owner, code='print(1)', language='python')
+            failed = Snippet.objects.create(owner=self.owner, code='print(2)')
+        Snippet.objects.filter(pk=broken.pk).update(language='no-such-language')
+        Snippet.objects.filter(pk=failed.pk).update(highlight_status=Snippet.HighlightStatus.FAILED)
+        out = StringIO()
+        call_command('highlight_pending', stdout=out)
+        self.assertIn("Highlighted 1 pending snippet(s).", out.getvalue())
+        broken.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertEqual(broken.highlight_status, Snippet.HighlightStatus.FAILED)
+        self.assertEqual(failed.highlight_status, Snippet.HighlightStatus.READY)
+        self.assertIn('<div class="highlight">', failed.highlighted)
+
+
+@override_settings(SNIPPETS_DEFERRED_HIGHLIGHT=True, SNIPPETS_HIGHLIGHT_WORKERS=1)
+class ProcessPoolHighlightTests(TransactionTestCase):
+    def test_callback_closes_its_connection(self):
+        owner = User.objects.create_user('owner', password='password')
+        with mock.patch.object(highlighting, 'schedule'):
+            snippet = Snippet.objects.create(owner=owner, code='print(1)')
+        future = Future()
+        future.set_result('<div class="highlight"></div>')
+
+        def callback():
+            # In-memory test databases are never actually closed.
+            with mock.patch.object(connection, 'close', wraps=connection.close) as close:
+                highlighting._store_result(snippet.pk, snippet.highlight_key, future)
+            closed.append(close.called)
+
+        closed = []
+        thread = threading.Thread(target=callback)
+        thread.start()
+        thread.join()
+        self.assertEqual(closed, [True])
+        snippet.refresh_from_db()
+        self.assertEqual(snippet.highlight_status, Snippet.HighlightStatus.READY)
+
+    def test_worker_fills_in_highlighted(self):
+        owner = User.objects.create_user('owner', password='password')
+        snippet = Snippet.objects.create(owner=owner, code='print(1)', title='Pooled')
+        for _ in range(100):
+            snippet.refresh_from_db()
+            if snippet.highlight_status != Snippet.HighlightStatus.PENDING:
+                break
+            time.sleep(0.1)
+        self.assertEqual(snippet.highlight_status, Snippet.HighlightStatus.READY)
+        self.assertIn('<div class="highlight">', snippet.highlighted)
+
+
+class HighlightPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='password')
+        cls.snippet = Snippet.objects.create(owner=owner, code='print(1)', title='<Title>', style='monokai')
+
+    def test_stored_output_is_a_fragment(self):
+        self.assertTrue(self.snippet.highlighted.startswith('<div class="highlight">'))
+        self.assertNotIn('<style', self.snippet.highlighted)
+
+    def test_highlight_assembles_page(self):
+        response = self.client.get(reverse('snippet-highlight', args=[self.snippet.pk]))
+        content = response.content.decode()
+        self.assertIn('<title>&lt;Title&gt;</title>', content)
+        self.assertIn(reverse('snippet-stylesheet', args=['monokai']), content)
+        self.assertIn(self.snippet.highlighted, content)
+
+    def test_stylesheet_is_cacheable(self):
+        response = self.client.get(reverse('snippet-stylesheet', args=['monokai']))
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('.highlight', response.content.decode())
+
+    def test_unknown_stylesheet(self):
+        response = self.client.get(reverse('snippet-stylesheet', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Every endpoint of the snippets router must stay within a fixed number of
+    queries, whatever the number of users and snippets it returns.
+    """
+    extra_queries = 0
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(f'user{i}', password='password') for i in range(5)]
+        for user in cls.users:
+            for i in range(4):
+                Snippet.objects.create(owner=user, code=f'print({i})', title=f'{user.username} {i}')
+        cls.user = cls.users[0]
+        cls.snippet = cls.user.snippets.first()
+
+    def assertQueryBudget(self, budget, method, url, data=None, status_code=200):
+        budget += self.extra_queries
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, content_type='application/json')
+        self.assertEqual(response.status_code, status_code)
+        self.assertLessEqual(
+            len(queries), budget,
+            "%s %s ran %d queries, over its budget of %d:\n%s" % (
+                method.upper(), url, len(queries), budget,
+                "\n".join(query["sql"] for query in queries.captured_queries),
+            ),
+        )
+        return response
+
+    def test_api_root(self):
+        self.assertQueryBudget(0, 'get', reverse('api-root'))
+
+    def test_snippet_list(self):
+        self.assertQueryBudget(1, 'get', reverse('snippet-list'))
+
+    def test_snippet_detail(self):
+        self.assertQueryBudget(1, 'get', reverse('snippet-detail', args=[self.snippet.pk]))
+
+    def test_snippet_highlight(self):
+        self.assertQueryBudget(1, 'get', reverse('snippet-highlight', args=[self.snippet.pk]))
+
+    def test_user_list(self):
+        response = self.assertQueryBudget(2, 'get', reverse('user-list'))
+        self.assertEqual(len(response.data['results'][0]['snippets']), 4)
+
+    def test_snippet_list_next_page(self):
+        response = self.client.get(reverse('snippet-list'), {'page_size': 3})
+        self.assertQueryBudget(1, 'get', response.data['next'])
+
+    def test_user_detail(self):
+        self.assertQueryBudget(2, 'get', reverse('user-detail', args=[self.user.pk]))
+
+
+class AuthenticatedQueryBudgetTests(QueryBudgetTests):
+    # One more query is spent loading the user, which is only cached outside
+    # of transactions. Sessions are stored in signed cookies.
+    extra_queries = 1
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_snippet_create(self):
+        self.assertQueryBudget(2, 'post', reverse('snippet-list'), {'code': 'print(1)'}, status_code=201)
+
+    def test_snippet_update(self):
+        self.assertQueryBudget(3, 'put', reverse('snippet-detail', args=[self.snippet.pk]), {'code': 'print(2)'})
+
+    def test_snippet_partial_update(self):
+        self.assertQueryBudget(2, 'patch', reverse('snippet-detail', args=[self.snippet.pk]), {'title': 'New'})
+
+    def test_snippet_destroy(self):
+        self.assertQueryBudget(2, 'delete', reverse('snippet-detail', args=[self.snippet.pk]), status_code=204)
+
+
+# The users are only cached in a cache shared by every worker.
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='snippets-cache-'),
+    }
+})
+class CachedAuthenticationTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user('owner', password='password')
+        self.token = Token.objects.create(user=self.user)
+        self.snippet = Snippet.objects.create(owner=self.user, code='print(1)')
+        self.url = reverse('snippet-detail', args=[self.snippet.pk])
+
+    def patch(self, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, {'title': 'New'}, content_type='application/json', headers=headers)
+        return response, len(queries)
+
+    def test_token_requests_load_the_user_once(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        self.assertEqual(self.patch(**headers)[1], 4)
+        response, queries = self.patch(**headers)
+        self.assertEqual(response.status_code, 200)
+        # The snippet, and its UPDATE in a transaction.
+        self.assertEqual(queries, 2)
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertNotIn('csrftoken', response.cookies)
+
+    def test_session_requests_load_the_user_once(self):
+        self.client.force_login(self.user)
+        self.patch()
+        response, queries = self.patch()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, 2)
+
+    def test_changed_users_and_tokens_are_reloaded(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        self.patch(**headers)
+        self.user.is_active = False
+        self.user.save()
+        # Authentication failures are 403 responses, as the session comes first.
+        self.assertEqual(self.patch(**headers)[0].status_code, 403)
+        self.user.is_active = True
+        self.user.save()
+        self.token.delete()
+        self.assertEqual(self.patch(**headers)[0].status_code, 403)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_caches_are_not_used(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        first = self.patch(**headers)[1]
+        self.assertEqual(self.patch(**headers)[1], first)
+
+    def test_login_keeps_its_session_with_an_authorization_header(self):
+        # Only REST framework views skip the session.
+        headers = {'Authorization': f'Token {self.token.key}'}
+        data = {'username': self.user.username, 'password': 'password'}
+        response = self.client.post(reverse('rest_framework:login'), data, headers=headers)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('sessionid', response.cookies)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='password')
+        for i in range(25):
+            Snippet.objects.create(owner=owner, code=f'print({i})')
+
+    def test_pages_cover_every_snippet_once(self):
+        url, ids = reverse('snippet-list'), []
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            ids += [snippet['id'] for snippet in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(ids, list(Snippet.objects.values_list('id', flat=True)))
+
+    def test_page_size_is_bounded(self):
+        response = self.client.get(reverse('snippet-list'), {'page_size': 5})
+        self.assertEqual(len(response.data['results']), 5)
+        with mock.patch('snippets.pagination.SnippetCursorPagination.max_page_size', 7):
+            response = self.client.get(reverse('snippet-list'), {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 7)
+
+
+class SnippetListRepresentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='password')
+        cls.snippet = Snippet.objects.create(owner=owner, title='Long', code='x = 1\n' * 100)
+
+    def test_list_omits_code(self):
+        response = self.client.get(reverse('snippet-list'))
+        item = response.data['results'][0]
+        self.assertNotIn('code', item)
+        self.assertEqual(item['owner'], 'owner')
+        self.assertEqual(item['code_size'], 600)
+        self.assertEqual(item['code_preview'], self.snippet.code[:200])
+
+    def test_list_does_not_load_code(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('snippet-list'))
+        select = queries.captured_queries[0]['sql']
+        self.assertNotIn(', "snippets_snippet"."code",', select)
+        self.assertNotIn('"snippets_snippet"."highlighted"', select)
+
+    def test_retrieve_returns_code(self):
+        response = self.client.get(reverse('snippet-detail', args=[self.snippet.pk]))
+        self.assertEqual(response.data['code'], self.snippet.code)
+
+
+class StreamingExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        for i in range(12):
+            Snippet.objects.create(owner=cls.owner, code=f'print({i})', title=f'Snippet {i}')
+
+    def test_export_streams_json_array(self):
+        response = self.client.get(reverse('snippet-export'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        snippets = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([snippet['title'] for snippet in snippets], [f'Snippet {i}' for i in range(12)])
+        detail = self.client.get(reverse('snippet-detail', args=[snippets[0]['id']]))
+        self.assertEqual(snippets[0], json.loads(detail.content))
+
+    def test_export_streams_ndjson(self):
+        response = self.client.get(reverse('snippet-export'), {'export_format': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 12)
+        self.assertEqual(json.loads(lines[0])['code'], 'print(0)')
+
+    def test_export_uses_a_single_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('snippet-export'))
+            b''.join(response.streaming_content)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"snippets_snippet"."highlighted"', queries.captured_queries[0]['sql'])
+
+    def test_user_export(self):
+        response = self.client.get(reverse('user-export'), {'export_format': 'ndjson'})
+        user = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(user['username'], 'owner')
+        self.assertEqual(len(user['snippets']), 12)
+
+    def test_unknown_export_format(self):
+        response = self.client.get(reverse('snippet-export'), {'export_format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BulkSnippetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.other = User.objects.create_user('other', password='password')
+        cls.snippets = [Snippet.objects.create(owner=cls.owner, code=f'print({i})') for i in range(3)]
+        cls.foreign = Snippet.objects.create(owner=cls.other, code='print("other")')
+
+    def setUp(self):
+        self.client.force_login(self.owner)
+
+    def bulk(self, method, data):
+        return getattr(self.client, method)(reverse('snippet-bulk'), data, content_type='application/json')
+
+    def test_bulk_create(self):
+        payload = [{'code': f'x = {i}', 'title': f'Bulk {i}'} for i in range(30)] + [{'code': 'x = 0'}]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk('post', payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 31)
+        # User, stored output lookup, and a single INSERT.
+        self.assertEqual(len(queries), 5)
+        created = Snippet.objects.filter(title__startswith='Bulk')
+        self.assertEqual(created.count(), 30)
+        self.assertTrue(all(snippet.owner_id == self.owner.pk for snippet in created))
+        self.assertTrue(all('<div class="highlight">' in snippet.highlighted for snippet in created))
+
+    def test_bulk_create_renders_each_fragment_once(self):
+        payload = [{'code': 'same'}] * 5 + [{'code': 'print(0)'}]
+        with mock.patch.object(Snippet, 'render_highlighted', return_value='<div></div>') as render:
+            response = self.bulk('post', payload)
+        self.assertEqual(response.status_code, 201)
+        render.assert_called_once()
+
+    def test_bulk_create_reports_errors_per_item(self):
+        response = self.bulk('post', [{'code': 'x = 1'}, {'title': 'No code'}, {'code': 'x', 'language': 'nope'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {1, 2})
+        self.assertIn('code', response.data[1])
+        self.assertIn('language', response.data[2])
+        self.assertEqual(Snippet.objects.count(), 4)
+
+    def test_bulk_create_requires_authentication(self):
+        self.client.logout()
+        self.assertEqual(self.bulk('post', [{'code': 'x = 1'}]).status_code, 403)
+
+    def test_bulk_partial_update(self):
+        payload = [{'id': snippet.pk, 'title': f'Renamed {snippet.pk}'} for snippet in self.snippets]
+        payload[0]['code'] = 'print("changed")'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk('patch', payload)
+        self.assertEqual(response.status_code, 200)
+        # User, snippets, stored output lookup, and a single UPDATE.
+        self.assertLessEqual(len(queries), 6)
+        first = Snippet.objects.get(pk=self.snippets[0].pk)
+        self.assertEqual(first.title, f'Renamed {first.pk}')
+        self.assertIn('changed', first.highlighted)
+        self.assertEqual(response.data[1]['title'], f'Renamed {self.snippets[1].pk}')
+
+    def test_bulk_partial_update_checks_ownership(self):
+        payload = [{'id': self.snippets[0].pk, 'title': 'Mine'}, {'id': self.foreign.pk, 'title': 'Theirs'}]
+        response = self.bulk('patch', payload)
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Snippet.objects.filter(title__in=['Mine', 'Theirs']).exists())
+
+    def test_bulk_partial_update_reports_invalid_ids(self):
+        pk = self.snippets[0].pk
+        response = self.bulk('patch', [{'id': pk}, {'id': pk}, {'title': 'No id'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'1': {'id': ['Duplicate id.']}, '2': {'id': ['A valid integer is required.']}})
+        response = self.bulk('patch', [{'id': pk}, {'id': 0}])
+        self.assertEqual(response.json(), {'1': ['Not found.']})
+
+    def test_bulk_destroy(self):
+        ids = [snippet.pk for snippet in self.snippets[:2]]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk('delete', ids)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(len(queries), 3)
+        self.assertFalse(Snippet.objects.filter(pk__in=ids).exists())
+
+    def test_bulk_destroy_checks_ownership(self):
+        response = self.bulk('delete', [self.snippets[0].pk, self.foreign.pk])
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Snippet.objects.count(), 4)
+
+    def test_bulk_reports_missing_ids_before_ownership(self):
+        response = self.bulk('patch', [{'id': self.foreign.pk}, {'id': 0}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'1': ['Not found.']})
+
+    def test_bulk_ownership_is_checked_in_sql(self):
+        ids = [snippet.pk for snippet in self.snippets] + [self.foreign.pk]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk('delete', ids)
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('"owner_id" = %s' % self.owner.pk, queries[-2]['sql'])
+
+
+class OwnerPermissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        cls.snippet = Snippet.objects.create(owner=cls.owner, code='print(1)')
+
+    def check(self, django_request, snippet, user):
+        request = Request(django_request)
+        request.user = user
+        return IsOwnerOrReadOnly().has_object_permission(request, None, snippet)
+
+    def test_owner_is_not_loaded(self):
+        snippet = Snippet.objects.only('pk', 'owner').get()
+        with self.assertNumQueries(0):
+            self.assertTrue(self.check(APIRequestFactory().patch('/snippets/'), snippet, self.owner))
+            self.assertFalse(self.check(APIRequestFactory().patch('/snippets/'), snippet, User(pk=0)))
+
+    def test_decisions_are_cached_per_request(self):
+        django_request = APIRequestFactory().delete('/snippets/')
+        self.assertTrue(self.check(django_request, self.snippet, self.owner))
+        # The owner changed, but requests wrapping the same Django request,
+        # such as the clones of the browsable API, reuse the decision.
+        changed = Snippet(pk=self.snippet.pk, owner_id=0)
+        self.assertTrue(self.check(django_request, changed, self.owner))
+        self.assertFalse(self.check(APIRequestFactory().delete('/snippets/'), changed, self.owner))
+
+
+class SnippetSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='password')
+        cls.title_match = Snippet.objects.create(owner=owner, title='Fibonacci', code='def f(n): pass')
+        cls.code_match = Snippet.objects.create(
+            owner=owner, title='Sequence', code='# <b>fibonacci</b> numbers\ndef fib(n): pass',
+        )
+        for i in range(5):
+            Snippet.objects.create(owner=owner, title=f'Other {i}', code=f'fibonacci_{i} = {i}')
+        Snippet.objects.create(owner=owner, title='Unrelated', code='print(1)')
+
+    def test_results_are_ranked_with_excerpts(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('snippet-list'), {'search': 'fibonacci'})
+        self.assertEqual(len(queries), 1)
+        results = response.data['results']
+        self.assertEqual(len(results), 7)
+        self.assertEqual(results[0]['id'], self.title_match.pk)
+        self.assertEqual([result['search_rank'] for result in results],
+                         sorted(result['search_rank'] for result in results))
+        excerpt = next(result['search_excerpt'] for result in results if result['id'] == self.code_match.pk)
+        self.assertIn('&lt;b&gt;<mark>fibonacci</mark>&lt;/b&gt;', excerpt)
+
+    def test_prefix_and_identifiers(self):
+        response = self.client.get(reverse('snippet-list'), {'search': 'fibonacci_3'})
+        self.assertEqual([result['title'] for result in response.data['results']], ['Other 3'])
+        response = self.client.get(reverse('snippet-list'), {'search': 'seq'})
+        self.assertEqual([result['id'] for result in response.data['results']], [self.code_match.pk])
+
+    def test_ranked_pages_cover_every_match_once(self):
+        url, ids = reverse('snippet-list') + '?search=fibonacci&page_size=2', []
+        while url:
+            response = self.client.get(url)
+            ids += [result['id'] for result in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(len(ids), 7)
+        self.assertEqual(len(set(ids)), 7)
+        self.assertEqual(ids[0], self.title_match.pk)
+
+    def test_without_search(self):
+        response = self.client.get(reverse('snippet-list'), {'search': '"*'})
+        self.assertEqual(len(response.data['results']), 8)
+        self.assertNotIn('search_rank', response.data['results'][0])
+
+    def test_index_follows_bulk_changes(self):
+        Snippet.objects.filter(pk=self.title_match.pk).update(title='Renamed')
+        response = self.client.get(reverse('snippet-list'), {'search': 'renamed'})
+        self.assertEqual([result['id'] for result in response.data['results']], [self.title_match.pk])
+        Snippet.objects.filter(title='Unrelated').delete()
+        self.assertEqual(self.client.get(reverse('snippet-list'), {'search': 'print'}).data['results'], [])
+
+
+class CompiledSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='password')
+        User.objects.create_user('idle', password='password')
+        for i in range(7):
+            Snippet.objects.create(owner=cls.owner, title=f'Snippet "{i}" <é>', code=f'print({i})  # fibonacci',
+                                   linenos=bool(i % 2), language='python3' if i % 3 else 'python')
+
+    def get_content(self, url, data=None):
+        response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def assertSameContent(self, url, data=None):
+        compiled = self.get_content(url, data)
+        with mock.patch('snippets.compiled.compile_serializer', return_value=None), \
+                mock.patch('snippets.streaming.compile_serializer', return_value=None):
+            self.assertEqual(compiled, self.get_content(url, data))
+
+    def test_serializers_are_compiled(self):
+        for serializer_class in [SnippetSerializer, SnippetListSerializer, UserSerializer]:
+            self.assertIsNotNone(compile_serializer(serializer_class), serializer_class)
+
+    def test_unsupported_fields_are_not_compiled(self):
+        class MethodSerializer(serializers.HyperlinkedModelSerializer):
+            size = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Snippet
+                fields = ['url', 'size']
+
+        self.assertIsNone(compile_serializer(MethodSerializer))
+
+    def test_lists_are_byte_identical(self):
+        self.assertSameContent(reverse('snippet-list'))
+        self.assertSameContent(reverse('snippet-list'), {'page_size': 3, 'format': 'json'})
+        self.assertSameContent(reverse('snippet-list', kwargs={'format': 'json'}))
+        self.assertSameContent(reverse('snippet-list'), {'search': 'fibonacci', 'page_size': 3})
+        self.assertSameContent(reverse('user-list'))
+        self.assertSameContent(reverse('user-list', kwargs={'format': 'json'}), {'page_size': 1})
+
+    def test_next_pages_are_byte_identical(self):
+        for data in [{'page_size': 3}, {'page_size': 3, 'search': 'fibonacci'}]:
+            url = reverse('snippet-list') + '?' + urlencode(data)
+            while url:
+                self.assertSameContent(url)
+                url = self.client.get(url).data['next']
+
+    def test_exports_are_byte_identical(self):
+        self.assertSameContent(reverse('snippet-export'))
+        self.assertSameContent(reverse('snippet-export', kwargs={'format': 'json'}), {'export_format': 'ndjson'})
+        self.assertSameContent(reverse('user-export'))
+
+
+class CachedHyperlinkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name in ['owner', 'other']:
+            owner = User.objects.create_user(name, password='password')
+            for i in range(3):
+                Snippet.objects.create(owner=owner, code=f'print({i})')
+
+    def test_same_hyperlinks_as_the_drf_fields(self):
+        class PlainUserSerializer(serializers.HyperlinkedModelSerializer):
+            snippets = serializers.HyperlinkedRelatedField(many=True, view_name='snippet-detail', read_only=True)
+
+            class Meta:
+                model = User
+                fields = ['url', 'id', 'username', 'snippets']
+
+        class PlainSnippetSerializer(serializers.HyperlinkedModelSerializer):
+            highlight = serializers.HyperlinkedIdentityField(view_name='snippet-highlight', format='html')
+
+            class Meta:
+                model = Snippet
+                fields = ['url', 'highlight']
+
+        users, snippets = User.objects.all(), Snippet.objects.all()
+        for path, format in [('/users/', None), ('/users/?format=json', None), ('/users.json', 'json')]:
+            context = {'request': Request(APIRequestFactory().get(path)), 'format': format}
+            self.assertEqual(UserSerializer(users, many=True, context=context).data,
+                             PlainUserSerializer(users, many=True, context=context).data)
+            self.assertEqual(
+                [{'url': data['url'], 'highlight': data['highlight']}
+                 for data in SnippetSerializer(snippets, many=True, context=context).data],
+                PlainSnippetSerializer(snippets, many=True, context=context).data,
+            )
+
+    def test_urls_are_reversed_once_per_field(self):
+        context = {'request': Request(APIRequestFactory().get('/users/'))}
+        with mock.patch.object(relations, 'reverse', wraps=relations.reverse) as reverse:
+            data = UserSerializer(User.objects.all(), many=True, context=context).data
+        self.assertEqual(len(data[1]['snippets']), 3)
+        self.assertEqual(reverse.call_count, 2)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('owner', password='password')
+        cls.snippet = Snippet.objects.create(owner=cls.user, code='print(1)')
+
+    def setUp(self):
+        # The test replica is a second connection to the in-memory test database,
+        # and has to see the data of the test transaction without waiting on it.
+        with connections['replica'].cursor() as cursor:
+            cursor.execute('PRAGMA read_uncommitted = 1')
+
+    def get_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url, data, content_type='application/json')
+        return response, len(primary), len(replica)
+
+    def test_list_and_retrieve_use_the_replica(self):
+        for url in [reverse('snippet-list'), reverse('snippet-detail', args=[self.snippet.pk]),
+                    reverse('user-list'), reverse('user-detail', args=[self.user.pk])]:
+            response, primary, replica = self.get_queries('get', url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(primary, 0, url)
+            self.assertGreater(replica, 0, url)
+
+    def test_other_actions_use_the_primary(self):
+        response, primary, replica = self.get_queries('get', reverse('snippet-highlight', args=[self.snippet.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        self.client.force_login(self.user)
+        url = reverse('snippet-detail', args=[self.snippet.pk])
+        response, primary, replica = self.get_queries('patch', url, {'title': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(replica, 0)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 10)
+        response, primary, replica = self.get_queries('get', url)
+        self.assertEqual(response.data['title'], 'Renamed')
+        self.assertEqual(replica, 0)
+
+        self.client.cookies.pop(PIN_COOKIE)
+        response, primary, replica = self.get_queries('get', url)
+        self.assertEqual(primary, 0)
+
+    def test_replicate_copies_committed_data(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary, replica = f'{directory}/primary.sqlite3', f'{directory}/replica.sqlite3'
+            with closing(sqlite3.connect(primary)) as source:
+                source.execute('CREATE TABLE snippet (title TEXT)')
+                source.execute("INSERT INTO snippet VALUES ('Replicated')")
+                source.commit()
+            with mock.patch.dict(connections['default'].settings_dict, NAME=primary), \
+                    mock.patch.dict(connections['replica'].settings_dict, NAME=replica):
+                self.assertEqual(replicate(), ['replica'])
+            with closing(sqlite3.connect(replica)) as target:
+                rows = target.execute('SELECT title FROM snippet').fetchall()
+        self.assertEqual(rows, [('Replicated',)])
@@ -10,5 +10,6 @@ router.register(r'users', views.UserViewSet, basename='user')
 
 # The API URLs are now determined automatically by the router.
 urlpatterns = [
+    path('snippets/styles/<str:style>.css', views.snippet_stylesheet, name='snippet-stylesheet'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,37 +1,200 @@
 from django.contrib.auth.models import User
-from rest_framework import permissions, renderers, viewsets
+from django.db.models import Prefetch
+from django.db.models.functions import Length, Substr
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_safe
+from pygments.util import ClassNotFound
+from rest_framework import permissions, renderers, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
+from snippets import highlighting
+from snippets.compiled import CompiledListMixin
 from snippets.models import Snippet
+from snippets.pagination import SnippetCursorPagination, UserCursorPagination
 from snippets.permissions import IsOwnerOrReadOnly
-from snippets.serializers import SnippetSerializer, UserSerializer
+from snippets.replicas import ReplicaReadMixin
+from snippets.search import SnippetSearchFilter
+from snippets.serializers import SnippetListSerializer, SnippetSerializer, UserSerializer
+from snippets.streaming import streaming_export
 
+CODE_PREVIEW_LENGTH = 200
 
-class SnippetViewSet(viewsets.ModelViewSet):
+BULK_MAX_SIZE = 1000
+
+HIGHLIGHT_PENDING_HTML = '<!DOCTYPE html><html><body><p>Highlighting in progress.</p></body></html>'
+HIGHLIGHT_FAILED_HTML = '<!DOCTYPE html><html><body><p>Highlighting failed.</p></body></html>'
+
+
+def parse_bulk_ids(items, key=None):
+    """
+    Returns the ids of a bulk payload, read from `key` of each item when given,
+    raising the errors of each invalid item by index.
+    """
+    if not isinstance(items, list) or not items:
+        raise ValidationError({'non_field_errors': ['Expected a non-empty list of items.']})
+    if len(items) > BULK_MAX_SIZE:
+        raise ValidationError({'non_field_errors': [f'Ensure this list has at most {BULK_MAX_SIZE} items.']})
+
+    ids, errors = [], {}
+    for index, item in enumerate(items):
+        if key is not None:
+            item = item.get(key) if isinstance(item, dict) else None
+        if not isinstance(item, int) or isinstance(item, bool):
+            error = 'A valid integer is required.'
+        elif item in ids:
+            error = 'Duplicate id.'
+        else:
+            ids.append(item)
+            continue
+        errors[index] = {key: [error]} if key is not None else [error]
+    if errors:
+        raise ValidationError(errors)
+    return ids
+
+
+class SnippetViewSet(ReplicaReadMixin, CompiledListMixin, viewsets.ModelViewSet):
     """
     This ViewSet automatically provides `list`, `create`, `retrieve`,
     `update` and `destroy` actions.
 
-    Additionally we also provide an extra `highlight` action.
+    Additionally we also provide an extra `highlight` action, which wraps the
+    stored fragment in a page linking to the shared stylesheet of the snippet's
+    style, and answers 202 Accepted with a placeholder while the snippet is
+    being highlighted, and an `export` action streaming every snippet.
+
+    `?search=` restricts the snippets to those whose title or code match, best
+    matches first.
+
+    `snippets/bulk/` creates (POST), partially updates (PATCH) or deletes
+    (DELETE) a list of snippets at once, with a constant number of queries.
+    Either every item succeeds or none does, and errors are keyed by item index.
     """
-    queryset = Snippet.objects.all()
+    queryset = Snippet.objects.select_related('owner')
     serializer_class = SnippetSerializer
+    pagination_class = SnippetCursorPagination
+    filter_backends = [SnippetSearchFilter]
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,
                           IsOwnerOrReadOnly]
 
+    def get_queryset(self):
+        """
+        Only load the highlighted output for the `highlight` action, and only
+        the code for the others. Lists load neither, but get the code size and
+        a short preview computed by the database.
+        """
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            return queryset.only('id', 'title', 'language', 'created', 'owner__username').annotate(
+                code_size=Length('code'),
+                code_preview=Substr('code', 1, CODE_PREVIEW_LENGTH),
+            )
+        if self.action == 'highlight':
+            return queryset.defer('code')
+        if self.action == 'bulk_partial_update':
+            # Every highlight field is written back by bulk_update().
+            return queryset
+        return queryset.defer('highlighted')
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return SnippetListSerializer
+        return super().get_serializer_class()
+
     @action(detail=True, renderer_classes=[renderers.StaticHTMLRenderer])
     def highlight(self, request, *args, **kwargs):
         snippet = self.get_object()
-        return Response(snippet.highlighted)
+        if snippet.highlight_status == Snippet.HighlightStatus.PENDING:
+            return Response(HIGHLIGHT_PENDING_HTML, status=status.HTTP_202_ACCEPTED,
+                            headers={'Retry-After': '1'})
+        if snippet.highlight_status == Snippet.HighlightStatus.FAILED:
+            # Failed snippets are rendered again by the highlight_pending command.
+            return Response(HIGHLIGHT_FAILED_HTML, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        stylesheet_url = reverse('snippet-stylesheet', args=[snippet.style])
+        return Response(highlighting.render_page(snippet.highlighted, snippet.title, stylesheet_url))
+
+    @action(detail=False)
+    def export(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_export(request, SnippetSerializer, queryset, self.get_serializer_context())
+
+    def get_bulk_objects(self, ids):
+        """
+        Fetches the snippets with the given ids in a single query, in the same
+        order. Only the snippets of the user are fetched, and the other ids are
+        looked up again to tell snippets that do not exist from those the user
+        may not write to.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        snippets = IsOwnerOrReadOnly().filter_queryset(self.request, queryset, self).in_bulk(ids)
+        if len(snippets) < len(ids):
+            existing = set(queryset.filter(pk__in=ids).values_list('pk', flat=True))
+            missing = {index: ['Not found.'] for index, pk in enumerate(ids) if pk not in existing}
+            if missing:
+                raise ValidationError(missing)
+            self.permission_denied(self.request)
+        return [snippets[pk] for pk in ids]
+
+    @action(detail=False, methods=['post'], url_path='bulk', url_name='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data, many=True, max_length=BULK_MAX_SIZE)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(owner=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_partial_update(self, request, *args, **kwargs):
+        snippets = self.get_bulk_objects(parse_bulk_ids(request.data, key='id'))
+        serializer = self.get_serializer(snippets, data=request.data, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    @bulk_create.mapping.delete
+    def bulk_destroy(self, request, *args, **kwargs):
+        ids = [snippet.pk for snippet in self.get_bulk_objects(parse_bulk_ids(request.data))]
+        Snippet.objects.filter(pk__in=ids).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(ReplicaReadMixin, CompiledListMixin, viewsets.ReadOnlyModelViewSet):
     """
     This viewset automatically provides `list` and `retrieve` actions.
+
+    The snippets of every listed user are fetched in a single query, loading
+    only what their hyperlinks need.
+
+    Additionally we also provide an `export` action streaming every user.
     """
-    queryset = User.objects.all()
+    queryset = User.objects.prefetch_related(
+        Prefetch('snippets', queryset=Snippet.objects.only('pk', 'owner')),
+    )
     serializer_class = UserSerializer
+    pagination_class = UserCursorPagination
+
+    @action(detail=False)
+    def export(self, request, *args, **kwargs):
+        # Without an ordering, SQLite may return rows in the order of whichever
+        # index covers the query.
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        return streaming_export(request, UserSerializer, queryset, self.get_serializer_context())
+
+
+@require_safe
+@cache_control(public=True, max_age=60 * 60 * 24)
+def snippet_stylesheet(request, style):
+    """
+    Serves the CSS of a Pygments style, shared by every highlighted snippet
+    using that style.
+    """
+    try:
+        css = highlighting.stylesheet(style)
+    except ClassNotFound:
+        raise Http404(f'Unknown style {style!r}')
+    return HttpResponse(css, content_type='text/css')
@@ -36,17 +36,22 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'rest_framework.authtoken',
     'snippets',
 ]
 
+# API requests, which authenticate with an Authorization header and are routed
+# to a REST framework view, get an empty session and skip the CSRF and messages
+# middleware.
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'snippets.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
+    'snippets.middleware.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'snippets.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'snippets.replicas.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'tutorial.urls'
@@ -75,9 +80,34 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
 }
 
+# Read replicas: the list and retrieve actions send their queries to one of
+# these aliases, except for clients which wrote less than
+# DATABASE_REPLICA_PIN_SECONDS ago. Locally, list 'replica' here and keep
+# db.replica.sqlite3 up to date with `python manage.py sync_replicas --loop`.
+DATABASE_ROUTERS = ['snippets.replicas.ReplicaRouter']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+# Sessions are stored in signed cookies, and the users of sessions and tokens
+# are cached for AUTH_CACHE_TIMEOUT seconds, so that authenticated requests
+# need no query to find their user. Users are only cached when AUTH_CACHE_ALIAS
+# names a cache shared by every worker, such as Redis or Memcached: with the
+# default local-memory cache, they are loaded on every request.
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+AUTHENTICATION_BACKENDS = ['snippets.authentication.CachedModelBackend']
+AUTH_CACHE_ALIAS = 'default'
+AUTH_CACHE_TIMEOUT = 60
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -119,5 +149,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    'LIST_SERIALIZER_ERRORS_AS_DICT': True,
+    # API clients authenticate with `Authorization: Token <key>`, the key
+    # being obtained from /api-token-auth/.
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'snippets.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
 }
+
+# Highlight snippets in a pool of worker processes after they are saved,
+# instead of inside the request. SNIPPETS_HIGHLIGHT_WORKERS defaults to the
+# number of CPUs. Snippets still pending when the server stops are highlighted
+# by `manage.py highlight_pending`, which should run on start-up.
+SNIPPETS_DEFERRED_HIGHLIGHT = False
+SNIPPETS_HIGHLIGHT_WORKERS = None
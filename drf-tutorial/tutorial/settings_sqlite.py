@@ -0,0 +1,30 @@
+"""
+SQLite tuning for the tutorial project, for deployments where several
+workers share the database file. It is not enabled by default: run with
+`DJANGO_SETTINGS_MODULE=tutorial.settings_sqlite` to use it.
+"""
+from tutorial.settings import *  # noqa: F401,F403
+from tutorial.settings import DATABASES
+
+# WAL lets readers run alongside the writer, synchronous=NORMAL only syncs at
+# checkpoints (safe in WAL mode), reads go through a 256 MiB memory map and a
+# 64 MiB page cache, and writers wait up to 5 s for the lock.
+SQLITE_INIT_COMMAND = (
+    'PRAGMA journal_mode=WAL;'
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA mmap_size=268435456;'
+    'PRAGMA cache_size=-65536;'
+    'PRAGMA busy_timeout=5000;'
+    'PRAGMA temp_store=MEMORY;'
+)
+
+for database in DATABASES.values():
+    database.setdefault('OPTIONS', {})['init_command'] = SQLITE_INIT_COMMAND
+    # Connections, and the page cache that comes with them, are kept
+    # between requests.
+    database['CONN_MAX_AGE'] = 600
+    database['CONN_HEALTH_CHECKS'] = True
+
+# IMMEDIATE transactions take the write lock upfront, so concurrent writers
+# queue on busy_timeout instead of failing to upgrade a read lock.
+DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class QuickstartConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'quickstart'
+    name = 'tutorial.quickstart'
+
+    def ready(self):
+        # Connects the receivers dropping changed users and tokens from the cache.
+        from tutorial.quickstart import authentication  # noqa: F401
@@ -0,0 +1,200 @@
+from collections import defaultdict
+from functools import cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.pagination import CursorPagination
+from rest_framework.relations import HyperlinkedIdentityField, HyperlinkedRelatedField, ManyRelatedField, RelatedField
+from rest_framework.response import Response
+
+from tutorial.quickstart.reversal import url_builder
+
+_VALUE, _OPTIONAL, _URL, _MANY = range(4)
+
+
+def _is_column(model, attrs):
+    # Whether a source is a column of the model, or of a model it has a
+    # foreign key to, which .values() can fetch.
+    try:
+        for attr in attrs[:-1]:
+            field = model._meta.get_field(attr)
+            if not (field.many_to_one or field.one_to_one) or not field.concrete:
+                return False
+            model = field.related_model
+        if attrs[-1] == 'pk':
+            return True
+        field = model._meta.get_field(attrs[-1])
+    except FieldDoesNotExist:
+        return False
+    return field.concrete and not field.is_relation
+
+
+def _related_lookup(model, name):
+    # The model of a to-many relation, and the lookup from it back to `model`.
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if field.many_to_many and not field.auto_created:
+        return field.related_model, field.related_query_name()
+    if field.one_to_many or field.many_to_many:
+        return field.related_model, field.field.name
+    return None
+
+
+def _url_builder(field, context):
+    # The format of the hyperlinks, as chosen by field.to_representation().
+    format = context.get('format')
+    if format and field.format and field.format != format:
+        format = field.format
+    return url_builder(field, context['request'], format)
+
+
+class CompiledSerializer:
+    """
+    A read-only version of a hyperlinked model serializer, serializing
+    ``.values()`` rows instead of model instances.
+
+    The plan of the fields is built once per serializer class, by
+    ``compile_serializer``. Hyperlinks are built from a URL reversed once per
+    request instead of once per row, and to-many hyperlinks are fetched with a
+    single query per field. The output is the same as the one of the
+    serializer, as plain dicts and lists.
+
+    :ivar model: The model of the serializer.
+    :type model: type[Model]
+    :ivar plan: ``(kind, field name, column or relation, field)`` tuples, in
+        the order of the fields of the serializer.
+    :type plan: list[tuple]
+    """
+
+    def __init__(self, model, plan):
+        self.model = model
+        self.plan = plan
+
+    def values(self, queryset, *extra):
+        """
+        Turns a queryset into one of the rows to serialize.
+
+        :param queryset: The objects to serialize.
+        :type queryset: QuerySet
+        :param extra: Other columns to include, such as the ones pagination
+            orders by.
+        :type extra: str
+        :return: The ``.values()`` queryset.
+        :rtype: QuerySet
+        """
+        annotations = queryset.query.annotations
+        columns = {'pk', *extra}
+        for kind, name, column, field in self.plan:
+            if kind == _VALUE or kind == _URL or (kind == _OPTIONAL and column in annotations):
+                columns.add(column)
+        return queryset.prefetch_related(None).values(*columns)
+
+    def serialize(self, rows, context):
+        """
+        Serializes rows returned by ``values()``.
+
+        :param rows: The rows to serialize.
+        :type rows: Iterable[dict]
+        :param context: The serializer context, holding the request.
+        :type context: dict
+        :return: The representation of each row.
+        :rtype: list[dict]
+        """
+        rows = list(rows)
+        plan = []
+        for kind, name, column, field in self.plan:
+            if kind == _URL:
+                plan.append((kind, name, column, _url_builder(field, context)))
+            elif kind == _MANY:
+                plan.append((kind, name, self._fetch_many(field, column, rows, context), None))
+            else:
+                plan.append((kind, name, column, field.to_representation))
+
+        data = []
+        for row in rows:
+            item = {}
+            for kind, name, column, build in plan:
+                if kind == _MANY:
+                    item[name] = column.get(row['pk'], [])
+                    continue
+                if kind == _OPTIONAL and column not in row:
+                    continue
+                value = row[column]
+                item[name] = None if value is None else build(value)
+            data.append(item)
+        return data
+
+    def _fetch_many(self, field, lookup, rows, context):
+        related_model, path = lookup
+        child = field.child_relation
+        build = _url_builder(child, context)
+        links = defaultdict(list)
+        related = related_model._default_manager.filter(
+            **{f'{path}__in': [row['pk'] for row in rows]},
+        ).values_list(path, child.lookup_field)
+        for pk, value in related:
+            links[pk].append(build(value))
+        return links
+
+
+@cache
+def compile_serializer(serializer_class):
+    """
+    Builds the ``CompiledSerializer`` of a serializer class, once per class.
+
+    :param serializer_class: A hyperlinked model serializer class.
+    :type serializer_class: type
+    :return: The compiled serializer, or ``None`` when one of the fields cannot
+        be serialized from ``.values()`` rows, such as nested serializers and
+        method fields.
+    :rtype: CompiledSerializer | None
+    """
+    serializer = serializer_class(context={})
+    model = serializer.Meta.model
+    plan = []
+    for field in serializer._readable_fields:
+        if isinstance(field, HyperlinkedIdentityField):
+            plan.append((_URL, field.field_name, field.lookup_field, field))
+        elif isinstance(field, ManyRelatedField):
+            lookup = _related_lookup(model, field.source)
+            if not isinstance(field.child_relation, HyperlinkedRelatedField) or lookup is None:
+                return None
+            plan.append((_MANY, field.field_name, lookup, field))
+        elif (isinstance(field, (RelatedField, serializers.BaseSerializer, serializers.SerializerMethodField))
+              or field.source == '*'):
+            return None
+        elif _is_column(model, field.source_attrs):
+            plan.append((_VALUE, field.field_name, '__'.join(field.source_attrs), field))
+        elif len(field.source_attrs) == 1 and not hasattr(model, field.source) and field.read_only:
+            # Fields of annotations are skipped when the queryset lacks them,
+            # as the serializer does when the attribute is missing.
+            plan.append((_OPTIONAL, field.field_name, field.source, field))
+        else:
+            return None
+    return CompiledSerializer(model, plan)
+
+
+class CompiledListMixin:
+    """
+    Serves the ``list`` action of a viewset with the ``CompiledSerializer`` of
+    its serializer class, when it has one, and falls back to the serializer
+    otherwise.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = compile_serializer(self.get_serializer_class())
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = ()
+        if isinstance(self.paginator, CursorPagination):
+            # The cursor is read from the last row of the page.
+            ordering = [name.lstrip('-') for name in self.paginator.get_ordering(request, queryset, self)]
+        rows = compiled.values(queryset, *ordering)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page, self.get_serializer_context()))
+        return Response(compiled.serialize(rows, self.get_serializer_context()))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the user table for the cursor pagination of `UserViewSet`, which
+    orders users by `-date_joined, -id`. `auth.User` belongs to Django, so the
+    index is created here rather than declared on the model.
+    """
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX quickstart_user_date_joined_id_idx ON auth_user (date_joined, id)',
+            'DROP INDEX quickstart_user_date_joined_id_idx',
+        ),
+    ]
@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Paginates users from the most recently joined with an opaque cursor, so
+    fetching a page costs the same wherever it is in the list and no
+    `COUNT(*)` is run. Clients may ask for up to `max_page_size` users per page.
+    """
+    ordering = ('-date_joined', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,76 @@
+from rest_framework import serializers
+
+# A lookup value reversed once per hyperlinked field and request, and then
+# replaced by the lookup value of each object.
+_LOOKUP_PLACEHOLDER = 8675309123456789
+
+
+def url_builder(field, request, format):
+    """
+    Returns a function building the hyperlink of a lookup value, as
+    ``field.get_url()`` would, from a URL reversed once.
+
+    The URL is reversed with a placeholder lookup value, and split around it.
+    Integer lookup values are then formatted into it, and other values, which
+    the URL pattern may escape or reject, are reversed.
+
+    :param field: A hyperlinked field.
+    :type field: HyperlinkedRelatedField
+    :param request: The request, which absolute URLs are built from.
+    :type request: Request
+    :param format: The format suffix of the URLs, if any.
+    :type format: str | None
+    :return: A function of the lookup value returning the hyperlink.
+    :rtype: Callable
+    """
+    def reverse(value):
+        return field.reverse(field.view_name, kwargs={field.lookup_url_kwarg: value}, request=request, format=format)
+
+    placeholder = str(_LOOKUP_PLACEHOLDER)
+    url = reverse(_LOOKUP_PLACEHOLDER)
+    if url.count(placeholder) != 1:
+        return reverse
+    prefix, _, suffix = url.partition(placeholder)
+    # Other values may be escaped, or rejected, by the URL pattern.
+    return lambda value: prefix + str(value) + suffix if type(value) is int else reverse(value)
+
+
+class CachedUrlMixin:
+    """
+    Builds the hyperlinks of a hyperlinked field from a URL reversed once per
+    request and format, instead of calling ``reverse()`` for every object.
+
+    Field instances are created per serializer instance, so the URLs cached by
+    a field never outlive the request they were built for.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._url_builders = {}
+
+    def get_url(self, obj, view_name, request, format):
+        if hasattr(obj, 'pk') and obj.pk in (None, ''):
+            return None
+        if view_name != self.view_name:
+            return super().get_url(obj, view_name, request, format)
+        key = (request, format)
+        if key not in self._url_builders:
+            self._url_builders[key] = url_builder(self, request, format)
+        return self._url_builders[key](getattr(obj, self.lookup_field))
+
+
+class CachedHyperlinkedRelatedField(CachedUrlMixin, serializers.HyperlinkedRelatedField):
+    pass
+
+
+class CachedHyperlinkedIdentityField(CachedUrlMixin, serializers.HyperlinkedIdentityField):
+    pass
+
+
+class CachedHyperlinkedModelSerializer(serializers.HyperlinkedModelSerializer):
+    """
+    A ``HyperlinkedModelSerializer`` whose generated ``url`` and relational
+    fields cache their URLs.
+    """
+    serializer_related_field = CachedHyperlinkedRelatedField
+    serializer_url_field = CachedHyperlinkedIdentityField
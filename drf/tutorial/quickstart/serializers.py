@@ -1,14 +1,15 @@
 from django.contrib.auth.models import User, Group
-from rest_framework import serializers
 
+from tutorial.quickstart.reversal import CachedHyperlinkedModelSerializer
 
-class UserSerializer(serializers.HyperlinkedModelSerializer):
+
+class UserSerializer(CachedHyperlinkedModelSerializer):
     class Meta:
         model = User
         fields = ['url', 'username', 'email', 'groups']
 
 
-class GroupSerializer(serializers.HyperlinkedModelSerializer):
+class GroupSerializer(CachedHyperlinkedModelSerializer):
     class Meta:
         model = Group
         fields = ['url', 'name']
@@ -0,0 +1,77 @@
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+
+from tutorial.quickstart.compiled import compile_serializer
+
+EXPORT_CHUNK_SIZE = 500
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _serialize_rows(serializer, queryset, chunk_size):
+    # The serializer fields are built once, then reused for every row.
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        yield json.dumps(serializer.to_representation(instance), cls=JSONEncoder, ensure_ascii=False)
+
+
+def _serialize_compiled_rows(compiled, queryset, context, chunk_size):
+    rows = compiled.values(queryset).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        for item in compiled.serialize(chunk, context):
+            yield json.dumps(item, cls=JSONEncoder, ensure_ascii=False)
+
+
+def _json_array(rows):
+    yield '['
+    for i, row in enumerate(rows):
+        yield row if i == 0 else ',' + row
+    yield ']'
+
+
+def _ndjson(rows):
+    for row in rows:
+        yield row + '\n'
+
+
+def streaming_export(request, serializer_class, queryset, context, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Streams every object of a queryset as a JSON array, or as newline delimited
+    JSON when the request has ``?export_format=ndjson``.
+
+    Rows are fetched ``chunk_size`` at a time and serialized one by one while the
+    response is being sent, so memory usage stays flat whatever the number of
+    exported objects. Serializers that have a ``CompiledSerializer`` serialize
+    ``.values()`` rows instead of model instances.
+
+    :param request: The request, holding the ``export_format`` query parameter.
+    :type request: Request
+    :param serializer_class: The serializer used for each row.
+    :type serializer_class: type
+    :param queryset: The objects to export.
+    :type queryset: QuerySet
+    :param context: The serializer context, needed for hyperlinked fields.
+    :type context: dict
+    :param chunk_size: The number of rows fetched from the database at a time.
+    :type chunk_size: int
+    :return: The streaming response.
+    :rtype: StreamingHttpResponse
+    :raises ValidationError: If the export format is unknown.
+    """
+    export_format = request.query_params.get('export_format', 'json')
+    if export_format not in CONTENT_TYPES:
+        raise ValidationError({'export_format': f'Must be one of {", ".join(CONTENT_TYPES)}.'})
+
+    compiled = compile_serializer(serializer_class)
+    if compiled is not None:
+        rows = _serialize_compiled_rows(compiled, queryset, context, chunk_size)
+    else:
+        rows = _serialize_rows(serializer_class(context=context), queryset, chunk_size)
+    content = _ndjson(rows) if export_format == 'ndjson' else _json_array(rows)
+    return StreamingHttpResponse(content, content_type=CONTENT_TYPES[export_format])
@@ -1,3 +1,226 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import relations, serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase, APITransactionTestCase
+
+from tutorial.quickstart.compiled import compile_serializer
+from tutorial.quickstart.serializers import GroupSerializer, UserSerializer
+
+
+class UserPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.users = [
+            User.objects.create_user(f'user{i}', date_joined=now - timedelta(days=i))
+            for i in range(25)
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(self.users[0])
+
+    def test_pages_go_from_most_recent_user(self):
+        url, usernames = reverse('user-list') + '?page_size=10', []
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn('count', response.data)
+            usernames += [user['username'] for user in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(usernames, [user.username for user in self.users])
+
+    def test_client_selects_page_size(self):
+        response = self.client.get(reverse('user-list'), {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 25)
+        response = self.client.get(reverse('user-list'), {'page_size': 3})
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class UserExportTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.group = Group.objects.create(name='staff')
+        cls.users = [
+            User.objects.create_user(f'user{i}', date_joined=now - timedelta(days=i))
+            for i in range(12)
+        ]
+        for user in cls.users:
+            user.groups.add(cls.group)
+
+    def setUp(self):
+        self.client.force_authenticate(self.users[0])
+
+    def test_export_streams_json_array(self):
+        response = self.client.get(reverse('user-export'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        users = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([user['username'] for user in users], [user.username for user in self.users])
+        self.assertEqual(len(users[0]['groups']), 1)
+
+    def test_export_streams_ndjson(self):
+        response = self.client.get(reverse('user-export'), {'export_format': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['username'] for line in lines], [user.username for user in self.users])
+
+    def test_export_prefetches_groups(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('user-export'))
+            b''.join(response.streaming_content)
+        self.assertEqual(len(queries), 2)
+
+    def test_export_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('user-export'))
+        self.assertEqual(response.status_code, 403)
+
+
+class CompiledSerializerTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        groups = [Group.objects.create(name=name) for name in ['staff', 'Écrivains', 'ops']]
+        cls.users = [
+            User.objects.create_user(f'user{i}', email=f'user{i}@example.com', date_joined=now - timedelta(days=i))
+            for i in range(8)
+        ]
+        for i, user in enumerate(cls.users):
+            # Added out of order, so that their order in lists is the one of the database.
+            user.groups.add(*groups[i % 3:][::-1])
+
+    def setUp(self):
+        self.client.force_authenticate(self.users[0])
+
+    def get_content(self, url, data=None):
+        response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    def assertSameContent(self, url, data=None):
+        compiled = self.get_content(url, data)
+        with mock.patch('tutorial.quickstart.compiled.compile_serializer', return_value=None), \
+                mock.patch('tutorial.quickstart.streaming.compile_serializer', return_value=None):
+            self.assertEqual(compiled, self.get_content(url, data))
+
+    def test_serializers_are_compiled(self):
+        self.assertIsNotNone(compile_serializer(UserSerializer))
+        self.assertIsNotNone(compile_serializer(GroupSerializer))
+
+    def test_lists_are_byte_identical(self):
+        self.assertSameContent(reverse('user-list'))
+        self.assertSameContent(reverse('user-list'), {'page_size': 3, 'format': 'json'})
+        self.assertSameContent(reverse('user-list', kwargs={'format': 'json'}))
+        self.assertSameContent(reverse('group-list'))
+        self.assertSameContent(reverse('group-list'), {'page': 1, 'format': 'json'})
+
+    def test_next_pages_are_byte_identical(self):
+        url = reverse('user-list') + '?page_size=3'
+        while url:
+            self.assertSameContent(url)
+            url = self.client.get(url).data['next']
+
+    def test_export_is_byte_identical(self):
+        self.assertSameContent(reverse('user-export'))
+        self.assertSameContent(reverse('user-export'), {'export_format': 'ndjson'})
+
+    def test_list_fetches_groups_in_a_single_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('user-list'))
+        self.assertEqual(len(response.data['results']), 8)
+        self.assertEqual(len(queries), 2)
+
+
+class CachedHyperlinkTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        groups = [Group.objects.create(name=name) for name in ['staff', 'ops']]
+        for i in range(3):
+            User.objects.create_user(f'user{i}').groups.add(*groups)
+
+    def test_same_hyperlinks_as_the_drf_fields(self):
+        class PlainUserSerializer(serializers.HyperlinkedModelSerializer):
+            class Meta:
+                model = User
+                fields = ['url', 'username', 'email', 'groups']
+
+        users = User.objects.all()
+        for path, format in [('/users/', None), ('/users/?format=json', None), ('/users.json', 'json')]:
+            context = {'request': Request(APIRequestFactory().get(path)), 'format': format}
+            self.assertEqual(UserSerializer(users, many=True, context=context).data,
+                             PlainUserSerializer(users, many=True, context=context).data)
+
+    def test_urls_are_reversed_once_per_field(self):
+        context = {'request': Request(APIRequestFactory().get('/users/'))}
+        with mock.patch.object(relations, 'reverse', wraps=relations.reverse) as reverse:
+            data = UserSerializer(User.objects.all(), many=True, context=context).data
+        self.assertEqual(len(data[2]['groups']), 2)
+        self.assertEqual(reverse.call_count, 2)
+
+
+# The users are only cached in a cache shared by every worker.
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(prefix='quickstart-cache-'),
+    }
+})
+class CachedAuthenticationTests(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user('user', password='password')
+        self.token = Token.objects.create(user=self.user)
+        self.url = reverse('user-detail', args=[self.user.pk])
+
+    def get(self, **headers):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, headers=headers)
+        return response, len(queries)
+
+    def test_token_requests_load_the_user_once(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        self.get(**headers)
+        response, queries = self.get(**headers)
+        self.assertEqual(response.status_code, 200)
+        # The user, and their groups.
+        self.assertEqual(queries, 2)
+        self.assertNotIn('csrftoken', response.cookies)
+
+    def test_session_requests_load_the_user_once(self):
+        self.client.force_login(self.user)
+        self.get()
+        self.assertEqual(self.get()[1], 2)
+
+    def test_deleted_tokens_are_rejected(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        self.get(**headers)
+        self.token.delete()
+        self.assertEqual(self.get(**headers)[0].status_code, 403)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_caches_are_not_used(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        self.get(**headers)
+        # The token, the user, then the user and their groups for the response.
+        self.assertEqual(self.get(**headers)[1], 4)
+
+    def test_login_keeps_its_session_with_an_authorization_header(self):
+        # Only REST framework views skip the session.
+        headers = {'Authorization': f'Token {self.token.key}'}
+        data = {'username': self.user.username, 'password': 'password'}
+        response = self.client.post(reverse('rest_framework:login'), data, headers=headers)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('sessionid', response.cookies)
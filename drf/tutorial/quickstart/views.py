@@ -1,15 +1,21 @@
 from django.contrib.auth.models import User, Group
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
 
+from tutorial.quickstart.compiled import CompiledListMixin
+from tutorial.quickstart.pagination import UserCursorPagination
 from tutorial.quickstart.serializers import UserSerializer, GroupSerializer
+from tutorial.quickstart.streaming import streaming_export
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(CompiledListMixin, viewsets.ModelViewSet):
     """
     Handles user-related actions via a RESTful API.
 
     Provides a viewset for managing User objects, allowing standard CRUD operations
-    while ensuring only authenticated users can perform actions.
+    while ensuring only authenticated users can perform actions. Lists are
+    serialized from ``.values()`` rows by the compiled serializer, with the
+    groups of a whole page fetched in a single query.
 
     :ivar queryset: Queryset of User objects ordered by their date of joining in
         descending order.
@@ -22,13 +28,36 @@ class UserViewSet(viewsets.ModelViewSet):
     :ivar permission_classes: List of permission classes that define the required
         permissions for accessing this viewset.
     :type permission_classes: list
+
+    :ivar pagination_class: Cursor pagination on the date of joining, backed by
+        an index, so that deep pages are as fast as the first one.
+    :type pagination_class: type
     """
     queryset = User.objects.all().order_by('-date_joined')
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = UserCursorPagination
+
+    @action(detail=False)
+    def export(self, request):
+        """
+        Streams every user, most recent first, as a JSON array or as NDJSON.
+
+        Users are read in chunks along the date of joining index, with their
+        groups prefetched chunk by chunk, so the export runs in constant memory.
+
+        :param request: The incoming request.
+        :type request: Request
+        :return: The streaming response.
+        :rtype: StreamingHttpResponse
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by(
+            '-date_joined', '-id',
+        ).prefetch_related('groups')
+        return streaming_export(request, UserSerializer, queryset, self.get_serializer_context())
 
 
-class GroupViewSet(viewsets.ModelViewSet):
+class GroupViewSet(CompiledListMixin, viewsets.ModelViewSet):
     """
     Manages and interacts with groups in the application.
 
@@ -36,15 +36,20 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'rest_framework.authtoken',
+    'tutorial.quickstart',
 ]
 
+# API requests, which authenticate with an Authorization header and are routed
+# to a REST framework view, get an empty session and skip the CSRF and messages
+# middleware.
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'tutorial.quickstart.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
+    'tutorial.quickstart.middleware.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'tutorial.quickstart.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -77,6 +82,16 @@ DATABASES = {
     }
 }
 
+# Sessions are stored in signed cookies, and the users of sessions and tokens
+# are cached for AUTH_CACHE_TIMEOUT seconds, so that authenticated requests
+# need no query to find their user. Users are only cached when AUTH_CACHE_ALIAS
+# names a cache shared by every worker, such as Redis or Memcached: with the
+# default local-memory cache, they are loaded on every request.
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+AUTHENTICATION_BACKENDS = ['tutorial.quickstart.authentication.CachedModelBackend']
+AUTH_CACHE_ALIAS = 'default'
+AUTH_CACHE_TIMEOUT = 60
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -118,5 +133,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # API clients authenticate with `Authorization: Token <key>`, the key
+    # being obtained from /api-token-auth/.
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'tutorial.quickstart.authentication.CachedTokenAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
 }